@@ -0,0 +1,126 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from clients import CREDENTIAL_KEYS, client_pool, parse_credentials
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class CredentialRegistry:
+    """
+    Holds the credentials of several Reddit accounts, keyed by username.
+
+    Clients come from the shared client pool, so each account keeps one authenticated
+    session however many registries refer to it.
+    """
+
+    def __init__(self):
+        self._credentials = {}
+        self._lock = Lock()
+
+    def add(self, credentials):
+        """
+        Register an account.
+
+        Raises:
+            ValueError: If any credential is missing.
+
+        Returns:
+            str: The account's username.
+        """
+        missing = [key for key in CREDENTIAL_KEYS if not credentials.get(key)]
+        if missing:
+            raise ValueError(f"Missing credentials: {', '.join(missing)}")
+        username = credentials["REDDIT_USERNAME"]
+        with self._lock:
+            self._credentials[username] = dict(credentials)
+        return username
+
+    def add_env_content(self, content):
+        """Register an account from the content of a .env file."""
+        return self.add(parse_credentials(content))
+
+    def remove(self, username):
+        with self._lock:
+            self._credentials.pop(username, None)
+
+    def usernames(self):
+        with self._lock:
+            return list(self._credentials)
+
+    def client(self, username):
+        with self._lock:
+            credentials = self._credentials[username]
+        return client_pool.get(credentials)
+
+    def __len__(self):
+        return len(self._credentials)
+
+
+# Function to run a function against every registered account in parallel
+def fan_out(registry, func, *args, usernames=None, **kwargs):
+    """
+    Call func(reddit, *args, **kwargs) for each account concurrently.
+
+    Requests are paced by each account's own RequestGovernor, so a busy account never
+    slows the others.
+
+    Args:
+        registry (CredentialRegistry): The accounts to run against.
+        func (callable): A function taking a praw.Reddit client as its first argument, such
+            as reddit_crud.read_user_posts or analytics.get_post_analytics.
+        usernames (list): Restrict the fan-out to these accounts.
+
+    Returns:
+        dict: Map of username to the function's result, or an "Error: ..." string if it raised.
+    """
+    usernames = usernames if usernames is not None else registry.usernames()
+    if not usernames:
+        return {}
+
+    def call(username):
+        try:
+            reddit = registry.client(username)
+            return func(reddit, *args, **kwargs)
+        except Exception as e:
+            logger.error(f"An error occurred for u/{username}: {e}")
+            return f"Error: {e}"
+
+    with ThreadPoolExecutor(max_workers=len(usernames), thread_name_prefix="account-fan-out") as executor:
+        return dict(zip(usernames, executor.map(call, usernames)))
+
+
+# Function to build one analytics frame across accounts
+def fan_out_frame(registry, loader=None, usernames=None, **kwargs):
+    """
+    Load each account's submissions in parallel and merge them into one frame.
+
+    Args:
+        registry (CredentialRegistry): The accounts to load.
+        loader (callable): Called as loader(reddit, **kwargs) and returns SubmissionRecords.
+            Defaults to analytics.fetch_submissions.
+        usernames (list): Restrict the load to these accounts.
+
+    Returns:
+        tuple: (pd.DataFrame from build_post_frame with a categorical 'account' column,
+            dict of username to error message for accounts that failed).
+    """
+    # Imported here so that CRUD-only callers never load pandas and plotly
+    import pandas as pd
+    from analytics import build_post_frame, fetch_submissions
+    from records import POST_FRAME_DTYPES
+
+    results = fan_out(registry, loader or fetch_submissions, usernames=usernames, **kwargs)
+    frames, errors = [], {}
+    for username, result in results.items():
+        if isinstance(result, str):
+            errors[username] = result
+            continue
+        frames.append(build_post_frame(result).assign(account=username))
+    frame = pd.concat(frames, ignore_index=True) if frames else build_post_frame([]).assign(account=None)
+    # concat turns categoricals whose categories differ between accounts back into object
+    frame = frame.astype({column: dtype for column, dtype in POST_FRAME_DTYPES.items() if column in frame.columns})
+    frame['account'] = frame['account'].astype('category')
+    return frame, errors
@@ -0,0 +1,162 @@
+import os
+import json
+import logging
+
+from cache import TTLCache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+# Upvote ratios are counted in buckets of this width
+RATIO_BUCKET_WIDTH = 0.05
+RATIO_BUCKETS = 20
+
+# Periods that activity can be rolled up to, as (seconds per period, offset of the first period
+# start from the epoch); weeks start on Monday, and the first Monday was 1970-01-05
+PERIODS = {
+    'day': (SECONDS_PER_DAY, 0),
+    'week': (7 * SECONDS_PER_DAY, 4 * SECONDS_PER_DAY),
+}
+
+# Materialized aggregates over the posts table, kept current by triggers so every insert,
+# update or delete of a post adjusts only the rows it touches. The version counters change
+# whenever the data behind a chart does and key the figure cache; comments count as changed
+# once a thread's ingestion is marked done in comment_sync.
+AGGREGATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_post_aggregates (
+    username TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    subreddit TEXT NOT NULL,
+    posts INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    total_comments INTEGER NOT NULL,
+    upvote_ratio_sum REAL NOT NULL,
+    PRIMARY KEY (username, day, subreddit)
+);
+
+CREATE TABLE IF NOT EXISTS upvote_ratio_histogram (
+    username TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    posts INTEGER NOT NULL,
+    PRIMARY KEY (username, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS aggregate_versions (
+    username TEXT PRIMARY KEY,
+    posts_version INTEGER NOT NULL DEFAULT 0,
+    snapshots_version INTEGER NOT NULL DEFAULT 0,
+    comments_version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS aggregate_post_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO daily_post_aggregates VALUES (
+        NEW.username, CAST(NEW.created_utc / 86400 AS INTEGER) * 86400, NEW.subreddit,
+        1, NEW.score, NEW.num_comments, NEW.upvote_ratio)
+    ON CONFLICT (username, day, subreddit) DO UPDATE SET
+        posts = posts + 1, total_score = total_score + excluded.total_score,
+        total_comments = total_comments + excluded.total_comments,
+        upvote_ratio_sum = upvote_ratio_sum + excluded.upvote_ratio_sum;
+    INSERT INTO upvote_ratio_histogram VALUES (NEW.username, MIN(CAST(NEW.upvote_ratio * 20 AS INTEGER), 19), 1)
+    ON CONFLICT (username, bucket) DO UPDATE SET posts = posts + 1;
+    INSERT INTO aggregate_versions (username, posts_version) VALUES (NEW.username, 1)
+    ON CONFLICT (username) DO UPDATE SET posts_version = posts_version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS aggregate_post_update AFTER UPDATE OF score, num_comments, upvote_ratio, title ON posts
+WHEN OLD.score != NEW.score OR OLD.num_comments != NEW.num_comments OR OLD.upvote_ratio != NEW.upvote_ratio
+    OR OLD.title != NEW.title
+BEGIN
+    UPDATE daily_post_aggregates SET
+        total_score = total_score - OLD.score + NEW.score,
+        total_comments = total_comments - OLD.num_comments + NEW.num_comments,
+        upvote_ratio_sum = upvote_ratio_sum - OLD.upvote_ratio + NEW.upvote_ratio
+    WHERE username = OLD.username AND day = CAST(OLD.created_utc / 86400 AS INTEGER) * 86400
+        AND subreddit = OLD.subreddit;
+    UPDATE upvote_ratio_histogram SET posts = posts - 1
+    WHERE username = OLD.username AND bucket = MIN(CAST(OLD.upvote_ratio * 20 AS INTEGER), 19);
+    INSERT INTO upvote_ratio_histogram VALUES (NEW.username, MIN(CAST(NEW.upvote_ratio * 20 AS INTEGER), 19), 1)
+    ON CONFLICT (username, bucket) DO UPDATE SET posts = posts + 1;
+    UPDATE aggregate_versions SET posts_version = posts_version + 1 WHERE username = NEW.username;
+END;
+
+CREATE TRIGGER IF NOT EXISTS aggregate_post_delete AFTER DELETE ON posts BEGIN
+    UPDATE daily_post_aggregates SET
+        posts = posts - 1, total_score = total_score - OLD.score,
+        total_comments = total_comments - OLD.num_comments,
+        upvote_ratio_sum = upvote_ratio_sum - OLD.upvote_ratio
+    WHERE username = OLD.username AND day = CAST(OLD.created_utc / 86400 AS INTEGER) * 86400
+        AND subreddit = OLD.subreddit;
+    DELETE FROM daily_post_aggregates WHERE username = OLD.username AND posts <= 0;
+    UPDATE upvote_ratio_histogram SET posts = posts - 1
+    WHERE username = OLD.username AND bucket = MIN(CAST(OLD.upvote_ratio * 20 AS INTEGER), 19);
+    UPDATE aggregate_versions SET posts_version = posts_version + 1 WHERE username = OLD.username;
+END;
+
+CREATE TRIGGER IF NOT EXISTS aggregate_snapshot_insert AFTER INSERT ON metric_snapshots BEGIN
+    UPDATE aggregate_versions SET snapshots_version = snapshots_version + 1
+    WHERE username = (SELECT username FROM posts WHERE id = NEW.post_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS aggregate_account_snapshot_insert AFTER INSERT ON account_snapshots BEGIN
+    INSERT INTO aggregate_versions (username, snapshots_version) VALUES (NEW.username, 1)
+    ON CONFLICT (username) DO UPDATE SET snapshots_version = snapshots_version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS aggregate_comment_sync_insert AFTER INSERT ON comment_sync BEGIN
+    UPDATE aggregate_versions SET comments_version = comments_version + 1
+    WHERE username = (SELECT username FROM posts WHERE id = NEW.post_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS aggregate_comment_sync_update AFTER UPDATE ON comment_sync BEGIN
+    UPDATE aggregate_versions SET comments_version = comments_version + 1
+    WHERE username = (SELECT username FROM posts WHERE id = NEW.post_id);
+END;
+"""
+
+# Recomputes the aggregates from scratch, for databases created before the triggers existed
+REBUILD_AGGREGATES = """
+DELETE FROM daily_post_aggregates;
+DELETE FROM upvote_ratio_histogram;
+INSERT INTO daily_post_aggregates
+    SELECT username, CAST(created_utc / 86400 AS INTEGER) * 86400, subreddit, COUNT(*), SUM(score),
+           SUM(num_comments), SUM(upvote_ratio)
+    FROM posts GROUP BY username, CAST(created_utc / 86400 AS INTEGER), subreddit;
+INSERT INTO upvote_ratio_histogram
+    SELECT username, MIN(CAST(upvote_ratio * 20 AS INTEGER), 19), COUNT(*)
+    FROM posts GROUP BY username, MIN(CAST(upvote_ratio * 20 AS INTEGER), 19);
+INSERT INTO aggregate_versions (username, posts_version)
+    SELECT DISTINCT username, 1 FROM posts WHERE true
+    ON CONFLICT (username) DO UPDATE SET posts_version = posts_version + 1;
+"""
+
+# Finished figures as Plotly JSON, keyed by chart, parameters and the data versions they were built from
+figure_cache = TTLCache(
+    ttl=float(os.getenv("FIGURE_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("FIGURE_CACHE_MAX_ENTRIES", "128")),
+    max_bytes=int(os.getenv("FIGURE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    name="figures",
+)
+
+
+# Function to return a chart from the figure cache, building and caching it on a miss
+def cached_figure(key, build):
+    """
+    Return the figure for key, calling build() only if it is not cached.
+
+    Args:
+        key (tuple): Identifies the figure. Include the data versions the figure depends
+            on, from PostStore.data_versions, so that any change to the data misses the cache.
+        build (callable): Zero-argument function returning a plotly Figure.
+
+    Returns:
+        plotly.graph_objects.Figure: The figure.
+    """
+    import plotly.graph_objects as go
+
+    found, figure_json = figure_cache.get(key)
+    if not found:
+        figure_json = build().to_json()
+        figure_cache.set(key, figure_json)
+    return go.Figure(json.loads(figure_json), skip_invalid=True)
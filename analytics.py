@@ -1,118 +1,434 @@
+from threading import Lock
+
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+
+from aggregates import RATIO_BUCKET_WIDTH, RATIO_BUCKETS
+from cache import TTLCache, cached_listing
+from downsample import (
+    MAX_BARS, MAX_POINTS, TABLE_PAGE_SIZE, WEBGL_THRESHOLD, downsample_frame, histogram_frame, limit_series,
+    top_n_with_other
+)
+from instrumentation import timed_chart
+from records import POST_FRAME_DTYPES, SubmissionRecord, submission_to_record
+from wordfreq import WordFrequencyIndex, render_word_cloud
 
 # Function to create a table showing post details
-def post_details_table(post_data):
+@timed_chart
+def post_details_table(post_data, page=0, page_size=TABLE_PAGE_SIZE):
     """
     Create a table showing post details including title, upvotes, comments, and URL.
 
+    Only one page of rows is put into the figure, so its size does not grow with the data.
+
     Parameters:
-        post_data (list): A list of dictionaries, each containing post details.
+        post_data (pd.DataFrame or list): A frame from build_post_frame, or anything it accepts.
+        page (int): Zero-based page to show.
+        page_size (int): Rows per page.
 
     Returns:
         fig (plotly.graph_objects.Figure): A plotly figure representing the post details table.
     """
-    # Create a DataFrame from the post data
-    df = pd.DataFrame(post_data)
+    df = build_post_frame(post_data)
+    df = df.iloc[page * page_size:(page + 1) * page_size]
 
     # Create a table chart using plotly
     fig = go.Figure(go.Table(
         header=dict(values=["Title", "Upvotes", "Comments", "URL"]),
-        cells=dict(values=[df['title'], df['upvotes'], df['comments'], df['url']])
+        cells=dict(values=[df['title'], df['score'], df['num_comments'], df['url']])
     ))
 
     return fig
 
+# Function to fetch the user's submissions once for all analytics views
+def fetch_submissions(reddit, limit=10):
+    """
+    Fetch the authenticated user's latest submissions in a single listing walk.
+    Results are served from the listing cache while fresh.
+
+    Parameters:
+        reddit (praw.Reddit): The initialized Reddit client.
+        limit (int): The number of submissions to retrieve.
+
+    Returns:
+        list: A list of SubmissionRecord tuples, newest first.
+    """
+    return cached_listing(reddit, "submissions", limit, lambda: [
+        submission_to_record(submission) for submission in reddit.user.me().submissions.new(limit=limit)
+    ])
+
 # Function to get post analytics
-def get_post_analytics(reddit):
-    posts = []
-    for submission in reddit.user.me().submissions.new(limit=10):  # Adjust limit as needed
-        post = {
-            'title': submission.title,
-            'upvotes': submission.score,
-            'comments': submission.num_comments,
-            'url': submission.url,
+def get_post_analytics(reddit, submissions=None):
+    if submissions is None:
+        submissions = fetch_submissions(reddit)
+    return [
+        {
+            'title': record.title,
+            'upvotes': record.score,
+            'comments': record.num_comments,
+            'url': record.url,
+            'created_utc': record.created_utc,
         }
-        posts.append(post)
-    return posts
+        for record in submissions
+    ]
 
 # Function to get engagement analytics
-def get_engagement_analytics(reddit):
-    engagement_data = []
-    for submission in reddit.user.me().submissions.new(limit=10):  # Adjust limit as needed
-        engagement_data.append({
-            'title': submission.title,
-            'upvote_ratio': submission.upvote_ratio,
-            'num_comments': submission.num_comments,
-            'score': submission.score,
-        })
-    return engagement_data
+def get_engagement_analytics(reddit, submissions=None):
+    if submissions is None:
+        submissions = fetch_submissions(reddit)
+    return [
+        {
+            'title': record.title,
+            'upvote_ratio': record.upvote_ratio,
+            'num_comments': record.num_comments,
+            'score': record.score,
+        }
+        for record in submissions
+    ]
 
 # Function to get growth analytics
-def get_growth_analytics(reddit):
-    growth_data = []
-    for submission in reddit.user.me().submissions.new(limit=10):  # Adjust limit as needed
-        growth_data.append({
-            'title': submission.title,
-            'created_utc': submission.created_utc,  # Correct access for PRAW object
-            'score': submission.score,
-        })
-    return growth_data
+def get_growth_analytics(reddit, submissions=None):
+    if submissions is None:
+        submissions = fetch_submissions(reddit)
+    return [
+        {
+            'title': record.title,
+            'created_utc': record.created_utc,
+            'score': record.score,
+        }
+        for record in submissions
+    ]
 
 
-# Function to generate a post frequency chart
-def post_frequency_chart(post_data):
-    post_titles = [post['title'] for post in post_data]
-    post_dates = []
+# Legacy post dict keys and the frame columns they map to
+POST_FRAME_ALIASES = {'upvotes': 'score', 'comments': 'num_comments'}
+
+# Function to choose WebGL for line charts with many points
+def _render_mode(df):
+    return 'webgl' if len(df) > WEBGL_THRESHOLD else 'svg'
+
+# Function to build the columnar frame all chart functions work on
+def build_post_frame(post_data):
+    """
+    Build a typed DataFrame of posts.
+
+    Parameters:
+        post_data: A DataFrame (returned unchanged), a list of SubmissionRecord tuples or a
+            list of post dicts as returned by the get_*_analytics functions.
 
-    for post in post_data:
-        try:
-            post_dates.append(pd.to_datetime(post['created_utc'], unit='s'))  # Convert UTC to datetime
-        except KeyError:
-            post_dates.append(None)  # Handle missing 'created_utc' field
+    Returns:
+        pd.DataFrame: Columns from POST_FRAME_DTYPES that are present in the input, plus
+            created_utc as datetime64 when available.
+    """
+    if isinstance(post_data, pd.DataFrame):
+        return post_data
+
+    if not len(post_data) or isinstance(post_data[0], SubmissionRecord):
+        df = pd.DataFrame.from_records(post_data, columns=SubmissionRecord._fields)
+    else:
+        df = pd.DataFrame.from_records(post_data).rename(columns=POST_FRAME_ALIASES)
 
-    # Create a DataFrame with post titles and post dates
-    df = pd.DataFrame({'title': post_titles, 'date': post_dates})
+    df = df.astype({column: dtype for column, dtype in POST_FRAME_DTYPES.items() if column in df.columns})
+    if 'created_utc' in df.columns:
+        df['created_utc'] = pd.to_datetime(df['created_utc'], unit='s', errors='coerce')
+    return df
 
-    # Handle invalid datetime conversion gracefully
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df['date'] = df['date'].dt.date
+# Function to generate a post frequency chart
+@timed_chart
+def post_frequency_chart(post_data):
+    df = build_post_frame(post_data)
 
-    # Count the frequency of posts per date
-    post_frequency = df['date'].value_counts().sort_index()
+    # Count the frequency of posts per date; missing timestamps are dropped
+    if 'created_utc' in df.columns:
+        post_frequency = df['created_utc'].dt.floor('D').value_counts().sort_index()
+        # Years of daily bars are rolled up to weeks to keep the figure small
+        if len(post_frequency) > MAX_POINTS:
+            post_frequency = post_frequency.resample('W-MON', label='left', closed='left').sum()
+    else:
+        post_frequency = pd.Series(dtype='int64')
 
     # Convert the post_frequency (Series) to DataFrame for Plotly compatibility
-    post_frequency_df = post_frequency.reset_index()
-    post_frequency_df.columns = ['date', 'post_count']  # Rename columns for clarity
+    post_frequency_df = post_frequency.rename_axis('date').reset_index(name='post_count')
 
     # Create the bar chart using Plotly
     fig = px.bar(post_frequency_df, x='date', y='post_count', labels={'x': 'Date', 'y': 'Post Count'})
 
     return fig
 
+# Function to generate a posting activity chart from the materialized aggregates
+@timed_chart
+def activity_chart(activity, period='day', by_subreddit=False):
+    """
+    Plot the number of posts per day or week, optionally stacked by subreddit.
+
+    Parameters:
+        activity (list): Rows of (period_start, subreddit, posts, total_score, total_comments,
+            mean_upvote_ratio) as returned by PostStore.post_activity.
+        period (str): The period the rows were rolled up to, used in the axis label.
+        by_subreddit (bool): Colour the bars by subreddit instead of summing them.
+    """
+    df = pd.DataFrame.from_records(activity, columns=[
+        'period_start', 'subreddit', 'posts', 'total_score', 'total_comments', 'mean_upvote_ratio'])
+    df['period_start'] = pd.to_datetime(df['period_start'], unit='s')
+    # Minor subreddits share one colour, so the number of traces stays bounded
+    df = limit_series(df, 'subreddit', 'posts')
+    group = ['period_start', 'subreddit'] if by_subreddit else ['period_start']
+    df = df.groupby(group, as_index=False)[['posts', 'total_score', 'total_comments']].sum()
+    fig = px.bar(df, x='period_start', y='posts', color='subreddit' if by_subreddit else None,
+                 hover_data=['total_score', 'total_comments'],
+                 labels={'period_start': period.title(), 'posts': 'Post Count', 'subreddit': 'Subreddit',
+                         'total_score': 'Total Score', 'total_comments': 'Total Comments'},
+                 title=f"Posts per {period.title()}")
+    return fig
+
+# Function to create a subreddit breakdown chart from the materialized aggregates
+@timed_chart
+def subreddit_chart(activity):
+    """
+    Plot posts, total score and total comments per subreddit.
+
+    Parameters:
+        activity (list): Rows as returned by PostStore.post_activity.
+    """
+    df = pd.DataFrame.from_records(activity, columns=[
+        'period_start', 'subreddit', 'posts', 'total_score', 'total_comments', 'mean_upvote_ratio'])
+    df = df.groupby('subreddit', as_index=False)[['posts', 'total_score', 'total_comments']].sum()
+    df = top_n_with_other(df.sort_values('posts', ascending=False), 'subreddit', 'posts')
+    fig = px.bar(df, x='subreddit', y=['total_score', 'total_comments'], barmode='group', hover_data=['posts'],
+                 labels={'subreddit': 'Subreddit', 'value': 'Total', 'variable': 'Metric', 'posts': 'Posts'},
+                 title="Engagement by Subreddit")
+    return fig
+
+# Function to create upvote ratio distribution chart from the materialized histogram
+@timed_chart
+def upvote_ratio_distribution_chart(distribution):
+    """
+    Plot how many posts fall into each upvote ratio bucket.
+
+    Parameters:
+        distribution (list): Rows of (bucket_start, posts) as returned by
+            PostStore.upvote_ratio_distribution.
+    """
+    df = pd.DataFrame.from_records(distribution, columns=['bucket_start', 'posts'])
+    fig = px.bar(df, x='bucket_start', y='posts', labels={'bucket_start': 'Upvote Ratio', 'posts': 'Posts'},
+                 title="Upvote Ratio Distribution")
+    fig.update_traces(offset=0, width=RATIO_BUCKET_WIDTH)
+    fig.update_xaxes(range=[0, 1])
+    return fig
+
+# Word counts per dataset passed to word_cloud_chart, so sessions showing different accounts
+# neither see each other's titles nor re-tokenize everything when they alternate
+title_indexes = TTLCache(ttl=24 * 3600, max_entries=32, name="title_indexes")
+_title_indexes_lock = Lock()
+
+
+# Function to get the word count index kept for a dataset
+def title_index(dataset):
+    with _title_indexes_lock:
+        found, index = title_indexes.get(dataset)
+        if not found:
+            index = WordFrequencyIndex()
+            title_indexes.set(dataset, index)
+        return index
+
 # Function to create a word cloud from post titles
-def word_cloud_chart(post_data):
-    text = ' '.join([post['title'] for post in post_data])
-    wordcloud = WordCloud(width=800, height=400).generate(text)
-    wordcloud_image = wordcloud.to_image()  # Convert to PIL image
-    return wordcloud_image
+@timed_chart
+def word_cloud_chart(post_data, width=800, height=400, dataset=None):
+    """
+    Render a word cloud of post titles.
+
+    Only titles that were added, removed or edited since the previous call for the same
+    dataset are tokenized, and the image is re-rendered only when the word counts change.
+
+    Args:
+        dataset: Hashable key the word counts are kept under, e.g. the accounts shown.
+
+    Returns:
+        PIL.Image.Image: The word cloud image, or None if the titles contain no words.
+    """
+    df = build_post_frame(post_data)
+    keys = df['id'] if 'id' in df.columns else df['title']
+    frequencies = title_index(dataset).sync_frequencies(dict(zip(keys, df['title'])))
+    return render_word_cloud(frequencies, width, height)
 
 # Function to create post scores chart
+@timed_chart
 def post_scores_chart(post_data):
-    post_titles = [post['title'] for post in post_data]
-    post_scores = [post['upvotes'] for post in post_data]
-    fig = px.bar(x=post_titles, y=post_scores, labels={'x': 'Post Title', 'y': 'Upvotes'})
+    """
+    Plot the score of each post. Beyond MAX_BARS posts only the highest scoring ones get
+    a bar, and the rest are shown as one bar with their mean score.
+    """
+    df = build_post_frame(post_data)
+    df = top_n_with_other(df[['title', 'score']], 'title', 'score', aggregations={'score': 'mean'},
+                          other_label="Other posts, mean")
+    fig = px.bar(df, x='title', y='score', labels={'title': 'Post Title', 'score': 'Upvotes'})
+    return fig
+
+# Function to create upvote ratio chart
+@timed_chart
+def upvote_ratio_chart(post_data):
+    """
+    Plot the upvote ratio of each post, or their distribution beyond MAX_BARS posts.
+    """
+    df = build_post_frame(post_data)
+    if len(df) > MAX_BARS:
+        return upvote_ratio_distribution_chart(histogram_frame(
+            df['upvote_ratio'], bins=RATIO_BUCKETS, value_range=(0, 1))[['bin_start', 'count']].values.tolist())
+    fig = px.bar(
+        df,
+        x='title',
+        y='upvote_ratio',
+        labels={'title': 'Post Title', 'upvote_ratio': 'Upvote Ratio'},
+        title="Engagement Metrics (Upvote Ratio)"
+    )
+    return fig
+
+# Function to create comments per post chart
+@timed_chart
+def comments_chart(post_data):
+    """
+    Plot the comment count of each post. Beyond MAX_BARS posts only the most commented
+    ones get a bar, and the rest are shown as one bar with their mean count.
+    """
+    df = build_post_frame(post_data)
+    df = top_n_with_other(df[['title', 'num_comments']], 'title', 'num_comments',
+                          aggregations={'num_comments': 'mean'}, other_label="Other posts, mean")
+    fig = px.bar(
+        df,
+        x='title',
+        y='num_comments',
+        labels={'title': 'Post Title', 'num_comments': 'Number of Comments'},
+        title="Post Engagement (Number of Comments)"
+    )
     return fig
 
-# Function to create follower count chart (mock data used for this example)
+# Function to create follower count chart
+@timed_chart
 def follower_count_chart(followers_data):
-    # Create a DataFrame with index as the x-axis
-    df = pd.DataFrame({'follower_count': followers_data})
-    df['index'] = df.index  # Adding an index as a column for the x-axis
+    """
+    Plot follower counts over time.
+
+    Parameters:
+        followers_data: Rows of (captured_at, link_karma, comment_karma, followers) as returned by
+            PostStore.account_history, or a plain list of counts plotted against their index.
+    """
+    if len(followers_data) and isinstance(followers_data[0], (tuple, list)):
+        df = pd.DataFrame.from_records(
+            followers_data, columns=['captured_at', 'link_karma', 'comment_karma', 'follower_count'])
+        df['index'] = pd.to_datetime(df['captured_at'], unit='s')
+    else:
+        # Create a DataFrame with index as the x-axis
+        df = pd.DataFrame({'follower_count': followers_data})
+        df['index'] = df.index  # Adding an index as a column for the x-axis
 
     # Plot using the index as the x-axis
-    fig = px.line(df, x='index', y='follower_count', title="Follower Count Over Time")
+    df = downsample_frame(df, 'index', ['follower_count'])
+    fig = px.line(df, x='index', y='follower_count', title="Follower Count Over Time",
+                  render_mode=_render_mode(df))
+    return fig
+
+# Function to create karma over time chart
+@timed_chart
+def karma_chart(account_history):
+    df = pd.DataFrame.from_records(
+        account_history, columns=['captured_at', 'link_karma', 'comment_karma', 'followers'])
+    df['captured_at'] = pd.to_datetime(df['captured_at'], unit='s')
+    df = downsample_frame(df, 'captured_at', ['link_karma', 'comment_karma'])
+    fig = px.line(df, x='captured_at', y=['link_karma', 'comment_karma'],
+                  labels={'captured_at': 'Time', 'value': 'Karma', 'variable': 'Type'},
+                  title="Karma Over Time", render_mode=_render_mode(df))
+    return fig
+
+# Function to create engagement growth chart from bucketed metric snapshots
+@timed_chart
+def engagement_growth_chart(engagement_series):
+    """
+    Plot total score and comments over time.
+
+    Parameters:
+        engagement_series (list): Rows of (bucket_start, total_score, total_comments,
+            mean_upvote_ratio) as returned by PostStore.engagement_series.
+    """
+    df = pd.DataFrame.from_records(
+        engagement_series, columns=['bucket', 'total_score', 'total_comments', 'mean_upvote_ratio'])
+    df['bucket'] = pd.to_datetime(df['bucket'], unit='s')
+    df = downsample_frame(df, 'bucket', ['total_score', 'total_comments'])
+    fig = px.line(df, x='bucket', y=['total_score', 'total_comments'],
+                  labels={'bucket': 'Time', 'value': 'Count', 'variable': 'Metric'},
+                  title="Engagement Over Time", render_mode=_render_mode(df))
+    return fig
+
+# Function to create a reply depth distribution chart
+@timed_chart
+def reply_depth_chart(depth_counts):
+    """
+    Plot how many comments sit at each reply depth.
+
+    Parameters:
+        depth_counts (list): Rows of (depth, comment_count) as returned by PostStore.comment_depths.
+    """
+    df = pd.DataFrame.from_records(depth_counts, columns=['depth', 'comments'])
+    fig = px.bar(df, x='depth', y='comments', labels={'depth': 'Reply Depth', 'comments': 'Comments'},
+                 title="Comments by Reply Depth")
+    return fig
+
+# Function to create top commenters chart
+@timed_chart
+def top_commenters_chart(commenters):
+    """
+    Plot the most active commenters.
+
+    Parameters:
+        commenters (list): Rows of (author, comments, total_score, mean_sentiment) as returned by
+            PostStore.top_commenters.
+    """
+    df = pd.DataFrame.from_records(commenters, columns=['author', 'comments', 'total_score', 'mean_sentiment'])
+    fig = px.bar(df, x='comments', y='author', orientation='h', color='mean_sentiment',
+                 color_continuous_scale='RdYlGn', range_color=(-1, 1),
+                 labels={'author': 'Commenter', 'comments': 'Comments', 'mean_sentiment': 'Sentiment'},
+                 title="Top Commenters")
+    fig.update_yaxes(autorange='reversed')
+    return fig
+
+# Function to create response latency chart
+@timed_chart
+def response_latency_chart(latencies):
+    """
+    Plot the distribution of response times, top-level comments against replies.
+
+    Parameters:
+        latencies (list): Rows of (depth, seconds) as returned by PostStore.response_latencies.
+    """
+    df = pd.DataFrame.from_records(latencies, columns=['depth', 'seconds'])
+    hours = df['seconds'].clip(lower=0) / 3600
+    value_range = (0, max(hours.max(), 1.0)) if len(hours) else (0, 1.0)
+    # Bin on the server so the figure carries 60 counts per level rather than every comment
+    bins = pd.concat([
+        histogram_frame(hours[df['depth'].eq(0) == top_level], bins=60, value_range=value_range).assign(level=level)
+        for top_level, level in ((True, 'Top-level comment'), (False, 'Reply'))
+    ], ignore_index=True)
+    fig = px.bar(bins, x='bin_start', y='count', color='level', log_y=True, barmode='overlay',
+                 labels={'bin_start': 'Hours Until Response', 'count': 'Comments', 'level': ''},
+                 title="Response Latency")
+    fig.update_traces(offset=0, width=value_range[1] / 60)
+    return fig
+
+# Function to create sentiment per post chart
+@timed_chart
+def sentiment_chart(sentiment_by_post):
+    """
+    Plot the mean comment sentiment of each post.
+
+    Parameters:
+        sentiment_by_post (list): Rows of (post_id, title, comments, mean_sentiment) as returned by
+            PostStore.sentiment_by_post.
+    """
+    df = pd.DataFrame.from_records(sentiment_by_post, columns=['id', 'title', 'comments', 'mean_sentiment'])
+    df = top_n_with_other(df[['title', 'comments', 'mean_sentiment']], 'title', 'comments',
+                          aggregations={'mean_sentiment': 'mean'}, other_label="Other posts")
+    fig = px.bar(df, x='title', y='mean_sentiment', hover_data=['comments'], color='mean_sentiment',
+                 color_continuous_scale='RdYlGn', range_color=(-1, 1),
+                 labels={'title': 'Post Title', 'mean_sentiment': 'Mean Sentiment'},
+                 title="Comment Sentiment per Post")
     return fig
@@ -1,70 +1,140 @@
 import streamlit as st
-import praw
-import os
-from dotenv import load_dotenv
 import logging
 from datetime import datetime
-from threading import Thread
-import pandas as pd
-from io import StringIO
+import pytz
 
 # Import custom modules
-from reddit_crud import create_post, read_user_posts, update_post, delete_post, schedule_post
-from analytics import *
+from reddit_crud import create_post, read_user_posts_page, update_post, delete_post, schedule_post, get_scheduler
+from cache import listing_cache
+from accounts import CredentialRegistry, fan_out_frame
+from store import get_store, load_stored_submissions
+from tracker import get_collector
+from bulk import load_batch, load_updates, bulk_create_posts, bulk_update_posts, bulk_delete_posts
+from instrumentation import LATENCY_BUCKETS, metrics, start_metrics_server
+from jobs import FINISHED, collect_results, job_queue
+from scheduler import DONE
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Expose /metrics for Prometheus when METRICS_PORT is set
+start_metrics_server()
+
 # Streamlit app layout
 st.title("Reddit Bot 🤖")
 
 # Sidebar navigation
-sidebar = st.sidebar.selectbox("Select a Section", ["CRUD Operations 📝", "Analytics Dashboard 📊"])
+sidebar = st.sidebar.selectbox("Select a Section", ["CRUD Operations 📝", "Analytics Dashboard 📊", "Diagnostics 🩺"])
 
-# Credentials upload
-uploaded_file = st.file_uploader("Upload your credentials.env file 📁", type=["env"])
+# Credentials upload, one .env file per account
+uploaded_files = st.file_uploader("Upload your credentials.env file(s) 📁", type=["env"], accept_multiple_files=True)
 
-# Load credentials and initialize Reddit client
-if uploaded_file:
+# Load credentials
+if uploaded_files:
+    registry = CredentialRegistry()
     try:
-        # Read the content of the uploaded file
-        content = uploaded_file.getvalue().decode("utf-8")
-
-        # Use StringIO to simulate a file for dotenv
-        env_data = StringIO(content)
-        load_dotenv(stream=env_data)
-
-        logger.info("Credentials loaded successfully from uploaded file.")
+        for uploaded_file in uploaded_files:
+            # Read the content of the uploaded file
+            content = uploaded_file.getvalue().decode("utf-8")
+            registry.add_env_content(content)
     except Exception as e:
         logger.error(f"Failed to load credentials from file: {e}")
-        st.error("Failed to load credentials. Please upload a valid .env file.")
+        st.error(f"Failed to load credentials. Please upload valid .env files. ({e})")
         st.stop()
 else:
     st.error("No file uploaded. Please upload your credentials.env file.")
     st.stop()
 
-# Initialize Reddit client
-client_id = os.getenv("CLIENT_ID")
-client_secret = os.getenv("CLIENT_SECRET")
-user_agent = os.getenv("USER_AGENT")
-username = os.getenv("REDDIT_USERNAME")
-password = os.getenv("REDDIT_PASSWORD")
-
+# Get a pooled Reddit client for the first account, reused across reruns with the same credentials
 try:
-    reddit = praw.Reddit(
-        client_id=client_id,
-        client_secret=client_secret,
-        user_agent=user_agent,
-        username=username,
-        password=password
-    )
-    reddit.validate_on_submit = True
-    logger.info("Reddit client initialized successfully.")
+    reddit = registry.client(registry.usernames()[0])
 except Exception as e:
     logger.error(f"Error initializing Reddit client: {e}")
+    st.error(f"Error initializing Reddit client: {e}")
     st.stop()
 
+if len(registry) > 1:
+    st.sidebar.caption(f"CRUD operations use u/{reddit.config.username}")
+
+# Let the scheduler dispatch queued posts for this account
+get_scheduler().register_client(reddit)
+
+# Cache statistics
+cache_stats = listing_cache.stats()
+st.sidebar.caption(
+    f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['entries']} entries)")
+
+# Function to remember a background job so this session keeps showing its status
+def track_job(job_id):
+    job_ids = st.session_state.setdefault("job_ids", [])
+    if job_id not in job_ids:
+        job_ids.append(job_id)
+
+
+# Function to show this session's background jobs, polling while any is unfinished
+def show_jobs():
+    jobs = [job for job in map(job_queue.status, st.session_state.get("job_ids", [])) if job is not None]
+    if not jobs:
+        return
+
+    @st.fragment(run_every=2 if any(job['status'] not in FINISHED for job in jobs) else None)
+    def job_panel():
+        st.subheader("Background Jobs ⏳")
+        for job_id in reversed(st.session_state.get("job_ids", [])):
+            job = job_queue.status(job_id)
+            if job is None:
+                continue
+            if job['status'] == "done" and isinstance(job['result'], list):
+                # Bulk jobs return one result dict per post
+                import pandas as pd
+
+                succeeded = sum(result['ok'] for result in job['result'])
+                st.write(f"✅ {job['name']}: {succeeded} of {len(job['result'])} succeeded")
+                with st.expander("Results"):
+                    st.dataframe(pd.DataFrame(job['result']), hide_index=True)
+            elif job['status'] == "done":
+                outcome = job['result']
+                if isinstance(outcome, str) and outcome.startswith("http"):
+                    outcome = f"[View post]({outcome})"
+                st.write(f"✅ {job['name']}: {outcome}")
+            elif job['status'] == "failed":
+                st.write(f"❌ {job['name']}: {job['error']}")
+            elif job['status'] == "cancelled":
+                st.write(f"🚫 {job['name']}: cancelled")
+            else:
+                col1, col2 = st.columns([4, 1])
+                col1.write(f"⏳ {job['name']}: {job['status']}")
+                if job['progress'] is not None:
+                    done, total = job['progress']
+                    if total:
+                        col1.progress(done / total, text=f"{done} of {total}")
+                    else:
+                        col1.caption(f"{done} done")
+                if job['status'] == "pending" and col2.button("Cancel", key=f"cancel_{job_id}"):
+                    job_queue.cancel(job_id)
+        if st.button("Clear finished jobs 🧹"):
+            st.session_state.job_ids = [job_id for job_id in st.session_state.get("job_ids", [])
+                                        if (job_queue.status(job_id) or {}).get('status') not in FINISHED]
+            st.rerun()
+
+    job_panel()
+
+
+# Function to rerun the page once a background job finishes, showing a message meanwhile
+def wait_for_job(job_id, message):
+    @st.fragment(run_every=1)
+    def waiting():
+        if (job_queue.status(job_id) or {}).get('status', DONE) in FINISHED:
+            st.rerun()
+        st.info(message)
+
+    waiting()
+
+
+# pandas, plotly and wordcloud are imported inside the sections that use them, so a cold
+# start and the credentials page do not pay for the analytics stack
+
 # CRUD Operations Section
 if sidebar == "CRUD Operations 📝":
     st.header("CRUD Operations 📝")
@@ -73,7 +143,9 @@ if sidebar == "CRUD Operations 📝":
         "Read My Posts 📖",
         "Update Post ✏️",
         "Delete Post 🗑️",
-        "Schedule Post 🕒"
+        "Schedule Post 🕒",
+        "Bulk Create 📦",
+        "Bulk Update / Delete 🧹"
     ])
 
     # Create Post
@@ -87,21 +159,57 @@ if sidebar == "CRUD Operations 📝":
             if not all([subreddit_name, title, content]):
                 st.error("Please fill in all fields 🛑")
             else:
-                post_url = create_post(reddit, subreddit_name, title, content)
-                st.write(
-                    f"Post created successfully! [View post]({post_url})" if "Error" not in post_url else post_url)
+                track_job(job_queue.submit(reddit.config.username, create_post, reddit, subreddit_name, title, content,
+                                           key=("create_post", reddit.config.username, subreddit_name, title, content),
+                                           name=f"Create post in r/{subreddit_name}"))
 
     # Read Posts
     elif crud_tab == "Read My Posts 📖":
         st.subheader("Read Your Latest Posts 📖")
-        limit = st.number_input("Enter the number of posts to display", min_value=1, max_value=50, value=10)
+        use_store = st.checkbox("Read from local history 🗄️", key="read_use_store")
+        page_size = st.number_input("Posts per page", min_value=1, max_value=100, value=25, key="read_page_size")
 
+        # Each entry is the cursor of a page already visited: an after fullname for the
+        # live listing, an offset for the local store
         if st.button("Read My Posts 📜"):
-            posts = read_user_posts(reddit, limit)
+            st.session_state.read_cursors = [None]
+            if use_store:
+                # Sync in the background; the page shows the stored posts once it is done
+                st.session_state.read_sync_job = job_queue.submit(
+                    reddit.config.username, get_store().sync, reddit,
+                    key=("sync_store", reddit.config.username), name="Sync local history")
+                track_job(st.session_state.read_sync_job)
+
+        cursors = st.session_state.get("read_cursors")
+        sync_job = job_queue.status(st.session_state.get("read_sync_job"))
+        if cursors and use_store and sync_job is not None and sync_job['status'] not in FINISHED:
+            wait_for_job(sync_job['id'], "Syncing local history ⏳")
+        elif cursors:
+            if use_store:
+                offset = cursors[-1] or 0
+                posts = get_store().read_user_posts(reddit.config.username, page_size, offset=offset)
+                next_cursor = offset + page_size if len(posts) == page_size else None
+            else:
+                posts, next_cursor = read_user_posts_page(reddit, page_size, cursors[-1])
+
             if isinstance(posts, list):
-                for subreddit, title, post_id, score, url in posts:
-                    st.write(
-                        f"Subreddit: r/{subreddit} | Title: {title} | ID: {post_id} | Upvotes: {score} | [Link]({url})")
+                import pandas as pd
+
+                st.caption(f"Page {len(cursors)}")
+                st.dataframe(
+                    pd.DataFrame(posts, columns=["Subreddit", "Title", "ID", "Upvotes", "URL"]),
+                    hide_index=True,
+                    column_config={"URL": st.column_config.LinkColumn("URL")},
+                )
+                col1, col2 = st.columns(2)
+                with col1:
+                    if len(cursors) > 1 and st.button("⬅️ Previous Page"):
+                        cursors.pop()
+                        st.rerun()
+                with col2:
+                    if next_cursor is not None and st.button("Next Page ➡️"):
+                        cursors.append(next_cursor)
+                        st.rerun()
             else:
                 st.write(posts)
 
@@ -116,8 +224,10 @@ if sidebar == "CRUD Operations 📝":
             if not post_url:
                 st.error("Please provide a post URL 🛑")
             else:
-                result = update_post(reddit, post_url, new_title, new_content)
-                st.write(f"Post updated successfully! [View post]({result})" if "Error" not in result else result)
+                username = reddit.config.username
+                track_job(job_queue.submit(username, update_post, reddit, post_url, new_title, new_content,
+                                           key=("update_post", username, post_url, new_title, new_content),
+                                           name=f"Update {post_url}"))
 
     # Delete Post
     elif crud_tab == "Delete Post 🗑️":
@@ -128,8 +238,9 @@ if sidebar == "CRUD Operations 📝":
             if not post_url:
                 st.error("Please provide a post URL 🛑")
             else:
-                result = delete_post(reddit, post_url)
-                st.write(result)
+                track_job(job_queue.submit(reddit.config.username, delete_post, reddit, post_url,
+                                           key=("delete_post", reddit.config.username, post_url),
+                                           name=f"Delete {post_url}"))
 
     # Schedule Post
     elif crud_tab == "Schedule Post 🕒":
@@ -153,78 +264,319 @@ if sidebar == "CRUD Operations 📝":
             scheduled_datetime = scheduled_datetime.replace(hour=scheduled_hour, minute=scheduled_minute)
 
             if st.button("Schedule Post 🗓️"):
-                # Schedule the post in a new thread
-                thread = Thread(target=schedule_post,
-                                args=(reddit, subreddit_name, title, content, scheduled_datetime))
-                thread.start()
-                st.success(f"Post scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
+                if not all([subreddit_name, title, content]):
+                    st.error("Please fill in all fields 🛑")
+                else:
+                    job_id = schedule_post(reddit, subreddit_name, title, content, scheduled_datetime)
+                    st.success(f"Post scheduled for {scheduled_datetime.strftime('%Y-%m-%d %H:%M:%S')} (Job #{job_id})")
+
+        # Manage scheduled posts
+        st.subheader("Scheduled Posts 📋")
+        scheduler = get_scheduler()
+        jobs = scheduler.list_jobs(username=reddit.config.username)
+        if jobs:
+            import pandas as pd
+
+            jobs_df = pd.DataFrame(jobs)
+            jobs_df['run_at'] = pd.to_datetime(jobs_df['run_at'], unit='s', utc=True).dt.tz_convert('Asia/Kolkata')
+            st.dataframe(jobs_df, hide_index=True)
+
+            pending_ids = [job['id'] for job in jobs if job['status'] == 'pending']
+            if pending_ids:
+                job_id = st.selectbox("Choose a pending job", pending_ids, key="manage_job_id")
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("Cancel Job ❌"):
+                        st.write("Job cancelled." if scheduler.cancel(job_id) else "Job is no longer pending.")
+                with col2:
+                    if st.button("Reschedule to Picked Time 🔁"):
+                        run_at = pytz.timezone('Asia/Kolkata').localize(scheduled_datetime).timestamp()
+                        st.write("Job rescheduled." if scheduler.reschedule(job_id, run_at) else "Job is no longer pending.")
+        else:
+            st.write("No scheduled posts yet.")
+
+    # Bulk Create
+    elif crud_tab == "Bulk Create 📦":
+        st.subheader("Bulk Create Posts 📦")
+        st.write("Upload a CSV (with a header row) or JSONL file with subreddit, title and content fields.")
+        batch_file = st.file_uploader("Upload batch file 📁", type=["csv", "jsonl"], key="bulk_file")
+
+        if batch_file and st.button("Create Posts 🚀"):
+            try:
+                items = load_batch(batch_file.getvalue().decode("utf-8"), batch_file.name)
+            except ValueError as e:
+                st.error(f"Invalid batch file: {e}")
+                items = []
+
+            if items:
+                # Rows name their account, or are spread over every loaded account. The generator
+                # only starts posting once the job drains it on a worker thread.
+                username = reddit.config.username
+                clients = {account: registry.client(account) for account in registry.usernames()}
+                track_job(job_queue.submit(
+                    username, collect_results, bulk_create_posts(clients, items), len(items),
+                    key=("bulk_create", username, batch_file.name, batch_file.size),
+                    name=f"Create {len(items)} posts from {batch_file.name}"))
+
+    # Bulk Update / Delete
+    elif crud_tab == "Bulk Update / Delete 🧹":
+        st.subheader("Bulk Update / Delete Posts 🧹")
+        bulk_action = st.radio("Action", ["Delete", "Update"], horizontal=True, key="bulk_action")
+
+        if bulk_action == "Delete":
+            post_list = st.text_area("Enter post URLs or IDs, one per line", key="bulk_delete_posts")
+            posts = [line.strip() for line in post_list.splitlines() if line.strip()]
+            if st.button("Delete Posts 🗑️"):
+                if not posts:
+                    st.error("Please provide at least one post 🛑")
+                else:
+                    track_job(job_queue.submit(
+                        reddit.config.username, collect_results, bulk_delete_posts(reddit, posts), len(posts),
+                        key=("bulk_delete", reddit.config.username, tuple(posts)), name=f"Delete {len(posts)} posts"))
+        else:
+            st.write("Upload a CSV (with a header row) or JSONL file with url and content fields.")
+            update_file = st.file_uploader("Upload update file 📁", type=["csv", "jsonl"], key="bulk_update_file")
+            if update_file and st.button("Update Posts 🔄"):
+                updates = load_updates(update_file.getvalue().decode("utf-8"), update_file.name)
+                track_job(job_queue.submit(
+                    reddit.config.username, collect_results, bulk_update_posts(reddit, updates), len(updates),
+                    key=("bulk_update", reddit.config.username, update_file.name, update_file.size),
+                    name=f"Update {len(updates)} posts from {update_file.name}"))
+
+    show_jobs()
 
 # Analytics Dashboard Section
 elif sidebar == "Analytics Dashboard 📊":
+    from analytics import (
+        post_details_table, post_scores_chart, post_frequency_chart, word_cloud_chart, upvote_ratio_chart,
+        comments_chart, engagement_growth_chart, karma_chart, follower_count_chart, reply_depth_chart,
+        top_commenters_chart, response_latency_chart, sentiment_chart, activity_chart, subreddit_chart,
+        upvote_ratio_distribution_chart
+    )
+    from aggregates import cached_figure
+    from downsample import page_count
+    from comments import sync_comments
+
     st.header("Analytics Dashboard 📊")
 
-    # Fetch analytics data
-    try:
-        post_data = get_post_analytics(reddit)
-        engagement_data = get_engagement_analytics(reddit)
-        growth_data = get_growth_analytics(reddit)
-    except Exception as e:
-        st.error(f"Error fetching analytics data: {e}")
-        post_data = engagement_data = growth_data = None
+    analyze_limit = st.number_input("Number of posts to analyze", min_value=1, max_value=1000, value=10)
+
+    selected_accounts = registry.usernames()
+    if len(registry) > 1:
+        selected_accounts = st.multiselect("Accounts", registry.usernames(), default=registry.usernames())
+
+    # Sync the local post store and read the analytics data from it, all accounts in parallel,
+    # in a background job so that the page stays responsive while Reddit is slow
+    dashboard_key = ("dashboard", tuple(selected_accounts), analyze_limit)
+    dashboard_jobs = st.session_state.setdefault("dashboard_jobs", {})
+    if st.button("Refresh data 🔄"):
+        dashboard_jobs.pop(dashboard_key, None)
+    dashboard_job = job_queue.status(dashboard_jobs.get(dashboard_key))
+    if dashboard_job is None:
+        dashboard_jobs[dashboard_key] = job_queue.submit(
+            reddit.config.username, fan_out_frame, registry, load_stored_submissions,
+            usernames=selected_accounts, limit=analyze_limit, key=dashboard_key, name="Load analytics")
+        dashboard_job = job_queue.status(dashboard_jobs[dashboard_key])
+
+    if dashboard_job['status'] not in FINISHED:
+        wait_for_job(dashboard_jobs[dashboard_key], "Loading analytics data ⏳")
+        st.stop()
+
+    post_frame = None
+    if dashboard_job['status'] == "done":
+        post_frame, account_errors = dashboard_job['result']
+        for account, error in account_errors.items():
+            st.error(f"Error fetching analytics data for u/{account}: {error}")
+    else:
+        st.error(f"Error fetching analytics data: {dashboard_job['error']}")
+        dashboard_jobs.pop(dashboard_key, None)
+
+    # Export the stored dataset, or import one exported elsewhere, without touching the API
+    with st.expander("Export / Import Dataset 💾"):
+        from export import FORMATS, export_archive, import_dataset
+
+        export_format = st.radio("Format", list(FORMATS), horizontal=True, key="export_format")
+        if st.button("Prepare Export 📦"):
+            try:
+                st.session_state.export_archive = (
+                    export_format, export_archive(get_store(), reddit.config.username, export_format))
+            except ImportError as e:
+                st.error(str(e))
+        if st.session_state.get("export_archive"):
+            archive_format, archive = st.session_state.export_archive
+            st.download_button("Download Dataset 📥", archive, mime="application/zip",
+                               file_name=f"{reddit.config.username}-{archive_format}.zip")
+
+        dataset_file = st.file_uploader("Import an exported dataset (.zip)", type=["zip"], key="import_dataset")
+        if dataset_file and st.button("Import Dataset 📤"):
+            try:
+                counts = import_dataset(get_store(), reddit.config.username, dataset_file)
+                dashboard_jobs.clear()
+                st.success("Imported " + ", ".join(f"{count} {table}" for table, count in counts.items()))
+            except Exception as e:
+                st.error(f"Failed to import dataset: {e}")
+
+    # Finished figures are cached as JSON. Charts of the loaded frame are keyed by the load job, so they
+    # are rebuilt after a refresh; charts read from the store are keyed by its data versions, which
+    # change only when the underlying posts, snapshots or comments do.
+    store = get_store()
+    username = reddit.config.username
+    data_versions = store.data_versions(sorted({*selected_accounts, username}))
+
+    def frame_figure(name, build, *params):
+        return cached_figure((name, dashboard_jobs.get(dashboard_key), *params), build)
+
+    def store_figure(name, build, *params):
+        return cached_figure((name, tuple(selected_accounts), data_versions, *params), build)
+
+    # Per-account comparison
+    if post_frame is not None and len(selected_accounts) > 1:
+        st.subheader("Account Comparison 👥")
+        st.dataframe(post_frame.groupby('account', observed=True).agg(
+            posts=('id', 'size'),
+            total_score=('score', 'sum'),
+            total_comments=('num_comments', 'sum'),
+            mean_upvote_ratio=('upvote_ratio', 'mean'),
+        ))
 
     # Overview Section
     st.subheader("Overview Analytics 📊")
-    if post_data is not None:
+    if post_frame is not None:
         page = st.selectbox("Choose Dashboard Section", [
             "Post Analytics 📊",
             "Engagement Insights 📈",
-            "Growth Metrics 📅"
+            "Growth Metrics 📅",
+            "Comment Insights 💬"
         ])
 
         if page == "Post Analytics 📊":
             st.subheader("Post Analytics 📊")
-            # Display post details table
-            post_table_fig = post_details_table(post_data)
+            # Display post details table, one page at a time
+            table_pages = page_count(len(post_frame))
+            table_page = st.number_input(f"Page (of {table_pages})", min_value=1, max_value=table_pages, value=1,
+                                         key="post_table_page") - 1
+            post_table_fig = frame_figure("post_details", lambda: post_details_table(post_frame, table_page),
+                                          table_page)
             st.plotly_chart(post_table_fig)
 
             # Display post scores chart (Upvotes)
-            post_scores_fig = post_scores_chart(post_data)
+            post_scores_fig = frame_figure("post_scores", lambda: post_scores_chart(post_frame))
             st.plotly_chart(post_scores_fig)
 
             # Display post frequency chart
-            post_frequency_fig = post_frequency_chart(post_data)
+            post_frequency_fig = frame_figure("post_frequency", lambda: post_frequency_chart(post_frame))
             st.plotly_chart(post_frequency_fig)
 
             # Display Word Cloud for post titles
-            wordcloud_img = word_cloud_chart(post_data)
-            st.image(wordcloud_img, caption="Word Cloud for Post Titles")
+            wordcloud_img = word_cloud_chart(post_frame, dataset=tuple(selected_accounts))
+            if wordcloud_img is not None:
+                st.image(wordcloud_img, caption="Word Cloud for Post Titles")
 
         elif page == "Engagement Insights 📈":
             st.subheader("Engagement Insights 📈")
-            engagement_titles = [engage['title'] for engage in engagement_data]
-            upvote_ratios = [engage['upvote_ratio'] for engage in engagement_data]
-            num_comments = [engage['num_comments'] for engage in engagement_data]
-
             st.write("Upvote Ratios and Number of Comments for Recent Posts:")
-            engagement_fig = px.bar(
-                x=engagement_titles,
-                y=upvote_ratios,
-                labels={'x': 'Post Title', 'y': 'Upvote Ratio'},
-                title="Engagement Metrics (Upvote Ratio)"
-            )
+            engagement_fig = frame_figure("upvote_ratio", lambda: upvote_ratio_chart(post_frame))
             st.plotly_chart(engagement_fig)
 
             st.write("Number of Comments per Post:")
-            comments_fig = px.bar(
-                x=engagement_titles,
-                y=num_comments,
-                labels={'x': 'Post Title', 'y': 'Number of Comments'},
-                title="Post Engagement (Number of Comments)"
-            )
+            comments_fig = frame_figure("comments", lambda: comments_chart(post_frame))
             st.plotly_chart(comments_fig)
 
+            # Distribution over every stored post, read from the materialized histogram
+            st.plotly_chart(store_figure("upvote_ratio_distribution", lambda: upvote_ratio_distribution_chart(
+                store.upvote_ratio_distribution(selected_accounts))))
+
         elif page == "Growth Metrics 📅":
             st.subheader("Growth Metrics 📅")
-            # Display Post Frequency Chart (Growth over time)
-            growth_frequency_fig = post_frequency_chart(post_data)
+            # Display Post Frequency Chart (Growth over time), from the per-day aggregates of all stored posts
+            period = st.radio("Period", ["day", "week"], horizontal=True, key="growth_period")
+            by_subreddit = st.checkbox("Split by subreddit", key="growth_by_subreddit")
+            growth_frequency_fig = store_figure("activity", lambda: activity_chart(
+                store.post_activity(selected_accounts, period), period, by_subreddit), period, by_subreddit)
             st.plotly_chart(growth_frequency_fig)
+            st.plotly_chart(store_figure("subreddits", lambda: subreddit_chart(
+                store.post_activity(selected_accounts))))
+
+            # Time series collected in the background by the metric tracker
+            get_collector(reddit)
+            bucket_hours = st.selectbox("Resolution (hours)", [1, 6, 24], key="growth_bucket_hours")
+            engagement_series = store.engagement_series(username, bucket_seconds=bucket_hours * 3600)
+            account_history = store.account_history(username)
+            if engagement_series:
+                st.plotly_chart(store_figure("engagement_growth", lambda: engagement_growth_chart(engagement_series),
+                                             username, bucket_hours))
+            if account_history:
+                st.plotly_chart(store_figure("karma", lambda: karma_chart(account_history), username))
+                st.plotly_chart(store_figure("followers", lambda: follower_count_chart(account_history), username))
+            if not engagement_series and not account_history:
+                st.write("Collecting engagement samples in the background. Check back shortly.")
+
+        elif page == "Comment Insights 💬":
+            st.subheader("Comment Insights 💬")
+
+            # Only threads whose comment count changed since their last ingestion are fetched again
+            if st.button("Sync Comments 🔄"):
+                track_job(job_queue.submit(username, sync_comments, reddit, key=("sync_comments", username),
+                                           name="Sync comments"))
+            show_jobs()
+
+            threads = {post_id: title for post_id, title, _, _ in store.sentiment_by_post(username)}
+            if not threads:
+                st.write("No comments ingested yet. Sync comments to analyze them.")
+            else:
+                post_id = st.selectbox("Thread", [None, *threads],
+                                       format_func=lambda key: "All posts" if key is None else threads[key],
+                                       key="comment_thread")
+                st.plotly_chart(store_figure("reply_depth", lambda: reply_depth_chart(
+                    store.comment_depths(username, post_id)), username, post_id))
+                st.plotly_chart(store_figure("top_commenters", lambda: top_commenters_chart(
+                    store.top_commenters(username, post_id=post_id)), username, post_id))
+                st.plotly_chart(store_figure("response_latency", lambda: response_latency_chart(
+                    store.response_latencies(username, post_id)), username, post_id))
+                if post_id is None:
+                    st.plotly_chart(store_figure("sentiment", lambda: sentiment_chart(
+                        store.sentiment_by_post(username)), username))
+
+
+# Diagnostics Section
+elif sidebar == "Diagnostics 🩺":
+    import pandas as pd
+
+    st.header("Diagnostics 🩺")
+    snapshot = metrics.snapshot()
+
+    # Remaining quota per account, from the latest rate-limit headers
+    st.subheader("Rate Limits 🚦")
+    gauges = pd.DataFrame([{'account': gauge['labels'].get('account'), 'metric': gauge['name'], 'value': gauge['value']}
+                           for gauge in snapshot['gauges']])
+    if not gauges.empty:
+        st.dataframe(gauges.pivot(index='account', columns='metric', values='value'))
+    else:
+        st.write("No Reddit requests made yet.")
+
+    # Request and chart latency, with percentiles estimated from the histogram buckets
+    st.subheader("Latency ⏱️")
+    latency_rows = []
+    for histogram in snapshot['histograms']:
+        row = {'metric': histogram['name'], **histogram['labels'], 'count': histogram['count'],
+               'mean_ms': 1000 * histogram['sum'] / histogram['count'] if histogram['count'] else 0.0}
+        for quantile in (0.5, 0.95, 0.99):
+            bound = next((bound for bound, count in zip(LATENCY_BUCKETS, histogram['buckets'])
+                          if count >= quantile * histogram['count']), float('inf'))
+            row[f"p{int(quantile * 100)}_ms<="] = 1000 * bound
+        latency_rows.append(row)
+    if latency_rows:
+        st.dataframe(pd.DataFrame(latency_rows).sort_values('count', ascending=False), hide_index=True)
+
+    # Call counts, bytes transferred and cache lookups
+    st.subheader("Counters 🔢")
+    counters = pd.DataFrame([{'metric': counter['name'], **counter['labels'], 'value': counter['value']}
+                             for counter in snapshot['counters']])
+    if not counters.empty:
+        st.dataframe(counters.sort_values(['metric', 'value'], ascending=[True, False]), hide_index=True)
+
+    st.download_button("Download Prometheus metrics 📥", metrics.render_prometheus(), file_name="metrics.prom",
+                       mime="text/plain")
+    if st.button("Reset metrics 🔄"):
+        metrics.reset()
+        st.rerun()
@@ -0,0 +1,134 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock, Thread
+
+import reddit_crud
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Worker threads shared by every coroutine. Requests still wait for their account's RequestGovernor,
+# so overlapping calls stay within each account's rate budget.
+MAX_WORKERS = int(os.getenv("ASYNC_CLIENT_MAX_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="async-reddit")
+
+
+# Function to run a blocking call from the shared CRUD core without blocking the event loop
+async def _call(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+# Function to create a new post
+async def create_post(reddit, subreddit_name, title, content):
+    return await _call(reddit_crud.create_post, reddit, subreddit_name, title, content)
+
+
+# Function to read the latest posts of the authenticated user
+async def read_user_posts(reddit, limit=10):
+    return await _call(reddit_crud.read_user_posts, reddit, limit)
+
+
+# Function to read one page of the user's posts after a listing cursor
+async def read_user_posts_page(reddit, page_size=25, after=None):
+    return await _call(reddit_crud.read_user_posts_page, reddit, page_size, after)
+
+
+# Function to update a post's title and content with ownership check
+async def update_post(reddit, post_url, new_title, new_content):
+    return await _call(reddit_crud.update_post, reddit, post_url, new_title, new_content)
+
+
+# Function to delete a post with ownership check
+async def delete_post(reddit, post_url):
+    return await _call(reddit_crud.delete_post, reddit, post_url)
+
+
+# Function to update many posts, overlapping their ownership checks and edits
+async def update_posts(reddit, updates):
+    """
+    Update several posts concurrently.
+
+    Args:
+        reddit (praw.Reddit): The initialized Reddit client.
+        updates (iterable): (post_url, new_title, new_content) tuples.
+
+    Returns:
+        list: update_post's result for each update, in order.
+    """
+    return list(await asyncio.gather(*(update_post(reddit, *update) for update in updates)))
+
+
+# Function to delete many posts, overlapping their ownership checks and deletes
+async def delete_posts(reddit, post_urls):
+    return list(await asyncio.gather(*(delete_post(reddit, post_url) for post_url in post_urls)))
+
+
+# Function to fetch the user's submissions once for all analytics views
+async def fetch_submissions(reddit, limit=10):
+    # Imported here so that CRUD-only callers never load pandas and plotly
+    from analytics import fetch_submissions as fetch
+    return await _call(fetch, reddit, limit)
+
+
+# Function to get post, engagement and growth analytics from one fetch
+async def get_all_analytics(reddit, limit=10):
+    """
+    Fetch the user's submissions once and derive the three analytics views from them.
+
+    Returns:
+        tuple: (post analytics, engagement analytics, growth analytics) lists.
+    """
+    from analytics import get_engagement_analytics, get_growth_analytics, get_post_analytics
+    submissions = await fetch_submissions(reddit, limit)
+    return (
+        get_post_analytics(reddit, submissions),
+        get_engagement_analytics(reddit, submissions),
+        get_growth_analytics(reddit, submissions),
+    )
+
+
+class AsyncRedditRunner:
+    """
+    Sync adapter that runs coroutines from this module on a dedicated event loop thread.
+
+    Streamlit scripts run on threads without an event loop, so they hand coroutines to
+    the runner and block on the result.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._loop.run_forever, name="async-reddit-loop", daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine, timeout=None):
+        """Run a coroutine on the runner's loop and block until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+_runner = None
+_runner_lock = Lock()
+
+
+# Function to run a coroutine from synchronous code on the process-wide runner
+def run_sync(coroutine, timeout=None):
+    """
+    Block until the coroutine finishes, e.g. run_sync(update_posts(reddit, updates)).
+
+    Returns:
+        The coroutine's result.
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = AsyncRedditRunner()
+    return _runner.run(coroutine, timeout)
@@ -0,0 +1,96 @@
+"""
+Cold-start import timings for the Streamlit entry point and the app's modules.
+
+Each target is imported in a fresh interpreter, so nothing is shared between rounds.
+The "app startup" target imports exactly the modules app.py imports at top level,
+which is what every cold start pays before the first page renders. The report also
+lists which heavy third-party packages each target dragged in:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --rounds 10 --output imports.json
+"""
+import os
+import ast
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+from benchmarks import run_metadata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ("reddit_crud", "accounts", "bulk", "store", "tracker", "analytics", "wordfreq", "async_client")
+
+# Packages worth loading only on demand
+HEAVY_PACKAGES = ("pandas", "numpy", "pyarrow", "plotly", "wordcloud", "matplotlib", "PIL")
+
+# Script run in the child interpreter; prints the import time and the heavy packages loaded
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+# Function to list the import statements app.py runs at module level, outside any section branch
+def app_startup_imports(path=os.path.join(ROOT, "app.py")):
+    with open(path) as app_file:
+        tree = ast.parse(app_file.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+# Function to time one set of import statements in a fresh interpreter
+def time_imports(statements, rounds):
+    timings, loaded = [], []
+    script = PROBE.format(imports="\n".join(statements), heavy=HEAVY_PACKAGES)
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded = result['loaded']
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'rounds': rounds,
+        'heavy_packages': loaded,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="Fresh interpreters per target.")
+    parser.add_argument("--module", action="append", help="Only time these modules (app startup is always timed).")
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    targets = {'app startup': app_startup_imports()}
+    for module in args.module or MODULES:
+        targets[module] = [f"import {module}"]
+
+    results = []
+    for name, statements in targets.items():
+        try:
+            result = {'target': name, **time_imports(statements, args.rounds)}
+        except subprocess.CalledProcessError as e:
+            # Optional dependencies such as pyarrow may be missing
+            print(f"{name:20} failed: {e.stderr.strip().splitlines()[-1]}", file=sys.stderr)
+            continue
+        results.append(result)
+        print(f"{name:20} median {result['median']:.3f}s  heavy: {', '.join(result['heavy_packages']) or '-'}",
+              file=sys.stderr)
+
+    report = {'metadata': {**run_metadata(), 'rounds': args.rounds}, 'results': results}
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
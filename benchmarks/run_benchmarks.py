@@ -0,0 +1,386 @@
+"""
+Offline benchmarks for the CRUD, scheduling and analytics code paths.
+
+Every scenario runs real PRAW against the in-memory Reddit of the fake transport, so no
+account or network is needed. Results are written as JSON so runs from different commits can be compared:
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import tempfile
+from functools import lru_cache
+
+# Keep the store and scheduler databases out of the working tree
+_tmp_dir = tempfile.mkdtemp(prefix="reddit-bench-")
+os.environ.setdefault("POST_STORE_PATH", os.path.join(_tmp_dir, "posts.db"))
+os.environ.setdefault("SCHEDULER_DB_PATH", os.path.join(_tmp_dir, "scheduled_posts.db"))
+
+import praw
+
+import analytics
+import bulk
+import reddit_crud
+import wordfreq
+from cache import listing_cache
+from comments import sentiment_score
+from records import CommentRecord, SubmissionRecord
+from scheduler import DONE, PostScheduler
+from ratelimit import GovernedRequestor, TokenBucket, disable_prawcore_retries, governor_for
+from store import PostStore
+from submission_ids import parse_submission_id, parse_submission_ids
+from transport import FakeRedditServer, FakeSession
+
+from benchmarks import run_metadata
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+SCENARIOS = {}
+
+BENCH_USER = "bench_user"
+
+# Fixed vocabulary so generated titles give the word cloud something realistic to count
+WORDS = (
+    "python reddit streamlit analytics posting tips guide question help release update weekly "
+    "thread discussion project showcase data charts dashboard growth engagement community news"
+).split()
+
+
+# Function to register a scenario; setup(size, latency) returns the zero-argument callable to time
+def scenario(name, max_size=None):
+    def register(setup):
+        SCENARIOS[name] = (setup, max_size)
+        return setup
+    return register
+
+
+# Token bucket size given to the benchmark account: large enough that it never throttles the fake
+BENCH_RATE_LIMIT = 10 ** 9
+
+
+# Function to build an in-memory server holding size posts spread over the last year, oldest first
+def seeded_server(size, latency=0.0, subreddits=("python", "learnpython", "dataisbeautiful"), seed=0):
+    server = FakeRedditServer(latency=latency)
+    rng = random.Random(seed)
+    now = time.time()
+    for index in range(size):
+        server.add_submission(
+            BENCH_USER,
+            rng.choice(subreddits),
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 10))),
+            created_utc=now - (size - index) * 365 * 86400 / max(size, 1),
+            score=rng.randint(0, 5000),
+            num_comments=rng.randint(0, 500),
+        )
+    return server
+
+
+# Function to build a real praw client whose HTTP session is the given in-memory server
+def bench_reddit(server):
+    reddit = praw.Reddit(client_id="bench", client_secret="bench", user_agent="reddit-bench/1.0",
+                         username=BENCH_USER, password="bench", requestor_class=GovernedRequestor,
+                         requestor_kwargs={'account': BENCH_USER, 'session': FakeSession(server)})
+    disable_prawcore_retries(reddit)
+    # The account's governor would otherwise pace the fake at Reddit's real quota
+    governor_for(BENCH_USER).bucket = TokenBucket(rate=BENCH_RATE_LIMIT, capacity=BENCH_RATE_LIMIT)
+    # Authenticate up front, so scenarios count only their own requests
+    reddit.user.me()
+    listing_cache.invalidate()
+    return reddit
+
+
+# Function to build a client on a server seeded with size posts
+def seeded_reddit(size, latency):
+    return bench_reddit(seeded_server(size, latency))
+
+
+# Function to build SubmissionRecords, newest first, without going through a client
+def seeded_records(size):
+    submissions = reversed(list(seeded_server(size).submissions.values()))
+    return [SubmissionRecord(*(submission[field] for field in SubmissionRecord._fields)) for submission in submissions]
+
+
+@scenario("crud.create_post", max_size=1000)
+def bench_create_post(size, latency):
+    reddit = seeded_reddit(size, latency)
+    return lambda: reddit_crud.create_post(reddit, "python", "Benchmark post", "body")
+
+
+@scenario("crud.read_user_posts")
+def bench_read_user_posts(size, latency):
+    reddit = seeded_reddit(size, latency)
+    return lambda: reddit_crud.read_user_posts(reddit, size)
+
+
+@scenario("crud.read_user_posts_page")
+def bench_read_user_posts_page(size, latency):
+    reddit = seeded_reddit(size, latency)
+    return lambda: [len(page) for page in reddit_crud.iter_user_posts(reddit, page_size=100)]
+
+
+@scenario("crud.update_post", max_size=1000)
+def bench_update_post(size, latency):
+    server = seeded_server(size, latency)
+    reddit = bench_reddit(server)
+    url = next(iter(server.submissions.values()))['url']
+    return lambda: reddit_crud.update_post(reddit, url, "title", "new body")
+
+
+@scenario("crud.delete_post", max_size=1000)
+def bench_delete_post(size, latency):
+    server = seeded_server(size, latency)
+    reddit = bench_reddit(server)
+    url = next(iter(server.submissions.values()))['url']
+    return lambda: reddit_crud.delete_post(reddit, url)
+
+
+@scenario("bulk.bulk_delete_posts", max_size=10000)
+def bench_bulk_delete(size, latency):
+    server = seeded_server(size, latency)
+    reddit = bench_reddit(server)
+    urls = [submission['url'] for submission in server.submissions.values()]
+    return lambda: list(bulk.bulk_delete_posts(reddit, urls))
+
+
+@scenario("scheduler.dispatch", max_size=1000)
+def bench_schedule_dispatch(size, latency):
+    reddit = seeded_reddit(0, latency)
+    scheduler = PostScheduler(reddit_crud.create_post, db_path=":memory:")
+
+    def run():
+        now = time.time()
+        for index in range(size):
+            scheduler.schedule(reddit, "python", f"Scheduled {index}", "body", now)
+        while len(scheduler.list_jobs(status=DONE)) < size:
+            time.sleep(0.001)
+
+    return run
+
+
+@scenario("analytics.getters")
+def bench_analytics_getters(size, latency):
+    reddit = seeded_reddit(size, latency)
+
+    def run():
+        listing_cache.invalidate()
+        submissions = analytics.fetch_submissions(reddit, size)
+        analytics.get_post_analytics(reddit, submissions)
+        analytics.get_engagement_analytics(reddit, submissions)
+        analytics.get_growth_analytics(reddit, submissions)
+
+    return run
+
+
+@scenario("store.sync")
+def bench_store_sync(size, latency):
+    reddit = seeded_reddit(size, latency)
+    return lambda: PostStore(":memory:").sync(reddit, min_interval=0)
+
+
+@scenario("charts.build_post_frame")
+def bench_build_post_frame(size, latency):
+    records = seeded_records(size)
+    return lambda: analytics.build_post_frame(records)
+
+
+# Register one scenario per chart builder, each fed a prebuilt frame
+for _chart in ("post_details_table", "post_frequency_chart", "post_scores_chart", "upvote_ratio_chart",
+               "comments_chart"):
+    def _setup(size, latency, chart=_chart):
+        frame = analytics.build_post_frame(seeded_records(size))
+        return lambda: getattr(analytics, chart)(frame)
+    scenario(f"charts.{_chart}")(_setup)
+
+
+@scenario("charts.word_cloud_chart.cold")
+def bench_word_cloud_cold(size, latency):
+    frame = analytics.build_post_frame(seeded_records(size))
+
+    def run():
+        analytics.title_indexes.invalidate()
+        wordfreq.image_cache.invalidate()
+        analytics.word_cloud_chart(frame)
+
+    return run
+
+
+@scenario("charts.word_cloud_chart.warm")
+def bench_word_cloud_warm(size, latency):
+    frame = analytics.build_post_frame(seeded_records(size))
+    analytics.word_cloud_chart(frame)
+    return lambda: analytics.word_cloud_chart(frame)
+
+
+# Function to build size comments spread over the posts, replying to earlier comments in the same thread
+def seeded_comments(records, size, seed=0):
+    rng = random.Random(seed)
+    comments, threads = [], {}
+    for index in range(size):
+        post = rng.choice(records)
+        thread = threads.setdefault(post.id, [])
+        parent = rng.choice(thread) if thread and rng.random() < 0.6 else None
+        body = " ".join(rng.choice(WORDS + ["great", "thanks", "wrong", "bad"]) for _ in range(rng.randint(3, 20)))
+        comment = CommentRecord(
+            id=format(index, 'x').rjust(7, '0'),
+            post_id=post.id,
+            parent_id=f"t1_{parent.id}" if parent else f"t3_{post.id}",
+            author=f"commenter_{rng.randint(0, max(size // 20, 1))}",
+            body=body,
+            score=rng.randint(-5, 200),
+            created_utc=(parent or post).created_utc + rng.expovariate(1 / 3600),
+            depth=parent.depth + 1 if parent else 0,
+            sentiment=sentiment_score(body),
+        )
+        thread.append(comment)
+        comments.append(comment)
+    return comments
+
+
+# Function to read the inputs of the store-backed charts from a store holding size posts, three metric
+# snapshots per post, size account samples and size comments; built once per size and shared by the scenarios
+@lru_cache(maxsize=None)
+def store_chart_inputs(size):
+    store = PostStore(":memory:")
+    records = seeded_records(size)
+    store.upsert(BENCH_USER, records, snapshot=False)
+    rng = random.Random(0)
+    start = records[-1].created_utc
+    store.merge_snapshots(
+        metric_rows=[(record.id, record.created_utc + hours * 3600, record.score * hours // 24,
+                      record.num_comments * hours // 24, record.upvote_ratio)
+                     for record in records for hours in (1, 6, 24)],
+        account_rows=[(start + index * 365 * 86400 / size, 10 * index + rng.randint(0, 9), 3 * index,
+                       index // 2) for index in range(size)],
+        username=BENCH_USER,
+    )
+    store.upsert_comments(seeded_comments(records, size))
+    return {
+        'activity': store.post_activity([BENCH_USER]),
+        'distribution': store.upvote_ratio_distribution([BENCH_USER]),
+        'account_history': store.account_history(BENCH_USER),
+        'engagement_series': store.engagement_series(BENCH_USER),
+        'depth_counts': store.comment_depths(BENCH_USER),
+        'commenters': store.top_commenters(BENCH_USER),
+        'latencies': store.response_latencies(BENCH_USER),
+        'sentiment_by_post': store.sentiment_by_post(BENCH_USER),
+    }
+
+
+# Register one scenario per chart built from store queries, each fed the rows the dashboard would pass it
+for _chart, _input in (("activity_chart", 'activity'), ("subreddit_chart", 'activity'),
+                       ("upvote_ratio_distribution_chart", 'distribution'), ("karma_chart", 'account_history'),
+                       ("follower_count_chart", 'account_history'), ("engagement_growth_chart", 'engagement_series'),
+                       ("reply_depth_chart", 'depth_counts'), ("top_commenters_chart", 'commenters'),
+                       ("response_latency_chart", 'latencies'), ("sentiment_chart", 'sentiment_by_post')):
+    def _setup(size, latency, chart=_chart, chart_input=_input):
+        rows = store_chart_inputs(size)[chart_input]
+        return lambda: getattr(analytics, chart)(rows)
+    scenario(f"charts.{_chart}")(_setup)
+
+
+# Forms a pasted list of posts mixes, filled in with a distinct ID per line
+POST_REFERENCE_FORMS = (
+    "https://www.reddit.com/r/test/comments/{}/a_title/",
+    "https://old.reddit.com/r/test/comments/{}/",
+    "https://www.reddit.com/user/someone/comments/{}/a_title/?utm_source=share",
+    "https://redd.it/{}",
+    "t3_{}",
+    "{}",
+)
+
+
+# Function to build size post references in mixed forms, as pasted into a bulk delete
+def post_references(size):
+    return "\n".join(POST_REFERENCE_FORMS[index % len(POST_REFERENCE_FORMS)].format(format(index, 'x').rjust(6, '0'))
+                     for index in range(size))
+
+
+@scenario("parse.submission_ids")
+def bench_parse_submission_ids(size, latency):
+    references = post_references(size)
+    return lambda: parse_submission_ids(references)
+
+
+@scenario("parse.submission_id.loop")
+def bench_parse_submission_id_loop(size, latency):
+    references = post_references(size).splitlines()
+    return lambda: [parse_submission_id(reference) for reference in references]
+
+
+# Function to time a scenario over several rounds
+def run_scenario(name, size, rounds, latency):
+    setup, _ = SCENARIOS[name]
+    timings, requests = [], []
+    for _ in range(rounds):
+        run = setup(size, latency)
+        requests_before = FakeRedditServer.total_requests
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+        requests.append(FakeRedditServer.total_requests - requests_before)
+    return {
+        'scenario': name,
+        'size': size,
+        'rounds': rounds,
+        'min': min(timings),
+        'mean': statistics.fmean(timings),
+        'median': statistics.median(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'api_requests': statistics.median(requests),
+    }
+
+
+# Function to print the mean time ratio of each result against a previous run
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = {(row['scenario'], row['size']): row for row in json.load(baseline_file)['results']}
+    print(f"{'scenario':40} {'size':>8} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for row in results:
+        previous = baseline.get((row['scenario'], row['size']))
+        if previous is None:
+            continue
+        ratio = row['mean'] / previous['mean'] if previous['mean'] else float('inf')
+        print(f"{row['scenario']:40} {row['size']:>8} {previous['mean']:>10.4f} {row['mean']:>10.4f} {ratio:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Dataset sizes in posts.")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per scenario and size.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per API request.")
+    parser.add_argument("--scenario", action="append", help="Only run scenarios starting with this prefix.")
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against a previous JSON results file.")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, (_, max_size) in SCENARIOS.items():
+        if args.scenario and not any(name.startswith(prefix) for prefix in args.scenario):
+            continue
+        for size in args.sizes:
+            if max_size is not None and size > max_size:
+                continue
+            result = run_scenario(name, size, args.rounds, args.latency)
+            results.append(result)
+            print(f"{name:40} {size:>8} mean {result['mean']:.4f}s  requests {result['api_requests']:.0f}",
+                  file=sys.stderr)
+
+    report = {'metadata': {**run_metadata(), 'latency': args.latency, 'rounds': args.rounds},
+              'results': results}
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+    if not args.output and not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import csv
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import StringIO
+from itertools import cycle
+
+from cache import invalidate_user
+from reddit_crud import create_post
+from store import get_store
+from submission_ids import parse_submission_ids
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+BATCH_FIELDS = ("subreddit", "title", "content")
+
+# Reddit's /api/info accepts up to 100 fullnames per request
+INFO_BATCH_SIZE = 100
+
+
+# Function to parse a CSV or JSONL batch of posts
+def load_batch(content, file_name):
+    """
+    Parse a batch of posts.
+
+    Args:
+        content (str): The file content.
+        file_name (str): The file name; ``.jsonl`` files are read as JSON lines, anything
+            else as CSV with a header row.
+
+    Returns:
+        list: A list of dicts with subreddit, title, content and an optional account.
+    """
+    if file_name.endswith(".jsonl"):
+        rows = [json.loads(line) for line in content.splitlines() if line.strip()]
+    else:
+        rows = list(csv.DictReader(StringIO(content)))
+
+    items = []
+    for line_number, row in enumerate(rows, start=1):
+        missing = [field for field in BATCH_FIELDS if not row.get(field)]
+        if missing:
+            raise ValueError(f"Row {line_number} is missing {', '.join(missing)}")
+        item = {field: row[field] for field in BATCH_FIELDS}
+        item['account'] = row.get('account') or None
+        items.append(item)
+    return items
+
+
+# Function to parse a CSV or JSONL file of post edits
+def load_updates(content, file_name):
+    """
+    Parse a batch of post edits.
+
+    Args:
+        content (str): The file content.
+        file_name (str): The file name; ``.jsonl`` files are read as JSON lines, anything
+            else as CSV with a header row.
+
+    Returns:
+        dict: Map of post URL or ID to its new content, as bulk_update_posts() takes it.
+            Rows without a url or content are skipped.
+    """
+    if file_name.endswith(".jsonl"):
+        rows = [json.loads(line) for line in content.splitlines() if line.strip()]
+    else:
+        rows = list(csv.DictReader(StringIO(content)))
+    return {row['url']: row['content'] for row in rows if row.get('url') and row.get('content')}
+
+
+# Function to create many posts concurrently, yielding results as they finish
+def bulk_create_posts(clients, items, max_workers_per_account=2):
+    """
+    Submit a batch of posts across one or more accounts.
+
+    Each account's requests are paced by its RequestGovernor, and each account gets its
+    own share of worker threads. Items without an account are spread round-robin over
+    the available clients.
+
+    Args:
+        clients (dict): Map of username to initialized praw.Reddit client.
+        items (list): Dicts as returned by load_batch().
+        max_workers_per_account (int): Concurrent submissions allowed per account.
+
+    Yields:
+        dict: One result per item, in completion order, with index, account, subreddit,
+            title, ok and either url or error.
+    """
+    if not clients:
+        raise ValueError("At least one Reddit client is required.")
+
+    round_robin = cycle(clients)
+
+    def submit(index, username, item):
+        result = create_post(clients[username], item['subreddit'], item['title'], item['content'])
+        ok = not result.startswith("Error")
+        return {
+            'index': index,
+            'account': username,
+            'subreddit': item['subreddit'],
+            'title': item['title'],
+            'ok': ok,
+            'url' if ok else 'error': result,
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers_per_account * len(clients)) as executor:
+        futures = []
+        for index, item in enumerate(items):
+            username = item.get('account') or next(round_robin)
+            if username not in clients:
+                yield {
+                    'index': index,
+                    'account': username,
+                    'subreddit': item['subreddit'],
+                    'title': item['title'],
+                    'ok': False,
+                    'error': f"Error: no credentials loaded for u/{username}",
+                }
+                continue
+            futures.append(executor.submit(submit, index, username, item))
+
+        for future in as_completed(futures):
+            yield future.result()
+
+    logger.info(f"Bulk create finished for {len(items)} item(s)")
+
+
+# Function to fetch many submissions in batched /api/info calls
+def resolve_submissions(reddit, posts):
+    """
+    Resolve post URLs or IDs to submissions, 100 per request.
+
+    Returns:
+        tuple: (dict of each input to its praw Submission, or None if Reddit did not
+            return it, and a list of inputs that could not be parsed).
+    """
+    ids, invalid = parse_submission_ids(posts)
+    fullnames = [f"t3_{submission_id}" for submission_id in dict.fromkeys(ids.values())]
+    submissions = {}
+    for start in range(0, len(fullnames), INFO_BATCH_SIZE):
+        for submission in reddit.info(fullnames=fullnames[start:start + INFO_BATCH_SIZE]):
+            submissions[submission.id] = submission
+    return {post: submissions.get(submission_id) for post, submission_id in ids.items()}, invalid
+
+
+# Function to run a mutation over many of the user's posts
+def _bulk_mutate(reddit, changes, action, mutate, max_workers):
+    username = reddit.user.me().name.lower()
+    resolved, invalid = resolve_submissions(reddit, list(changes))
+    deleted_ids = []
+
+    for post in invalid:
+        yield {'post': post, 'ok': False, 'error': "Invalid URL. Please provide a valid Reddit post URL."}
+
+    def run(post, submission):
+        try:
+            mutate(submission, changes[post])
+            logger.info(f"Post {action}: {submission.id}")
+            if action == "deleted":
+                deleted_ids.append(submission.id)
+            return {'post': post, 'ok': True, 'url': submission.url}
+        except Exception as e:
+            logger.error(f"An error occurred while processing post {submission.id}: {e}")
+            return {'post': post, 'ok': False, 'error': f"Error: {e}"}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for post, submission in resolved.items():
+            if submission is None:
+                yield {'post': post, 'ok': False, 'error': "Post not found."}
+            elif submission.author is None or submission.author.name.lower() != username:
+                yield {'post': post, 'ok': False,
+                       'error': f"You are not the author of this post, so it cannot be {action}."}
+            else:
+                futures.append(executor.submit(run, post, submission))
+
+        for future in as_completed(futures):
+            yield future.result()
+
+    invalidate_user(reddit)
+    if action == "deleted":
+        get_store().remove(deleted_ids)
+
+
+# Function to edit many posts, yielding results as they finish
+def bulk_update_posts(reddit, updates, max_workers=4):
+    """
+    Edit the body of many posts owned by the authenticated user.
+
+    The user is resolved once, submissions are fetched in batched info() calls and the
+    ownership check runs locally before any edit is made.
+
+    Args:
+        reddit (praw.Reddit): The initialized Reddit client.
+        updates (dict): Map of post URL or ID to its new content.
+        max_workers (int): Concurrent edits allowed.
+
+    Yields:
+        dict: One result per post with post, ok and either url or error.
+    """
+    return _bulk_mutate(reddit, updates, "updated", lambda submission, content: submission.edit(content),
+                        max_workers)
+
+
+# Function to delete many posts, yielding results as they finish
+def bulk_delete_posts(reddit, posts, max_workers=4):
+    """
+    Delete many posts owned by the authenticated user.
+
+    Args:
+        reddit (praw.Reddit): The initialized Reddit client.
+        posts (list): Post URLs or IDs.
+        max_workers (int): Concurrent deletions allowed.
+
+    Yields:
+        dict: One result per post with post, ok and either url or error.
+    """
+    return _bulk_mutate(reddit, dict.fromkeys(posts), "deleted", lambda submission, _: submission.delete(),
+                        max_workers)
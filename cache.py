@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import logging
+from collections import OrderedDict, defaultdict
+from threading import Lock, RLock
+
+from instrumentation import metrics
+from ratelimit import SingleFlight
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Function to roughly estimate the memory held by a cached value
+def estimate_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class TTLCache:
+    """
+    Thread-safe cache with per-entry expiry, LRU eviction and a memory cap.
+
+    Args:
+        ttl (float): Seconds an entry stays fresh.
+        max_entries (int): Maximum number of entries kept.
+        max_bytes (int): Approximate memory budget for all cached values.
+        name (str): Label under which lookups are reported to the metrics registry.
+    """
+
+    def __init__(self, ttl=300, max_entries=256, max_bytes=16 * 1024 * 1024, name="cache"):
+        self.ttl = ttl
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = RLock()
+
+    def get(self, key):
+        """
+        Look up a key.
+
+        Returns:
+            tuple: (found, value). Expired entries count as misses and are dropped.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.inc('cache_lookups_total', cache=self.name, result="hit")
+                    return True, value
+                self._remove(key)
+            self.misses += 1
+            metrics.inc('cache_lookups_total', cache=self.name, result="miss")
+            return False, None
+
+    def set(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.info(f"Skipping cache for {key}: {size} bytes exceeds the memory cap.")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, username=None):
+        """
+        Drop every entry for an account, or the whole cache when no username is given.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock:
+            if username is None:
+                keys = list(self._entries)
+            else:
+                keys = [key for key in self._entries if key[0] == username]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+# Process-wide cache for Reddit listings, shared across Streamlit reruns
+listing_cache = TTLCache(
+    ttl=float(os.getenv("REDDIT_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("REDDIT_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.getenv("REDDIT_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+    name="listings",
+)
+
+
+# Concurrent misses for the same listing, e.g. two Streamlit reruns, share one load
+_listing_loads = SingleFlight()
+
+# Per-account counters bumped by invalidate_user, so a load that started before a write
+# neither caches its result nor is joined by reads made after the write
+_generations = defaultdict(int)
+_generations_lock = Lock()
+
+
+# Function to get the account name of a client without a network call
+def get_username(reddit):
+    return reddit.config.username
+
+
+# Function to read a listing through the cache
+def cached_listing(reddit, listing, limit, loader):
+    """
+    Return a cached listing for (username, listing, limit), calling loader() on a miss.
+
+    Callers that miss while the same listing is already loading wait for that load
+    instead of starting their own. A load that overlaps invalidate_user() for the account
+    returns its result to its callers but does not cache it.
+
+    Args:
+        reddit (praw.Reddit): The initialized Reddit client.
+        listing (str): Name of the listing being read.
+        limit (int): The number of items requested.
+        loader (callable): Zero-argument function that fetches the listing.
+
+    Returns:
+        The cached or freshly loaded value.
+    """
+    username = get_username(reddit)
+    key = (username, listing, limit)
+    found, value = listing_cache.get(key)
+    if found:
+        return value
+    with _generations_lock:
+        generation = _generations[username]
+
+    def load():
+        value = loader()
+        with _generations_lock:
+            if _generations[username] == generation:
+                listing_cache.set(key, value)
+        return value
+
+    return _listing_loads.do((*key, generation), load)
+
+
+# Function to drop cached listings after a write to the account
+def invalidate_user(reddit):
+    with _generations_lock:
+        _generations[get_username(reddit)] += 1
+    removed = listing_cache.invalidate(get_username(reddit))
+    logger.info(f"Invalidated {removed} cached listing(s) for u/{get_username(reddit)}")
@@ -0,0 +1,317 @@
+"""
+Headless entry point for CRUD, batch operations, the post scheduler and data sync.
+
+Credentials come from the CLIENT_ID, CLIENT_SECRET, USER_AGENT, REDDIT_USERNAME and
+REDDIT_PASSWORD environment variables, or from one or more .env files. Results are
+printed to stdout as JSON lines and logs go to stderr:
+
+    python cli.py create --subreddit test --title "Hello" --content "Body"
+    python cli.py --env-file alice.env --env-file bob.env batch create posts.csv
+    python cli.py schedule add --subreddit test --title "Later" --content "Body" --at 2025-01-01T09:00
+    python cli.py daemon --sync-interval 900
+
+The daemon dispatches scheduled posts, runs the metric collectors and syncs the post
+store until it receives SIGINT or SIGTERM. One-shot commands never dispatch scheduled
+posts themselves, so they are safe to run next to a daemon sharing the same database.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+from datetime import datetime
+from threading import Event
+
+from accounts import CredentialRegistry
+from clients import credentials_from_env
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DELETED = "Post deleted successfully!"
+
+
+# Function to print one result as a JSON line
+def emit(result):
+    print(json.dumps(result, default=str), flush=True)
+
+
+# Function to load the accounts given on the command line, or the one in the environment
+def load_registry(env_files):
+    """
+    Build a CredentialRegistry from .env files, falling back to environment variables.
+
+    Raises:
+        ValueError: If a file or the environment is missing credentials.
+    """
+    registry = CredentialRegistry()
+    if env_files:
+        for path in env_files:
+            with open(path) as env_file:
+                registry.add_env_content(env_file.read())
+    else:
+        registry.add(credentials_from_env())
+    return registry
+
+
+# Function to pick the client for single-account commands
+def client_for(registry, account=None):
+    username = account or registry.usernames()[0]
+    if username not in registry.usernames():
+        raise ValueError(f"No credentials loaded for u/{username}")
+    return registry.client(username)
+
+
+# Function to read a batch file given as a path, or "-" for stdin
+def read_input(path):
+    if path == "-":
+        return sys.stdin.read(), "stdin.jsonl"
+    with open(path) as input_file:
+        return input_file.read(), path
+
+
+def cmd_create(args, registry):
+    from reddit_crud import create_post
+
+    result = create_post(client_for(registry, args.account), args.subreddit, args.title, args.content)
+    ok = not result.startswith("Error")
+    emit({'ok': ok, 'url' if ok else 'error': result})
+    return ok
+
+
+def cmd_read(args, registry):
+    reddit = client_for(registry, args.account)
+    if args.stored:
+        from store import get_store
+
+        store = get_store()
+        store.sync(reddit)
+        posts = store.read_user_posts(reddit.config.username, args.limit, offset=args.offset)
+    else:
+        from reddit_crud import read_user_posts
+
+        posts = read_user_posts(reddit, args.limit)
+        if isinstance(posts, str):
+            emit({'ok': False, 'error': posts})
+            return False
+    for subreddit, title, post_id, score, url in posts:
+        emit({'subreddit': str(subreddit), 'title': title, 'id': post_id, 'score': score, 'url': url})
+    return True
+
+
+def cmd_update(args, registry):
+    from reddit_crud import update_post
+
+    result = update_post(client_for(registry, args.account), args.post, args.title or "", args.content)
+    ok = result.startswith("https://")
+    emit({'post': args.post, 'ok': ok, 'url' if ok else 'error': result})
+    return ok
+
+
+def cmd_delete(args, registry):
+    from reddit_crud import delete_post
+
+    result = delete_post(client_for(registry, args.account), args.post)
+    ok = result == DELETED
+    emit({'post': args.post, 'ok': ok} if ok else {'post': args.post, 'ok': False, 'error': result})
+    return ok
+
+
+def cmd_batch(args, registry):
+    from bulk import bulk_create_posts, bulk_delete_posts, bulk_update_posts, load_batch, load_updates
+
+    content, name = read_input(args.file)
+    if args.action == "create":
+        # Items name their account, or are spread over every loaded account
+        clients = {username: registry.client(username) for username in registry.usernames()}
+        results = bulk_create_posts(clients, load_batch(content, name), max_workers_per_account=args.workers)
+    elif args.action == "update":
+        results = bulk_update_posts(client_for(registry, args.account), load_updates(content, name),
+                                    max_workers=args.workers)
+    else:
+        posts = [line.strip() for line in content.splitlines() if line.strip()]
+        results = bulk_delete_posts(client_for(registry, args.account), posts, max_workers=args.workers)
+
+    ok = True
+    for result in results:
+        emit(result)
+        ok = ok and result['ok']
+    return ok
+
+
+def cmd_schedule(args, registry):
+    from reddit_crud import get_scheduler, schedule_post
+
+    # Leave dispatching to the daemon; this process only reads and writes the job table
+    scheduler = get_scheduler(dispatch=False)
+    if args.schedule_action == "add":
+        job_id = schedule_post(client_for(registry, args.account), args.subreddit, args.title, args.content,
+                               datetime.fromisoformat(args.at))
+        emit({'ok': True, 'job_id': job_id})
+        return True
+    if args.schedule_action == "list":
+        for job in scheduler.list_jobs(username=args.account, status=args.status):
+            emit(job)
+        return True
+    ok = scheduler.cancel(args.job_id)
+    emit({'job_id': args.job_id, 'ok': ok} if ok else {'job_id': args.job_id, 'ok': False, 'error': "Not pending"})
+    return ok
+
+
+# Function to sync every account's posts, and optionally their comments, into the local store
+def sync_accounts(registry, comments=False, min_interval=0):
+    from store import get_store
+
+    ok = True
+    for username in registry.usernames():
+        try:
+            reddit = registry.client(username)
+            result = {'account': username, 'ok': True,
+                      'new_posts': get_store().sync(reddit, min_interval=min_interval)}
+            if comments:
+                from comments import sync_comments
+
+                result['comments'] = sum(sync_comments(reddit).values())
+        except Exception as e:
+            logger.error(f"Sync failed for u/{username}: {e}")
+            result, ok = {'account': username, 'ok': False, 'error': f"Error: {e}"}, False
+        emit(result)
+    return ok
+
+
+def cmd_sync(args, registry):
+    ok = sync_accounts(registry, comments=args.comments)
+    if args.export:
+        from export import export_dataset
+        from store import get_store
+
+        for username in registry.usernames():
+            emit({'account': username, 'exported': export_dataset(
+                get_store(), username, f"{args.export}/{username}", args.format)})
+    return ok
+
+
+def cmd_daemon(args, registry):
+    from instrumentation import dump_prometheus, start_metrics_server
+    from reddit_crud import get_scheduler
+    from tracker import get_collector
+
+    stop = Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    start_metrics_server()
+    scheduler = get_scheduler()
+    for username in registry.usernames():
+        reddit = registry.client(username)
+        scheduler.register_client(reddit)
+        if not args.no_collect:
+            get_collector(reddit)
+    logger.info(f"Daemon running for {', '.join('u/' + name for name in registry.usernames())}")
+
+    next_sync = 0.0
+    while not stop.is_set():
+        # Jobs added with "schedule add" from other processes
+        scheduler.refresh()
+        if args.sync_interval and next_sync <= time.monotonic():
+            sync_accounts(registry, comments=args.comments)
+            next_sync = time.monotonic() + args.sync_interval
+        if args.metrics_file:
+            dump_prometheus(args.metrics_file)
+        stop.wait(args.poll_interval)
+    if args.metrics_file:
+        dump_prometheus(args.metrics_file)
+    logger.info("Daemon stopped")
+    return True
+
+
+COMMANDS = {
+    'create': cmd_create,
+    'read': cmd_read,
+    'update': cmd_update,
+    'delete': cmd_delete,
+    'batch': cmd_batch,
+    'schedule': cmd_schedule,
+    'sync': cmd_sync,
+    'daemon': cmd_daemon,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--env-file", action="append", help="Credentials .env file; repeat for several accounts.")
+    parser.add_argument("--account", help="Account for single-account commands (default: the first loaded).")
+    parser.add_argument("--log-level", default="INFO", help="Logging level (default: INFO).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="Create a text post.")
+    create.add_argument("--subreddit", required=True)
+    create.add_argument("--title", required=True)
+    create.add_argument("--content", required=True)
+
+    read = commands.add_parser("read", help="List the account's latest posts.")
+    read.add_argument("--limit", type=int, default=10)
+    read.add_argument("--offset", type=int, default=0, help="Posts to skip; only with --stored.")
+    read.add_argument("--stored", action="store_true", help="Sync the local store and read from it.")
+
+    update = commands.add_parser("update", help="Replace the body of one of the account's posts.")
+    update.add_argument("post", help="Post URL.")
+    update.add_argument("--content", required=True)
+    update.add_argument("--title", help="Only used in the log line; Reddit titles cannot be edited.")
+
+    delete = commands.add_parser("delete", help="Delete one of the account's posts.")
+    delete.add_argument("post", help="Post URL.")
+
+    batch = commands.add_parser("batch", help="Create, update or delete many posts from a file.")
+    batch.add_argument("action", choices=["create", "update", "delete"])
+    batch.add_argument("file", help="CSV or JSONL file as in the dashboard, or one post URL or ID per line for "
+                                    "delete; \"-\" reads JSONL (or post lines) from stdin.")
+    batch.add_argument("--workers", type=int, default=2, help="Concurrent requests per account.")
+
+    schedule = commands.add_parser("schedule", help="Manage scheduled posts.")
+    schedule_actions = schedule.add_subparsers(dest="schedule_action", required=True)
+    schedule_add = schedule_actions.add_parser("add", help="Queue a post for the daemon to make.")
+    schedule_add.add_argument("--subreddit", required=True)
+    schedule_add.add_argument("--title", required=True)
+    schedule_add.add_argument("--content", required=True)
+    schedule_add.add_argument("--at", required=True, help="ISO 8601 time; without an offset it is read as IST.")
+    schedule_list = schedule_actions.add_parser("list", help="List scheduled posts.")
+    schedule_list.add_argument("--status", help="Only jobs with this status, e.g. pending.")
+    schedule_cancel = schedule_actions.add_parser("cancel", help="Cancel a pending post.")
+    schedule_cancel.add_argument("job_id", type=int)
+
+    sync = commands.add_parser("sync", help="Sync every account's posts into the local store.")
+    sync.add_argument("--comments", action="store_true", help="Also ingest changed comment threads.")
+    sync.add_argument("--export", metavar="DIR", help="Then export each account's dataset to DIR/<account>.")
+    sync.add_argument("--format", default="parquet", choices=["parquet", "arrow", "csv"])
+
+    daemon = commands.add_parser("daemon", help="Dispatch scheduled posts, collect metrics and sync until stopped.")
+    daemon.add_argument("--sync-interval", type=float, default=900,
+                        help="Seconds between store syncs; 0 disables them (default: 900).")
+    daemon.add_argument("--poll-interval", type=float, default=30,
+                        help="Seconds between checks for newly scheduled posts (default: 30).")
+    daemon.add_argument("--comments", action="store_true", help="Also ingest changed comment threads on sync.")
+    daemon.add_argument("--no-collect", action="store_true", help="Do not run the metric collectors.")
+    daemon.add_argument("--metrics-file", metavar="PATH", default=os.getenv("METRICS_FILE"),
+                        help="Rewrite Prometheus metrics to PATH every poll interval, e.g. for a node-exporter "
+                             "textfile collector (default: METRICS_FILE).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), stream=sys.stderr)
+    try:
+        registry = load_registry(args.env_file)
+        ok = COMMANDS[args.command](args, registry)
+    except (OSError, ValueError) as e:
+        logger.error(str(e))
+        emit({'ok': False, 'error': f"Error: {e}"})
+        return 2
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
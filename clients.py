@@ -0,0 +1,149 @@
+import os
+import time
+import hashlib
+import logging
+from functools import lru_cache
+from io import StringIO
+from threading import Lock
+
+import praw
+from dotenv import dotenv_values
+
+from ratelimit import GovernedRequestor, disable_prawcore_retries
+from transport import create_session
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CREDENTIAL_KEYS = ("CLIENT_ID", "CLIENT_SECRET", "USER_AGENT", "REDDIT_USERNAME", "REDDIT_PASSWORD")
+
+
+# Function to read credentials from environment variables
+def credentials_from_env():
+    return {key: os.getenv(key) for key in CREDENTIAL_KEYS}
+
+
+# Function to parse credentials from the content of a .env file
+@lru_cache(maxsize=32)
+def _parse_env_content(content):
+    values = dotenv_values(stream=StringIO(content))
+    return tuple((key, values.get(key)) for key in CREDENTIAL_KEYS)
+
+
+def parse_credentials(content):
+    """
+    Parse Reddit credentials from .env file content without touching os.environ.
+
+    Parsing is cached by content, so Streamlit reruns with the same upload are free.
+
+    Returns:
+        dict: The values of CREDENTIAL_KEYS, None where missing.
+    """
+    return dict(_parse_env_content(content))
+
+
+# Function to fingerprint a set of credentials for use as a pool key
+def credential_fingerprint(credentials):
+    digest = hashlib.sha256()
+    for key in CREDENTIAL_KEYS:
+        digest.update(f"{key}={credentials.get(key) or ''}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Function to get the seconds left on a client's access token, or None if it has none
+def token_seconds_left(reddit):
+    authorizer = reddit._core._authorizer
+    if getattr(authorizer, "access_token", None) is None:
+        return None
+    if hasattr(authorizer, "_expiration_timestamp_ns"):
+        return (authorizer._expiration_timestamp_ns - time.monotonic_ns()) / 1e9
+    return authorizer._expiration_timestamp - time.time()
+
+
+class ClientPool:
+    """
+    Process-wide pool of authenticated praw.Reddit clients keyed by credential fingerprint.
+
+    Reusing a client keeps its HTTP session, connection pool and access token across
+    Streamlit reruns and users with the same credentials.
+
+    Args:
+        idle_timeout (float): Seconds after which an unused client is evicted.
+        refresh_margin (float): Refresh access tokens that expire within this many seconds.
+    """
+
+    def __init__(self, idle_timeout=1800, refresh_margin=300):
+        self.idle_timeout = idle_timeout
+        self.refresh_margin = refresh_margin
+        self._clients = {}
+        self._lock = Lock()
+
+    def get(self, credentials):
+        """
+        Return a pooled client for the credentials, creating it on first use.
+
+        Raises:
+            ValueError: If any credential is missing.
+        """
+        missing = [key for key in CREDENTIAL_KEYS if not credentials.get(key)]
+        if missing:
+            raise ValueError(f"Missing credentials: {', '.join(missing)}")
+
+        fingerprint = credential_fingerprint(credentials)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(fingerprint)
+            if entry is None:
+                reddit = praw.Reddit(
+                    client_id=credentials["CLIENT_ID"],
+                    client_secret=credentials["CLIENT_SECRET"],
+                    user_agent=credentials["USER_AGENT"],
+                    username=credentials["REDDIT_USERNAME"],
+                    password=credentials["REDDIT_PASSWORD"],
+                    requestor_class=GovernedRequestor,
+                    requestor_kwargs={'account': credentials["REDDIT_USERNAME"], 'session': create_session()},
+                )
+                reddit.validate_on_submit = True
+                disable_prawcore_retries(reddit)
+                logger.info(f"Reddit client created for u/{credentials['REDDIT_USERNAME']}")
+            else:
+                reddit = entry[0]
+            self._clients[fingerprint] = (reddit, now)
+
+        self._refresh_if_expiring(reddit)
+        return reddit
+
+    def evict_idle(self):
+        """Drop clients that have not been used within idle_timeout."""
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+
+    def __len__(self):
+        return len(self._clients)
+
+    def _evict_idle(self, now):
+        idle = [fingerprint for fingerprint, (_, last_used) in self._clients.items()
+                if now - last_used > self.idle_timeout]
+        for fingerprint in idle:
+            del self._clients[fingerprint]
+        if idle:
+            logger.info(f"Evicted {len(idle)} idle Reddit client(s)")
+        return len(idle)
+
+    def _refresh_if_expiring(self, reddit):
+        try:
+            seconds_left = token_seconds_left(reddit)
+            if seconds_left is not None and seconds_left < self.refresh_margin:
+                reddit._core._authorizer.refresh()
+                logger.info("Refreshed Reddit access token ahead of expiry.")
+        except Exception as e:
+            # PRAW refreshes on demand anyway, so a failed early refresh is not fatal
+            logger.error(f"Proactive token refresh failed: {e}")
+
+
+# Process-wide pool, shared across Streamlit reruns and sessions
+client_pool = ClientPool(
+    idle_timeout=float(os.getenv("REDDIT_CLIENT_IDLE_TIMEOUT", "1800")),
+    refresh_margin=float(os.getenv("REDDIT_TOKEN_REFRESH_MARGIN", "300")),
+)
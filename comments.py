@@ -0,0 +1,184 @@
+import re
+import time
+import logging
+from collections import deque
+
+from praw.const import API_PATH
+from praw.models import MoreComments
+
+from records import CommentRecord
+from store import get_store
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Reddit's /api/morechildren expands at most 100 comment IDs per request
+MORECHILDREN_BATCH_SIZE = 100
+
+# Comments are written to the store in chunks of this size while a thread is being ingested
+WRITE_BATCH_SIZE = 500
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+# Small general-purpose sentiment lexicon; enough to separate praise from complaints in replies
+POSITIVE_WORDS = frozenset("""
+    amazing awesome beautiful best brilliant cool excellent fantastic glad good great happy helpful
+    impressive interesting like liked love loved lovely nice perfect recommend thank thanks
+    useful well wonderful wow agree agreed congrats congratulations enjoy enjoyed fun funny
+    incredible neat solid superb appreciate appreciated correct fair fine favorite beautifully
+""".split())
+
+NEGATIVE_WORDS = frozenset("""
+    awful bad boring broken bug buggy confusing crap disagree disappointed disappointing dislike
+    dumb fail failed fails garbage hate hated horrible issue lame mess poor problem sad scam
+    slow spam stupid terrible trash ugly useless waste worse worst wrong annoying angry
+    misleading pointless ridiculous sucks unfortunately
+""".split())
+
+NEGATIONS = frozenset("not no never don't doesn't didn't isn't wasn't aren't can't won't nothing hardly".split())
+
+
+# Function to score the sentiment of a text from -1 (negative) to 1 (positive)
+def sentiment_score(text):
+    """
+    Lexicon-based sentiment: each positive word counts +1 and each negative word -1,
+    flipped when one of the two preceding words is a negation. The sum is divided by
+    the number of sentiment words, so the score is 0 for neutral text.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    total = hits = 0
+    for index, word in enumerate(words):
+        polarity = 1 if word in POSITIVE_WORDS else -1 if word in NEGATIVE_WORDS else 0
+        if polarity:
+            if NEGATIONS.intersection(words[max(index - 2, 0):index]):
+                polarity = -polarity
+            total += polarity
+            hits += 1
+    return total / hits if hits else 0.0
+
+
+# Function to copy a PRAW comment into a CommentRecord
+def comment_to_record(comment, post_id, depth):
+    return CommentRecord(
+        id=comment.id,
+        post_id=post_id,
+        parent_id=comment.parent_id,
+        author=comment.author.name if comment.author is not None else None,
+        body=comment.body,
+        score=comment.score,
+        created_utc=comment.created_utc,
+        depth=depth,
+        sentiment=sentiment_score(comment.body),
+    )
+
+
+# Function to stream every comment of a thread, expanding MoreComments in batched requests
+def iter_thread_comments(reddit, post_id):
+    """
+    Yield CommentRecords for all comments of a submission.
+
+    The first request loads the tree Reddit returns inline. The IDs hidden behind all
+    MoreComments stubs are then pooled and expanded 100 at a time through
+    /api/morechildren, rather than one request per stub as replace_more() does. New
+    stubs found in a response go back into the pool. "Continue this thread" stubs,
+    which have no IDs, are loaded by their parent comment.
+
+    The tree is walked iteratively, so deep threads do not hit the recursion limit.
+    """
+    submission = reddit.submission(id=post_id)
+    submission.comment_sort = "new"
+    depths = {f"t3_{post_id}": -1}
+    pending_ids = deque()
+    continue_stubs = []
+    seen = set()
+
+    def visit(items):
+        # Depth-first walk over comments and their inline replies
+        stack = list(reversed(list(items)))
+        while stack:
+            item = stack.pop()
+            if isinstance(item, MoreComments):
+                if item.children:
+                    pending_ids.extend(child for child in item.children if child not in seen)
+                else:
+                    continue_stubs.append(item)
+                continue
+            if item.id in seen:
+                continue
+            seen.add(item.id)
+            # Comments loaded through a "continue this thread" stub carry depths relative to
+            # the re-rooted thread, so the API depth is only trusted when the parent is unknown
+            if item.parent_id in depths:
+                depth = depths[item.parent_id] + 1
+            else:
+                depth = getattr(item, 'depth', None) or 0
+            depths[f"t1_{item.id}"] = depth
+            yield comment_to_record(item, post_id, depth)
+            stack.extend(reversed(list(item.replies)))
+
+    yield from visit(submission.comments)
+
+    while pending_ids or continue_stubs:
+        if pending_ids:
+            batch = []
+            while pending_ids and len(batch) < MORECHILDREN_BATCH_SIZE:
+                comment_id = pending_ids.popleft()
+                if comment_id not in seen and comment_id not in batch:
+                    batch.append(comment_id)
+            if not batch:
+                continue
+            items = reddit.post(API_PATH["morechildren"], data={
+                'children': ",".join(batch),
+                'link_id': f"t3_{post_id}",
+                'sort': submission.comment_sort,
+            })
+            for item in items:
+                item.submission = submission
+            yield from visit(items)
+        else:
+            stub = continue_stubs.pop()
+            stub.submission = submission
+            yield from visit(stub.comments(update=True))
+
+
+# Function to ingest the comments of an account's threads whose comment count changed
+def sync_comments(reddit, store=None, max_threads=None):
+    """
+    Refresh the stored comments of every post whose num_comments differs from the
+    count at its last ingestion.
+
+    The post table is synced first so the counts are current. Comments are written in
+    chunks as they stream in, so memory stays flat for threads with tens of thousands
+    of comments.
+
+    Args:
+        reddit (praw.Reddit): The initialized Reddit client.
+        store (PostStore): Where comments are written; defaults to the process-wide store.
+        max_threads (int): Ingest at most this many threads, newest first.
+
+    Returns:
+        dict: Map of post ID to the number of comments ingested.
+    """
+    store = store or get_store()
+    username = reddit.config.username
+    store.sync(reddit)
+    threads = store.comment_threads_to_sync(username)
+    if max_threads is not None:
+        threads = threads[:max_threads]
+
+    ingested = {}
+    for post_id, num_comments in threads:
+        started_at = time.time()
+        batch, count = [], 0
+        for record in iter_thread_comments(reddit, post_id):
+            batch.append(record)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                store.upsert_comments(batch)
+                count += len(batch)
+                batch = []
+        store.upsert_comments(batch)
+        count += len(batch)
+        store.mark_comments_synced(post_id, num_comments, synced_at=started_at)
+        ingested[post_id] = count
+        logger.info(f"Ingested {count} comment(s) for post {post_id}")
+    return ingested
@@ -0,0 +1,136 @@
+import os
+import math
+
+import numpy as np
+import pandas as pd
+
+# Charts with more categories than this show the largest ones and one "Other" bar
+MAX_BARS = int(os.getenv("CHART_MAX_BARS", "50"))
+
+# Line series longer than this are downsampled with LTTB
+MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "2000"))
+
+# Line charts with more points than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = int(os.getenv("CHART_WEBGL_THRESHOLD", "1000"))
+
+# Rows per page of the post details table
+TABLE_PAGE_SIZE = int(os.getenv("CHART_TABLE_PAGE_SIZE", "50"))
+
+# Colour series beyond this many are merged into "Other"
+MAX_SERIES = 10
+
+
+# Function to pick the points of a series that best preserve its shape
+def lttb(x, y, threshold=MAX_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept. The rest are split into threshold - 2
+    buckets, and from each bucket the point forming the largest triangle with the point
+    kept from the previous bucket and the mean of the next bucket is kept. Peaks and
+    troughs survive, unlike with plain striding or averaging.
+
+    Args:
+        x: Numeric x values in ascending order; datetimes are accepted.
+        y: Numeric y values, same length as x.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Indices of the kept points, ascending. All indices if the series is
+            already no longer than threshold.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = np.asarray(x).astype('datetime64[ns]').astype('int64')
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        mean_x, mean_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        areas = np.abs((x[previous] - mean_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+# Function to downsample every value column of a time-indexed frame on a shared set of rows
+def downsample_frame(df, x, columns, threshold=MAX_POINTS):
+    """
+    Reduce a frame to about threshold rows for a line chart.
+
+    Each column is downsampled with LTTB and the union of the kept rows is returned, so
+    every series keeps its own extremes.
+
+    Returns:
+        pd.DataFrame: The frame itself if it is short enough, otherwise the kept rows.
+    """
+    if len(df) <= threshold:
+        return df
+    per_column = max(threshold // len(columns), 3)
+    df = df.sort_values(x)
+    kept = np.unique(np.concatenate([lttb(df[x], df[column].fillna(0), per_column) for column in columns]))
+    return df.iloc[kept]
+
+
+# Function to keep the largest categories and merge the rest into one "Other" row
+def top_n_with_other(df, label, rank_by, n=MAX_BARS, aggregations=None, other_label="Other"):
+    """
+    Args:
+        df (pd.DataFrame): One row per category.
+        label (str): Column with the category names.
+        rank_by (str): Column used to pick the largest n rows.
+        n (int): Number of rows kept as they are.
+        aggregations (dict): How each numeric column is combined for the "Other" row,
+            e.g. {'score': 'mean'}; columns not listed are summed.
+        other_label (str): Label of the merged row; the number of merged rows is appended.
+
+    Returns:
+        pd.DataFrame: At most n + 1 rows, largest first, with "Other" last.
+    """
+    if len(df) <= n:
+        return df
+    df = df.sort_values(rank_by, ascending=False)
+    top, rest = df.iloc[:n], df.iloc[n:]
+    aggregations = aggregations or {}
+    other = {label: f"{other_label} ({len(rest)})"}
+    for column in rest.columns:
+        if column != label and pd.api.types.is_numeric_dtype(rest[column]):
+            other[column] = rest[column].agg(aggregations.get(column, 'sum'))
+    return pd.concat([top, pd.DataFrame([other])], ignore_index=True)
+
+
+# Function to merge all but the largest series of a long frame into "Other"
+def limit_series(df, column, weight, max_series=MAX_SERIES, other_label="Other"):
+    totals = df.groupby(column, observed=True)[weight].sum().sort_values(ascending=False)
+    if len(totals) <= max_series:
+        return df
+    keep = set(totals.index[:max_series])
+    return df.assign(**{column: df[column].where(df[column].isin(keep), other_label)})
+
+
+# Function to bin values into a fixed number of buckets before plotting
+def histogram_frame(values, bins=60, value_range=None):
+    """
+    Return (bin_start, bin_end, count) rows, so that histograms send bin counts to the
+    browser rather than every raw value.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return pd.DataFrame(columns=['bin_start', 'bin_end', 'count'])
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+
+
+# Function to work out how many pages a table of rows spans
+def page_count(rows, page_size=TABLE_PAGE_SIZE):
+    return max(math.ceil(rows / page_size), 1)
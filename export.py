@@ -0,0 +1,221 @@
+import io
+import os
+import logging
+import zipfile
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.feather as feather
+    import pyarrow.parquet as parquet
+except ImportError:  # pyarrow is optional; CSV export works without it
+    pyarrow = None
+
+from records import POST_FRAME_DTYPES, SubmissionRecord
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# File extension of each supported format
+FORMATS = {'parquet': ".parquet", 'arrow': ".arrow", 'csv': ".csv"}
+
+# Tables of an exported dataset and their columns
+TABLES = {
+    'posts': list(SubmissionRecord._fields),
+    'metric_snapshots': ['post_id', 'captured_at', 'score', 'num_comments', 'upvote_ratio'],
+    'account_snapshots': ['captured_at', 'link_karma', 'comment_karma', 'followers'],
+}
+
+# Exported posts keep upvote_ratio at full precision, so an export imports back unchanged
+EXPORT_POST_DTYPES = {**POST_FRAME_DTYPES, 'upvote_ratio': 'float64'}
+
+
+# Function to fail early when a columnar format is requested without pyarrow
+def _require_pyarrow(file_format):
+    if file_format != 'csv' and pyarrow is None:
+        raise ImportError(f"pyarrow is required for {file_format} files. Install it with: pip install pyarrow")
+
+
+# Function to work out the format of a file from its name
+def format_of(path):
+    for file_format, extension in FORMATS.items():
+        if str(path).endswith(extension):
+            return file_format
+    raise ValueError(f"Unsupported file type: {path}. Use one of {', '.join(FORMATS.values())}")
+
+
+# Function to read an account's dataset out of the store as typed frames
+def dataset_frames(store, username):
+    """
+    Return the account's posts, metric snapshots and account snapshots as DataFrames.
+
+    Posts have the column types of the analytics frame, with created_utc as a UTC
+    datetime and upvote_ratio kept as float64; snapshot times stay as epoch seconds, as
+    in the store.
+    """
+    posts = pd.DataFrame.from_records(store.submissions(username), columns=TABLES['posts'])
+    posts = posts.astype(EXPORT_POST_DTYPES)
+    posts['created_utc'] = pd.to_datetime(posts['created_utc'], unit='s')
+    return {
+        'posts': posts,
+        'metric_snapshots': pd.DataFrame.from_records(store.metric_snapshots(username),
+                                                      columns=TABLES['metric_snapshots']),
+        'account_snapshots': pd.DataFrame.from_records(store.account_history(username),
+                                                       columns=TABLES['account_snapshots']),
+    }
+
+
+# Function to write one frame in the given format
+def write_frame(frame, target, file_format):
+    _require_pyarrow(file_format)
+    if file_format == 'parquet':
+        frame.to_parquet(target, index=False, compression="zstd")
+    elif file_format == 'arrow':
+        feather.write_feather(pyarrow.Table.from_pandas(frame, preserve_index=False), target, compression="zstd")
+    else:
+        frame.to_csv(target, index=False)
+
+
+# Function to read one frame, optionally only some columns, memory-mapping local columnar files
+def read_frame(source, file_format, columns=None, memory_map=True):
+    """
+    Read a table written by write_frame.
+
+    Args:
+        source: A file path or a binary file-like object.
+        file_format (str): One of FORMATS.
+        columns (list): Only read these columns. Columnar formats skip the others on disk.
+        memory_map (bool): Memory-map Parquet and Arrow files given by path, so that only
+            the pages of the selected columns are read.
+
+    Returns:
+        pd.DataFrame: The table.
+    """
+    _require_pyarrow(file_format)
+    memory_map = memory_map and isinstance(source, (str, os.PathLike))
+    if file_format == 'parquet':
+        return parquet.read_table(source, columns=columns, memory_map=memory_map).to_pandas()
+    if file_format == 'arrow':
+        return feather.read_table(source, columns=columns, memory_map=memory_map).to_pandas()
+    return pd.read_csv(source, usecols=columns)
+
+
+# Function to export an account's dataset as one file per table
+def export_dataset(store, username, directory, file_format='parquet'):
+    """
+    Write posts.<ext>, metric_snapshots.<ext> and account_snapshots.<ext> to a directory.
+
+    Returns:
+        dict: Map of table name to the path written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for table, frame in dataset_frames(store, username).items():
+        paths[table] = os.path.join(directory, table + FORMATS[file_format])
+        write_frame(frame, paths[table], file_format)
+    logger.info(f"Exported u/{username} to {directory} as {file_format}")
+    return paths
+
+
+# Function to export an account's dataset as a zip archive in memory, e.g. for a download button
+def export_archive(store, username, file_format='parquet'):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for table, frame in dataset_frames(store, username).items():
+            table_buffer = io.BytesIO()
+            write_frame(frame, table_buffer, file_format)
+            archive.writestr(table + FORMATS[file_format], table_buffer.getvalue())
+    return buffer.getvalue()
+
+
+# Function to read the tables of an exported dataset from a directory or zip archive
+def read_dataset(source, columns=None):
+    """
+    Read an exported dataset.
+
+    Args:
+        source: A directory written by export_dataset, or a path or file-like object of an
+            archive written by export_archive.
+        columns (dict): Map of table name to the columns to read; other tables are read whole.
+
+    Returns:
+        dict: Map of table name to DataFrame, for the tables present.
+    """
+    columns = columns or {}
+    frames = {}
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        for name in os.listdir(source):
+            table, extension = os.path.splitext(name)
+            if table in TABLES and extension in FORMATS.values():
+                frames[table] = read_frame(os.path.join(source, name), format_of(name), columns.get(table))
+        return frames
+
+    with zipfile.ZipFile(source) as archive:
+        for name in archive.namelist():
+            table, extension = os.path.splitext(name)
+            if table in TABLES and extension in FORMATS.values():
+                with archive.open(name) as table_file:
+                    frames[table] = read_frame(io.BytesIO(table_file.read()), format_of(name), columns.get(table))
+    return frames
+
+
+# Function to load exported posts straight into an analytics frame
+def load_posts(path, columns=None, memory_map=True):
+    """
+    Load an exported posts file for offline analysis.
+
+    Parquet and Arrow files are memory-mapped and only the requested columns are read.
+    The result can be passed to any chart function in analytics.py.
+
+    Args:
+        path (str): A posts.parquet, posts.arrow or posts.csv file.
+        columns (list): Only load these columns, e.g. ['title', 'score'] for post_scores_chart.
+
+    Returns:
+        pd.DataFrame: Typed like analytics.build_post_frame, with created_utc as datetime.
+    """
+    frame = read_frame(path, format_of(path), columns, memory_map=memory_map)
+    return _type_posts(frame)
+
+
+# Function to restore the posts column types, which CSV does not keep
+def _type_posts(frame, dtypes=POST_FRAME_DTYPES):
+    frame = frame.astype({column: dtype for column, dtype in dtypes.items()
+                          if column in frame.columns and frame[column].dtype != dtype})
+    if 'created_utc' in frame.columns and not pd.api.types.is_datetime64_dtype(frame['created_utc']):
+        frame['created_utc'] = pd.to_datetime(frame['created_utc'])
+    return frame
+
+
+# Function to load an exported dataset into the local store
+def import_dataset(store, username, source):
+    """
+    Merge an exported dataset into the store under username.
+
+    Posts are upserted without adding snapshots; metric and account snapshots already
+    in the store are skipped, so importing the same file twice changes nothing.
+
+    Returns:
+        dict: Map of table name to the number of rows read.
+    """
+    frames = read_dataset(source)
+    posts = frames.get('posts')
+    if posts is not None:
+        posts = _type_posts(posts, EXPORT_POST_DTYPES)
+        posts['created_utc'] = (posts['created_utc'] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+        # Reddit reports ratios to two decimals, so this also restores files written with float32 ratios
+        posts['upvote_ratio'] = posts['upvote_ratio'].round(2)
+        records = [SubmissionRecord(*row) for row in posts[TABLES['posts']].itertuples(index=False, name=None)]
+        store.upsert(username, records, snapshot=False)
+
+    def rows(table):
+        frame = frames.get(table)
+        if frame is None:
+            return []
+        frame = frame[TABLES[table]].astype(object).where(frame[TABLES[table]].notna(), None)
+        return list(frame.itertuples(index=False, name=None))
+
+    store.merge_snapshots(rows('metric_snapshots'), rows('account_snapshots'), username=username)
+    logger.info(f"Imported dataset into u/{username}")
+    return {table: len(frame) for table, frame in frames.items()}
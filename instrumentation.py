@@ -0,0 +1,248 @@
+import os
+import re
+import time
+import logging
+from functools import wraps
+from threading import Lock, Thread
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from prawcore import Requestor
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path segments that vary per request and would explode label cardinality
+PATH_PATTERNS = (
+    (re.compile(r"/user/[^/]+"), "/user/{name}"),
+    (re.compile(r"/r/[^/]+"), "/r/{subreddit}"),
+    (re.compile(r"/comments/[^/]+(/[^/]+)?"), "/comments/{id}"),
+)
+
+HELP = {
+    'reddit_requests_total': "Reddit API requests by endpoint and status.",
+    'reddit_request_seconds': "Reddit API request latency.",
+    'reddit_request_bytes_total': "Bytes sent to the Reddit API.",
+    'reddit_response_bytes_total': "Bytes received from the Reddit API.",
+    'reddit_ratelimit_remaining': "Requests left in the current rate-limit window.",
+    'reddit_ratelimit_used': "Requests used in the current rate-limit window.",
+    'reddit_ratelimit_reset_seconds': "Seconds until the rate-limit window resets.",
+    'chart_render_seconds': "Time to build a chart.",
+    'cache_lookups_total': "Cache lookups by cache and result.",
+    'reddit_retries_total': "Reddit API requests retried after a 429, 5xx or connection error.",
+    'coalesced_calls_total': "Calls that joined an identical call already in flight.",
+}
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and latency histograms keyed by name and labels."""
+
+    def __init__(self):
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * len(LATENCY_BUCKETS), 'count': 0, 'sum': 0.0}
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """
+        Return a copy of every metric.
+
+        Returns:
+            dict: counters, gauges and histograms, each a list of dicts with name, labels and values.
+        """
+        with self._lock:
+            return {
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                'gauges': [{'name': name, 'labels': dict(labels), 'value': value}
+                           for (name, labels), value in sorted(self._gauges.items())],
+                'histograms': [{'name': name, 'labels': dict(labels), 'count': histogram['count'],
+                                'sum': histogram['sum'], 'buckets': list(histogram['buckets'])}
+                               for (name, labels), histogram in sorted(self._histograms.items())],
+            }
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        def header(name, metric_type):
+            if name not in typed:
+                typed.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for metric in snapshot['counters']:
+            header(metric['name'], "counter")
+            lines.append(f"{metric['name']}{_format_labels(metric['labels'])} {metric['value']}")
+        for metric in snapshot['gauges']:
+            header(metric['name'], "gauge")
+            lines.append(f"{metric['name']}{_format_labels(metric['labels'])} {metric['value']}")
+        for metric in snapshot['histograms']:
+            name, labels = metric['name'], metric['labels']
+            header(name, "histogram")
+            for bound, count in zip(LATENCY_BUCKETS, metric['buckets']):
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {metric['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {metric['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {metric['count']}")
+        return "\n".join(lines) + "\n"
+
+
+# Function to format a label set for the Prometheus text format
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
+
+
+# Function to normalize a request URL into a low-cardinality endpoint label
+def endpoint_label(url):
+    path = urlsplit(url).path.rstrip("/") or "/"
+    for pattern, replacement in PATH_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+class InstrumentedRequestor(Requestor):
+    """
+    prawcore Requestor that records latency, payload sizes, status codes and rate-limit
+    headers for every Reddit request.
+
+    Pass it to praw.Reddit as requestor_class, with requestor_kwargs={'account': username}
+    to label the rate-limit gauges.
+    """
+
+    def __init__(self, *args, account="unknown", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.account = account
+
+    def request(self, *args, **kwargs):
+        method, url = (list(args) + [kwargs.get('method'), kwargs.get('url')])[:2]
+        endpoint = endpoint_label(url or "")
+        start = time.perf_counter()
+        try:
+            response = super().request(*args, **kwargs)
+        except Exception:
+            metrics.inc('reddit_requests_total', method=method, endpoint=endpoint, status="error")
+            raise
+        finally:
+            metrics.observe('reddit_request_seconds', time.perf_counter() - start, method=method, endpoint=endpoint)
+
+        metrics.inc('reddit_requests_total', method=method, endpoint=endpoint, status=str(response.status_code))
+        metrics.inc('reddit_response_bytes_total', len(response.content), endpoint=endpoint)
+        body = getattr(response.request, 'body', None)
+        if body:
+            metrics.inc('reddit_request_bytes_total', len(body), endpoint=endpoint)
+        self._record_rate_limit(response.headers)
+        return response
+
+    def _record_rate_limit(self, headers):
+        for header, name in (("x-ratelimit-remaining", 'reddit_ratelimit_remaining'),
+                             ("x-ratelimit-used", 'reddit_ratelimit_used'),
+                             ("x-ratelimit-reset", 'reddit_ratelimit_reset_seconds')):
+            value = headers.get(header)
+            if value is not None:
+                try:
+                    metrics.set_gauge(name, float(value), account=self.account)
+                except ValueError:
+                    pass
+
+
+# Decorator to time a chart builder
+def timed_chart(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.observe('chart_render_seconds', time.perf_counter() - start, chart=func.__name__)
+    return wrapper
+
+
+# Function to write the Prometheus text to a file, e.g. for a node-exporter textfile collector
+def dump_prometheus(path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as metrics_file:
+        metrics_file.write(metrics.render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = Lock()
+
+
+# Function to serve /metrics over HTTP from a background thread, once per process
+def start_metrics_server(port=None):
+    """
+    Start the Prometheus endpoint on the given port, or METRICS_PORT if set.
+
+    Returns:
+        int: The port being served, or None if no port is configured.
+    """
+    global _server
+    port = port or os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Serving Prometheus metrics on port {port}")
+        return _server.server_address[1]
@@ -0,0 +1,207 @@
+import os
+import time
+import uuid
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, local
+
+from scheduler import CANCELLED, DONE, FAILED, PENDING, RUNNING
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# The job each worker thread is running, so report_progress() needs no job ID
+_current = local()
+
+
+class Job:
+    """A unit of background work and its outcome."""
+
+    def __init__(self, username, name, key, func, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.username = username
+        self.name = name
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.progress = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'name': self.name,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'progress': self.progress,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    In-process queue that runs Reddit I/O off the Streamlit script thread.
+
+    Submitting returns a job ID at once; callers poll status() for the outcome. Each
+    account has its own FIFO and at most max_workers_per_account jobs running, so one
+    slow account cannot take over the pool. Jobs submitted with a key that is already
+    pending or running are not queued twice. Long jobs can call report_progress() to
+    show how far they have got.
+
+    Args:
+        max_workers_per_account (int): Concurrent jobs per account.
+        max_workers (int): Size of the shared worker pool.
+        retention (float): Seconds finished jobs stay available to status().
+    """
+
+    def __init__(self, max_workers_per_account=2, max_workers=8, retention=3600):
+        self.max_workers_per_account = max_workers_per_account
+        self.retention = retention
+        self._jobs = {}
+        self._active_keys = {}
+        self._queues = {}
+        self._running = {}
+        self._cond = Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-queue")
+
+    def submit(self, username, func, *args, key=None, name=None, **kwargs):
+        """
+        Queue func(*args, **kwargs) for an account.
+
+        Args:
+            username (str): The account whose worker budget the job uses.
+            key (hashable): Jobs with the same key are deduplicated while one is unfinished.
+            name (str): Label shown in job listings; defaults to the function name.
+
+        Returns:
+            str: The job ID, or the ID of the unfinished job with the same key.
+        """
+        with self._cond:
+            self._prune(time.time())
+            if key is not None and key in self._active_keys:
+                return self._active_keys[key]
+            job = Job(username, name or func.__name__, key, func, args, kwargs)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active_keys[key] = job.id
+            self._queues.setdefault(username, deque()).append(job)
+            self._drain(username)
+        logger.info(f"Queued job {job.name} ({job.id}) for u/{username}")
+        return job.id
+
+    def status(self, job_id):
+        """Return the job as a dict, or None if it is unknown or has expired."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def list_jobs(self, username=None):
+        """Return jobs as dicts, most recent first."""
+        with self._cond:
+            jobs = [job.to_dict() for job in self._jobs.values() if username is None or job.username == username]
+        return sorted(jobs, key=lambda job: job['submitted_at'], reverse=True)
+
+    def cancel(self, job_id):
+        """Cancel a pending job. Returns True if the job was pending."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != PENDING:
+                return False
+            self._finish(job, CANCELLED)
+            self._queues[job.username].remove(job)
+        logger.info(f"Cancelled job {job.name} ({job_id})")
+        return True
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes or the timeout passes, then return its status()."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job.status in FINISHED:
+                    return job.to_dict() if job is not None else None
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return job.to_dict()
+                self._cond.wait(remaining)
+
+    def _drain(self, username):
+        # Called with the condition held; starts queued jobs while the account has free workers
+        queue = self._queues.get(username)
+        while queue and self._running.get(username, 0) < self.max_workers_per_account:
+            job = queue.popleft()
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._running[username] = self._running.get(username, 0) + 1
+            self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        _current.job = job
+        try:
+            result = job.func(*job.args, **job.kwargs)
+            error = None
+        except Exception as e:
+            logger.error(f"Job {job.name} ({job.id}) failed: {e}")
+            result, error = None, f"Error: {e}"
+        finally:
+            _current.job = None
+        # The CRUD functions report failures as "Error: ..." strings rather than raising
+        if error is None and isinstance(result, str) and result.startswith("Error"):
+            error = result
+        with self._cond:
+            job.result = result
+            job.error = error
+            self._finish(job, FAILED if error else DONE)
+            self._running[job.username] -= 1
+            self._drain(job.username)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        job.func = job.args = job.kwargs = None
+        if job.key is not None and self._active_keys.get(job.key) == job.id:
+            del self._active_keys[job.key]
+        self._cond.notify_all()
+
+    def _prune(self, now):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.status in FINISHED and now - job.finished_at > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# Function to report how far the job running on this thread has got; a no-op outside jobs
+def report_progress(done, total=None):
+    job = getattr(_current, 'job', None)
+    if job is not None:
+        job.progress = (done, total)
+
+
+# Function to drain a generator of results inside a job, reporting progress as each arrives
+def collect_results(results, total=None):
+    collected = []
+    for result in results:
+        collected.append(result)
+        report_progress(len(collected), total)
+    return collected
+
+
+# Process-wide queue, shared across Streamlit reruns and sessions
+job_queue = JobQueue(
+    max_workers_per_account=int(os.getenv("JOB_WORKERS_PER_ACCOUNT", "2")),
+    max_workers=int(os.getenv("JOB_MAX_WORKERS", "8")),
+    retention=float(os.getenv("JOB_RETENTION", "3600")),
+)
@@ -0,0 +1,264 @@
+import os
+import time
+import random
+import logging
+from threading import Event, Lock
+
+from prawcore.exceptions import RequestException
+
+from instrumentation import InstrumentedRequestor, metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Reddit allows 100 OAuth requests per minute per client
+DEFAULT_RATE = 100 / 60
+DEFAULT_CAPACITY = 10
+
+# Responses worth retrying: rate limited, or a transient server or gateway error
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504, 520, 522})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+DEFAULT_MAX_RETRIES = int(os.getenv("REDDIT_MAX_RETRIES", "4"))
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_CAP = 60.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that can be re-tuned from Reddit's rate-limit headers.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum burst size.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_CAPACITY):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = Lock()
+
+    def acquire(self, tokens=1):
+        """Block until the requested number of tokens is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = max(self._blocked_until - now, (tokens - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def update_from_limits(self, limits):
+        """
+        Re-tune the bucket from a PRAW ``reddit.auth.limits`` dictionary.
+
+        The remaining quota is spread evenly over the time left in the window. When the
+        quota is exhausted the bucket blocks until the window resets.
+        """
+        remaining = limits.get('remaining')
+        reset_timestamp = limits.get('reset_timestamp')
+        if remaining is None or reset_timestamp is None:
+            return
+        seconds_left = max(reset_timestamp - time.time(), 1.0)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if remaining < 1:
+                self._tokens = 0
+                self._blocked_until = now + seconds_left
+                logger.info(f"Rate limit exhausted; pausing for {seconds_left:.0f}s")
+            else:
+                self.rate = remaining / seconds_left
+                self._tokens = min(self._tokens, remaining)
+
+    def update_from_headers(self, headers):
+        """Re-tune the bucket from the X-Ratelimit-Remaining and X-Ratelimit-Reset headers of a response."""
+        try:
+            remaining = float(headers["x-ratelimit-remaining"])
+            reset_seconds = float(headers["x-ratelimit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.update_from_limits({'remaining': remaining, 'reset_timestamp': time.time() + reset_seconds})
+
+    def pause(self, seconds):
+        """Hold back every caller for the given number of seconds, e.g. after a 429."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+# Function to pick a retry delay with full jitter, so that concurrent retries spread out
+def backoff_delay(attempt, base=DEFAULT_BACKOFF_BASE, cap=DEFAULT_BACKOFF_CAP):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it is in flight
+    wait and receive the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': Event(), 'result': None, 'error': None}
+
+        if not leader:
+            metrics.inc('coalesced_calls_total')
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = func()
+            return call['result']
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+
+class RequestGovernor:
+    """
+    Paces, retries and coalesces the HTTP requests of one Reddit account.
+
+    Every request takes a token from the account's bucket, which is re-tuned from the
+    rate-limit headers of each response. Rate-limited requests (429) are retried for any
+    method, since Reddit rejected them unprocessed; transient server and connection
+    errors are retried for idempotent methods only. Retries wait for Retry-After when
+    Reddit sends it and otherwise back off exponentially with jitter. Identical GETs
+    already in flight are sent once.
+
+    The governor is meant to be the only layer that retries: clients using it should be
+    passed to disable_prawcore_retries(), or prawcore retries server errors again, for
+    POSTs too, under every governed attempt.
+
+    Args:
+        bucket (TokenBucket): The account's request budget.
+        max_retries (int): Retries after the first attempt.
+    """
+
+    def __init__(self, bucket=None, max_retries=DEFAULT_MAX_RETRIES):
+        self.bucket = bucket or TokenBucket()
+        self.max_retries = max_retries
+        self._inflight = SingleFlight()
+
+    def send(self, method, url, send, params=None):
+        """
+        Send a request through the governor.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The request URL, used with params to coalesce identical reads.
+            send (callable): Zero-argument function performing one attempt and returning
+                a requests.Response.
+
+        Returns:
+            requests.Response: The last response received.
+
+        Raises:
+            prawcore.exceptions.RequestException: If the final attempt failed to connect.
+        """
+        if method.upper() in IDEMPOTENT_METHODS:
+            key = (method.upper(), url, tuple(sorted((params or {}).items())))
+            return self._inflight.do(key, lambda: self._send_with_retries(method, send))
+        return self._send_with_retries(method, send)
+
+    def _send_with_retries(self, method, send):
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                response = send()
+            except RequestException as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.info(f"{method} failed ({e}); retrying in {delay:.1f}s")
+            else:
+                self.bucket.update_from_headers(response.headers)
+                status = response.status_code
+                if (status not in RETRY_STATUSES or (status != 429 and not idempotent)
+                        or attempt >= self.max_retries):
+                    return response
+                delay = self._retry_after(response) or backoff_delay(attempt)
+                if status == 429:
+                    self.bucket.pause(delay)
+                logger.info(f"{method} returned {status}; retrying in {delay:.1f}s")
+            metrics.inc('reddit_retries_total', method=method)
+            attempt += 1
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return min(float(response.headers["retry-after"]), DEFAULT_BACKOFF_CAP)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+_governors = {}
+_governors_lock = Lock()
+
+
+# Function to get the governor of an account, shared by every client and thread in the process
+def governor_for(username):
+    with _governors_lock:
+        if username not in _governors:
+            _governors[username] = RequestGovernor()
+        return _governors[username]
+
+
+class GovernedRequestor(InstrumentedRequestor):
+    """
+    prawcore Requestor that sends every request through the account's RequestGovernor.
+
+    Each attempt, including retries, is still recorded by InstrumentedRequestor. Pass
+    the praw.Reddit client to disable_prawcore_retries() once it is built, so that the
+    governor is the only layer retrying its requests.
+    """
+
+    def __init__(self, *args, account="unknown", **kwargs):
+        super().__init__(*args, account=account, **kwargs)
+        self.governor = governor_for(account)
+
+    def request(self, method, url, **kwargs):
+        return self.governor.send(method, url, lambda: super(GovernedRequestor, self).request(method, url, **kwargs),
+                                  params=kwargs.get('params'))
+
+
+# Function to make the governor the only layer retrying a client's requests
+def disable_prawcore_retries(reddit):
+    """
+    Stop prawcore retrying server errors and dropped connections on a client built with
+    GovernedRequestor.
+
+    prawcore retries those for every method, POST included, underneath the governor, so
+    each governed attempt would otherwise become up to three. prawcore still retries a
+    401 after refreshing the access token, which the governor cannot do.
+    """
+    for core in (reddit._authorized_core, reddit._read_only_core):
+        core.RETRY_STATUSES = frozenset()
+        core.RETRY_EXCEPTIONS = ()
+    return reddit
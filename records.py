@@ -0,0 +1,52 @@
+from typing import NamedTuple
+
+
+# Record of the submission fields used by the analytics views and the local store
+class SubmissionRecord(NamedTuple):
+    id: str
+    title: str
+    score: int
+    num_comments: int
+    upvote_ratio: float
+    created_utc: float
+    url: str
+    subreddit: str
+
+
+# Column dtypes of the analytics frame built from SubmissionRecords
+POST_FRAME_DTYPES = {
+    'id': 'string',
+    'title': 'string',
+    'score': 'int32',
+    'num_comments': 'int32',
+    'upvote_ratio': 'float32',
+    'url': 'string',
+    'subreddit': 'category',
+}
+
+
+# Function to copy the fields of a PRAW submission into a SubmissionRecord
+def submission_to_record(submission):
+    return SubmissionRecord(
+        id=submission.id,
+        title=submission.title,
+        score=submission.score,
+        num_comments=submission.num_comments,
+        upvote_ratio=submission.upvote_ratio,
+        created_utc=submission.created_utc,
+        url=submission.url,
+        subreddit=submission.subreddit.display_name,
+    )
+
+
+# Record of one comment as kept in the local store
+class CommentRecord(NamedTuple):
+    id: str
+    post_id: str
+    parent_id: str
+    author: str
+    body: str
+    score: int
+    created_utc: float
+    depth: int
+    sentiment: float
@@ -1,143 +1,15 @@
 import streamlit as st
-import praw
-import re
-import os
 import logging
-from dotenv import load_dotenv
-from io import StringIO
+
+# CRUD functions come from the shared core, so both apps get the same caching and records
+from reddit_crud import initialize_reddit, create_post, read_user_posts, update_post, delete_post
+from utils import load_credentials_from_file
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-# Function to load environment variables from uploaded file
-def load_credentials_from_file(uploaded_file):
-    if uploaded_file is not None:
-        try:
-            # Read the content of the uploaded file
-            content = uploaded_file.getvalue().decode("utf-8")
-
-            # Use StringIO to simulate a file for dotenv
-            env_data = StringIO(content)
-            load_dotenv(stream=env_data)
-
-            logger.info("Credentials loaded successfully from uploaded file.")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to load credentials from file: {e}")
-            st.error("Failed to load credentials. Please upload a valid .env file.")
-            return False
-    else:
-        st.error("No file uploaded. Please upload your credentials.env file.")
-        return False
-
-
-# Function to initialize the Reddit client using credentials from environment variables
-def initialize_reddit():
-    client_id = os.getenv("CLIENT_ID")
-    client_secret = os.getenv("CLIENT_SECRET")
-    user_agent = os.getenv("USER_AGENT")
-    username = os.getenv("REDDIT_USERNAME")
-    password = os.getenv("REDDIT_PASSWORD")
-
-    if not all([client_id, client_secret, user_agent, username, password]):
-        logger.error("Missing one or more required environment variables.")
-        st.error("Missing credentials. Please check your .env file.")
-        return None
-
-    try:
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent,
-            username=username,
-            password=password
-        )
-        reddit.validate_on_submit = True
-        logger.info("Reddit client initialized successfully.")
-        return reddit
-    except Exception as e:
-        logger.error(f"Error initializing Reddit client: {e}")
-        st.error(f"Error initializing Reddit client: {e}")
-        return None
-
-# Function to extract submission ID from URL
-def extract_submission_id(url):
-    pattern = r'reddit\.com/r/.+/comments/([a-zA-Z0-9]+)'
-    match = re.search(pattern, url)
-    return match.group(1) if match else None
-
-# Function to create a new post
-def create_post(reddit, subreddit_name, title, content):
-    try:
-        subreddit = reddit.subreddit(subreddit_name)
-        submission = subreddit.submit(title, selftext=content)
-        logger.info(f"Post created in r/{subreddit_name}: {title} (ID: {submission.id})")
-        return submission.url
-    except Exception as e:
-        logger.error(f"An error occurred while creating the post: {e}")
-        return f"Error: {e}"
-
-# Function to read and display the latest posts from a subreddit
-def read_user_posts(reddit, limit=10):
-    """
-    Reads and displays the latest posts by the authenticated user.
-    
-    Args:
-        reddit (praw.Reddit): The initialized Reddit client.
-        limit (int): The number of posts to retrieve.
-        
-    Returns:
-        list: A list of tuples containing post details (subreddit, title, id, score, url).
-    """
-    try:
-        posts = []
-        for submission in reddit.user.me().submissions.new(limit=limit):
-            posts.append((submission.subreddit.display_name, submission.title, submission.id, submission.score, submission.url))
-        return posts
-    except Exception as e:
-        logger.error(f"An error occurred while reading user posts: {e}")
-        return f"Error: {e}"
-
-
-# Function to update a post's title and content with ownership check
-def update_post(reddit, post_url, new_title, new_content):
-    submission_id = extract_submission_id(post_url)
-    if not submission_id:
-        return "Invalid URL. Please provide a valid Reddit post URL."
-
-    try:
-        submission = reddit.submission(id=submission_id)
-        if submission.author != reddit.user.me():
-            return "You are not the author of this post, so it cannot be updated."
-
-        submission.edit(new_content)
-        logger.info(f"Post updated: {new_title} (ID: {submission.id})")
-        return submission.url
-    except Exception as e:
-        logger.error(f"An error occurred while updating the post: {e}")
-        return f"Error: {e}"
-
-# Function to delete a post with ownership check
-def delete_post(reddit, post_url):
-    submission_id = extract_submission_id(post_url)
-    if not submission_id:
-        return "Invalid URL. Please provide a valid Reddit post URL."
-
-    try:
-        submission = reddit.submission(id=submission_id)
-        if submission.author != reddit.user.me():
-            return "You are not the author of this post, so it cannot be deleted."
-
-        submission.delete()
-        logger.info(f"Post deleted: {submission_id}")
-        return "Post deleted successfully!"
-    except Exception as e:
-        logger.error(f"An error occurred while deleting the post: {e}")
-        return f"Error: {e}"
-
-
 # Streamlit app interface
 st.title("Reddit Bot")
 
@@ -149,6 +21,7 @@ if uploaded_file:
         # Initialize Reddit client
         reddit = initialize_reddit()
         if reddit is None:
+            st.error("Could not initialize the Reddit client. Please check your .env file.")
             st.stop()
     else:
         st.stop()
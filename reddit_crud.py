@@ -1,47 +1,36 @@
 import os
-import praw
 import logging
-import re
-import time
 from datetime import datetime
-from threading import Thread
 import pytz
 
+from cache import cached_listing, invalidate_user
+from clients import client_pool, credentials_from_env
+from scheduler import PostScheduler
+from store import get_store
+from submission_ids import parse_submission_id
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
+_scheduler = None
+
 # Function to initialize the Reddit client using credentials from environment variables
 def initialize_reddit():
-    client_id = os.getenv("CLIENT_ID")
-    client_secret = os.getenv("CLIENT_SECRET")
-    user_agent = os.getenv("USER_AGENT")
-    username = os.getenv("REDDIT_USERNAME")
-    password = os.getenv("REDDIT_PASSWORD")
-
-    if not all([client_id, client_secret, user_agent, username, password]):
+    if not all(credentials_from_env().values()):
         logger.error("Missing one or more required environment variables.")
         return None
 
     try:
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent,
-            username=username,
-            password=password
-        )
-        reddit.validate_on_submit = True
+        reddit = client_pool.get(credentials_from_env())
         logger.info("Reddit client initialized successfully.")
         return reddit
     except Exception as e:
         logger.error(f"Error initializing Reddit client: {e}")
         return None
 
-# Function to extract submission ID from URL
+# Function to extract submission ID from a URL, short link or fullname
 def extract_submission_id(url):
-    pattern = r'reddit\.com/r/.+/comments/([a-zA-Z0-9]+)'
-    match = re.search(pattern, url)
-    return match.group(1) if match else None
+    return parse_submission_id(url, bare=False)
 
 # Function to create a new post
 def create_post(reddit, subreddit_name, title, content):
@@ -49,15 +38,41 @@ def create_post(reddit, subreddit_name, title, content):
         subreddit = reddit.subreddit(subreddit_name)
         submission = subreddit.submit(title, selftext=content)
         logger.info(f"Post created in r/{subreddit_name}: {title} (ID: {submission.id})")
+        invalidate_user(reddit)
         return submission.url
     except Exception as e:
         logger.error(f"An error occurred while creating the post: {e}")
         return f"Error: {e}"
 
+# Function to get the process-wide post scheduler
+def get_scheduler(dispatch=True):
+    """
+    Return the process-wide PostScheduler, creating it on first use.
+
+    Args:
+        dispatch (bool): Only used on first use; pass False in processes that manage
+            jobs for a dispatcher running elsewhere, such as one-shot CLI commands.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PostScheduler(
+            create_post,
+            db_path=os.getenv("SCHEDULER_DB_PATH", "scheduled_posts.db"),
+            max_workers=int(os.getenv("SCHEDULER_MAX_WORKERS", "4")),
+            dispatch=dispatch,
+        )
+    return _scheduler
+
 # Function to schedule a post
 def schedule_post(reddit, subreddit_name, title, content, scheduled_datetime):
     """
     Schedules the post to be made at the specified time in Indian Standard Time (IST).
+
+    The post is queued in the persistent scheduler and made by its dispatcher, so this
+    returns immediately.
+
+    Returns:
+        int: The scheduler job ID.
     """
 
     # Define the IST timezone
@@ -69,38 +84,91 @@ def schedule_post(reddit, subreddit_name, title, content, scheduled_datetime):
     else:
         scheduled_datetime = scheduled_datetime.astimezone(IST)
 
-    # Get current time in IST for comparison
-    current_time_ist = datetime.now(IST)
-
     # Logging for debugging: Check server and local times
     logging.info(f"Current Server Time (UTC): {datetime.now(pytz.utc)}")
-    logging.info(f"Current Time (IST): {current_time_ist}")
+    logging.info(f"Current Time (IST): {datetime.now(IST)}")
     logging.info(f"Scheduled Time (IST): {scheduled_datetime}")
 
-    # If the scheduled time is in the future, wait until that time
-    while current_time_ist < scheduled_datetime:
-        time.sleep(10)  # Sleep for 10 seconds and check the time again
-        current_time_ist = datetime.now(IST)
-
-    # Now that the scheduled time has passed, create the post
-    try:
-        post_url = create_post(reddit, subreddit_name, title, content)
-        logging.info(f"Post successfully scheduled and created! [View post]({post_url})")
-    except Exception as e:
-        logging.error(f"Error creating post: {str(e)}")
+    return get_scheduler().schedule(reddit, subreddit_name, title, content, scheduled_datetime.timestamp())
 
 
 # Function to read and display the latest posts from a subreddit
 def read_user_posts(reddit, limit=10):
-    try:
+    """
+    Read the latest posts by the authenticated user.
+
+    Args:
+        reddit (praw.Reddit): The initialized Reddit client.
+        limit (int): The number of posts to retrieve.
+
+    Returns:
+        list: A list of tuples containing post details (subreddit, title, id, score, url),
+            all plain values, or an "Error: ..." string.
+    """
+    def load_posts():
         posts = []
         for submission in reddit.user.me().submissions.new(limit=limit):
-            posts.append((submission.subreddit, submission.title, submission.id, submission.score, submission.url))
+            # display_name is already in the listing; the Subreddit object itself is lazy
+            posts.append((submission.subreddit.display_name, submission.title, submission.id, submission.score,
+                          submission.url))
         return posts
+
+    try:
+        return cached_listing(reddit, "read_user_posts", limit, load_posts)
     except Exception as e:
         logger.error(f"An error occurred while reading user posts: {e}")
         return f"Error: {e}"
 
+# Function to read one page of the user's posts after a listing cursor
+def read_user_posts_page(reddit, page_size=25, after=None):
+    """
+    Read a single page of the authenticated user's posts.
+
+    Args:
+        reddit (praw.Reddit): The initialized Reddit client.
+        page_size (int): Posts per page, at most 100.
+        after (str): Fullname of the last post on the previous page, or None for the first page.
+
+    Returns:
+        tuple: (list of (subreddit, title, id, score, url) tuples, fullname to pass as
+            after for the next page or None on the last page). On failure the first
+            element is an "Error: ..." string.
+    """
+    def load_page():
+        posts = []
+        for submission in reddit.user.me().submissions.new(limit=page_size, params={'after': after}):
+            posts.append((submission.subreddit.display_name, submission.title, submission.id, submission.score,
+                          submission.url))
+        return posts
+
+    try:
+        posts = cached_listing(reddit, f"read_user_posts:{after}", page_size, load_page)
+    except Exception as e:
+        logger.error(f"An error occurred while reading user posts: {e}")
+        return f"Error: {e}", None
+    next_after = f"t3_{posts[-1][2]}" if len(posts) == page_size else None
+    return posts, next_after
+
+# Function to stream the user's posts page by page
+def iter_user_posts(reddit, page_size=100):
+    """
+    Yield pages of the authenticated user's posts, following Reddit's after cursor.
+
+    Only one page is held in memory at a time.
+
+    Raises:
+        RuntimeError: If a page cannot be read.
+    """
+    after = None
+    while True:
+        posts, after = read_user_posts_page(reddit, page_size, after)
+        if isinstance(posts, str):
+            raise RuntimeError(posts)
+        if posts:
+            yield posts
+        if after is None:
+            return
+
 # Function to update a post's title and content with ownership check
 def update_post(reddit, post_url, new_title, new_content):
     submission_id = extract_submission_id(post_url)
@@ -114,6 +182,7 @@ def update_post(reddit, post_url, new_title, new_content):
 
         submission.edit(new_content)
         logger.info(f"Post updated: {new_title} (ID: {submission.id})")
+        invalidate_user(reddit)
         return submission.url
     except Exception as e:
         logger.error(f"An error occurred while updating the post: {e}")
@@ -132,6 +201,8 @@ def delete_post(reddit, post_url):
 
         submission.delete()
         logger.info(f"Post deleted: {submission_id}")
+        invalidate_user(reddit)
+        get_store().remove([submission_id])
         return "Post deleted successfully!"
     except Exception as e:
         logger.error(f"An error occurred while deleting the post: {e}")
@@ -0,0 +1,301 @@
+import os
+import heapq
+import uuid
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Thread
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+# Seconds between a dispatcher's heartbeats. A dispatcher silent for HEARTBEAT_TIMEOUTS
+# intervals counts as gone, and the jobs it was running as interrupted.
+HEARTBEAT_INTERVAL = float(os.getenv("SCHEDULER_HEARTBEAT_INTERVAL", "10"))
+HEARTBEAT_TIMEOUTS = 3
+
+
+class PostScheduler:
+    """
+    Scheduler for posts, persisted to SQLite.
+
+    Due jobs are kept in a heap ordered by run time and the dispatcher thread sleeps
+    until the earliest one is due. Posting itself runs on a bounded worker pool.
+
+    Several processes may dispatch from one database, e.g. the dashboard and the CLI
+    daemon. A job is claimed by moving it from pending to running in a single UPDATE
+    that also checks it is still due, so only one of them posts it, a job cancelled
+    elsewhere is never posted and one rescheduled elsewhere waits for its new time.
+    Each dispatcher records itself as the owner of the jobs it claims and sends a
+    heartbeat; only jobs whose owner has stopped are marked interrupted.
+
+    Args:
+        post_func (callable): Called as post_func(reddit, subreddit_name, title, content)
+            and returns the post URL or an "Error: ..." string.
+        db_path (str): Path of the SQLite file holding the jobs.
+        max_workers (int): Maximum number of posts submitted concurrently.
+        dispatch (bool): Run the dispatcher. Processes that only queue, list or cancel jobs
+            for a dispatcher running elsewhere pass False, so they neither post nor mark
+            that dispatcher's running jobs as interrupted.
+        heartbeat_interval (float): Seconds between this dispatcher's heartbeats.
+    """
+
+    def __init__(self, post_func, db_path="scheduled_posts.db", max_workers=4, dispatch=True,
+                 heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.post_func = post_func
+        self.owner = uuid.uuid4().hex
+        self.heartbeat_interval = heartbeat_interval
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                subreddit TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                run_at REAL NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_run_at ON jobs (status, run_at)")
+        # Databases created before jobs recorded their dispatcher
+        if "owner" not in {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dispatchers (id TEXT PRIMARY KEY, heartbeat_at REAL NOT NULL)")
+        self._conn.commit()
+        self._cond = Condition()
+        self._heap = []
+        self._pending = {}
+        self._clients = {}
+        self._parked = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="post-scheduler")
+        self._dispatcher = None
+        if dispatch:
+            self._heartbeat()
+            self._recover()
+            self._dispatcher = Thread(target=self._dispatch_loop, name="post-scheduler-dispatch", daemon=True)
+            self._dispatcher.start()
+            Thread(target=self._heartbeat_loop, name="post-scheduler-heartbeat", daemon=True).start()
+
+    def register_client(self, reddit):
+        """Make a Reddit client available for jobs belonging to its account."""
+        username = reddit.config.username
+        with self._cond:
+            self._clients[username] = reddit
+            for entry in self._parked.pop(username, []):
+                heapq.heappush(self._heap, entry)
+            self._cond.notify()
+
+    def schedule(self, reddit, subreddit_name, title, content, run_at):
+        """
+        Queue a post.
+
+        Args:
+            run_at (float): UTC epoch seconds at which the post should be made.
+
+        Returns:
+            int: The job ID.
+        """
+        username = reddit.config.username
+        with self._cond:
+            if username not in self._clients:
+                self.register_client(reddit)
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (username, subreddit, title, content, run_at, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (username, subreddit_name, title, content, run_at, PENDING, time.time()),
+            )
+            self._conn.commit()
+            job_id = cursor.lastrowid
+            self._push(job_id, run_at)
+        logger.info(f"Scheduled job {job_id} for r/{subreddit_name} at {run_at}")
+        return job_id
+
+    def list_jobs(self, username=None, status=None):
+        """Return jobs as dictionaries, ordered by run time."""
+        query = "SELECT id, username, subreddit, title, run_at, status, result FROM jobs"
+        clauses, params = [], []
+        if username is not None:
+            clauses.append("username = ?")
+            params.append(username)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY run_at"
+        with self._cond:
+            rows = self._conn.execute(query, params).fetchall()
+        columns = ["id", "username", "subreddit", "title", "run_at", "status", "result"]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def cancel(self, job_id):
+        """Cancel a pending job. Returns True if the job was pending."""
+        with self._cond:
+            self._pending.pop(job_id, None)
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (CANCELLED, job_id, PENDING))
+            self._conn.commit()
+            self._cond.notify()
+        if not cursor.rowcount:
+            return False
+        logger.info(f"Cancelled job {job_id}")
+        return True
+
+    def reschedule(self, job_id, run_at):
+        """Move a pending job to a new UTC epoch time. Returns True if the job was pending."""
+        with self._cond:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET run_at = ? WHERE id = ? AND status = ?", (run_at, job_id, PENDING))
+            self._conn.commit()
+            if not cursor.rowcount:
+                return False
+            self._push(job_id, run_at)
+        logger.info(f"Rescheduled job {job_id} to {run_at}")
+        return True
+
+    def refresh(self):
+        """
+        Pick up jobs queued, cancelled or rescheduled by other processes sharing the database.
+
+        Returns:
+            int: The number of jobs newly queued or moved.
+        """
+        with self._cond:
+            rows = dict(self._conn.execute("SELECT id, run_at FROM jobs WHERE status = ?", (PENDING,)).fetchall())
+            for job_id in [job_id for job_id in self._pending if job_id not in rows]:
+                del self._pending[job_id]
+            changed = [(job_id, run_at) for job_id, run_at in rows.items() if self._pending.get(job_id) != run_at]
+            for job_id, run_at in changed:
+                self._push(job_id, run_at)
+        if changed:
+            logger.info(f"Picked up {len(changed)} scheduled post(s) from the database")
+        return len(changed)
+
+    def _recover(self):
+        self._interrupt_orphans()
+        with self._cond:
+            rows = self._conn.execute("SELECT id, run_at FROM jobs WHERE status = ?", (PENDING,)).fetchall()
+            for job_id, run_at in rows:
+                self._push(job_id, run_at)
+        if rows:
+            logger.info(f"Recovered {len(rows)} pending scheduled post(s)")
+
+    def _heartbeat(self):
+        with self._cond:
+            self._conn.execute("INSERT OR REPLACE INTO dispatchers (id, heartbeat_at) VALUES (?, ?)",
+                               (self.owner, time.time()))
+            self._conn.commit()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            self._heartbeat()
+            self._interrupt_orphans()
+
+    def _interrupt_orphans(self):
+        # Jobs caught mid-post by a dispatcher that stopped may or may not have been submitted,
+        # so don't retry them. Jobs of dispatchers still sending heartbeats are left alone.
+        cutoff = time.time() - HEARTBEAT_TIMEOUTS * self.heartbeat_interval
+        with self._cond:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ? AND (owner IS NULL OR owner NOT IN "
+                "(SELECT id FROM dispatchers WHERE heartbeat_at >= ?))", (INTERRUPTED, RUNNING, cutoff))
+            self._conn.execute("DELETE FROM dispatchers WHERE heartbeat_at < ?", (cutoff,))
+            self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"Marked {cursor.rowcount} scheduled post(s) of stopped dispatchers as interrupted")
+
+    def _push(self, job_id, run_at):
+        # Superseded heap entries are skipped lazily by comparing against _pending
+        self._pending[job_id] = run_at
+        heapq.heappush(self._heap, (run_at, job_id))
+        self._cond.notify()
+
+    def _claim(self, job_id):
+        # Atomic across processes: only one dispatcher sees the row still pending and due
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, owner = ? WHERE id = ? AND status = ? AND run_at <= ?",
+            (RUNNING, self.owner, job_id, PENDING, time.time()))
+        self._conn.commit()
+        if cursor.rowcount == 1:
+            return True
+        # Rescheduled by another process since it was read; wait for the new time
+        row = self._conn.execute("SELECT run_at FROM jobs WHERE id = ? AND status = ?", (job_id, PENDING)).fetchone()
+        if row is not None:
+            self._push(job_id, row[0])
+        return False
+
+    def _set_status(self, job_id, status, result=None):
+        self._conn.execute("UPDATE jobs SET status = ?, result = ? WHERE id = ?", (status, result, job_id))
+        self._conn.commit()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                job = self._next_due_job()
+                if job is None:
+                    continue
+                if not self._claim(job[0]):
+                    logger.info(f"Skipping job {job[0]}: claimed, cancelled or rescheduled by another process")
+                    continue
+            self._executor.submit(self._run_job, *job)
+
+    def _next_due_job(self):
+        # Called with the condition held; waits until a job is due or the heap changes
+        while self._heap:
+            run_at, job_id = self._heap[0]
+            if self._pending.get(job_id) != run_at:
+                heapq.heappop(self._heap)
+                continue
+            delay = run_at - time.time()
+            if delay > 0:
+                self._cond.wait(timeout=delay)
+                return None
+            username, subreddit_name, title, content, status, stored_run_at = self._conn.execute(
+                "SELECT username, subreddit, title, content, status, run_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            heapq.heappop(self._heap)
+            if status != PENDING:
+                # Cancelled or taken by another process since the last refresh()
+                del self._pending[job_id]
+                continue
+            if stored_run_at != run_at:
+                # Rescheduled by another process since the last refresh()
+                self._push(job_id, stored_run_at)
+                continue
+            reddit = self._clients.get(username)
+            if reddit is None:
+                # Park the job until register_client() supplies a client for this account
+                self._parked.setdefault(username, []).append((run_at, job_id))
+                continue
+            del self._pending[job_id]
+            return job_id, reddit, subreddit_name, title, content
+        self._cond.wait()
+        return None
+
+    def _run_job(self, job_id, reddit, subreddit_name, title, content):
+        try:
+            result = self.post_func(reddit, subreddit_name, title, content)
+        except Exception as e:
+            result = f"Error: {e}"
+        status = FAILED if result.startswith("Error") else DONE
+        with self._cond:
+            self._set_status(job_id, status, result)
+        if status == DONE:
+            logger.info(f"Scheduled job {job_id} posted: {result}")
+        else:
+            logger.error(f"Scheduled job {job_id} failed: {result}")
@@ -0,0 +1,502 @@
+import os
+import time
+import logging
+import sqlite3
+from threading import RLock
+
+from aggregates import AGGREGATE_SCHEMA, PERIODS, RATIO_BUCKET_WIDTH, REBUILD_AGGREGATES
+from records import CommentRecord, SubmissionRecord, submission_to_record
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Reddit's /api/info accepts up to 100 fullnames per request
+INFO_BATCH_SIZE = 100
+
+# Posts younger than this keep getting metric snapshots on every sync
+REFRESH_WINDOW = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    subreddit TEXT NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    created_utc REAL NOT NULL,
+    score INTEGER NOT NULL,
+    num_comments INTEGER NOT NULL,
+    upvote_ratio REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_username_created ON posts (username, created_utc);
+CREATE INDEX IF NOT EXISTS idx_posts_subreddit ON posts (subreddit);
+
+CREATE TABLE IF NOT EXISTS metric_snapshots (
+    post_id TEXT NOT NULL,
+    captured_at REAL NOT NULL,
+    score INTEGER NOT NULL,
+    num_comments INTEGER NOT NULL,
+    upvote_ratio REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_post_captured ON metric_snapshots (post_id, captured_at);
+
+CREATE TABLE IF NOT EXISTS account_snapshots (
+    username TEXT NOT NULL,
+    captured_at REAL NOT NULL,
+    link_karma INTEGER NOT NULL,
+    comment_karma INTEGER NOT NULL,
+    followers INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_account_snapshots_user_captured ON account_snapshots (username, captured_at);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    post_id TEXT NOT NULL,
+    parent_id TEXT NOT NULL,
+    author TEXT,
+    body TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created_utc REAL NOT NULL,
+    depth INTEGER NOT NULL,
+    sentiment REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_comments_post ON comments (post_id);
+CREATE INDEX IF NOT EXISTS idx_comments_author ON comments (author);
+
+CREATE TABLE IF NOT EXISTS comment_sync (
+    post_id TEXT PRIMARY KEY,
+    num_comments INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    username TEXT PRIMARY KEY,
+    last_sync REAL NOT NULL
+);
+"""
+
+RECORD_COLUMNS = "id, title, score, num_comments, upvote_ratio, created_utc, url, subreddit"
+
+
+class PostStore:
+    """
+    Local SQLite store of an account's submissions and their metric snapshots.
+
+    Args:
+        db_path (str): Path of the SQLite file.
+    """
+
+    def __init__(self, db_path="posts.db"):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.executescript(AGGREGATE_SCHEMA)
+        self._lock = RLock()
+        # Stores written before the aggregate triggers existed are backfilled once
+        posts, aggregated = self._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM posts), (SELECT COALESCE(SUM(posts), 0) FROM daily_post_aggregates)"
+        ).fetchone()
+        if posts != aggregated:
+            self.rebuild_aggregates()
+
+    def sync(self, reddit, min_interval=60, refresh_window=REFRESH_WINDOW):
+        """
+        Pull new submissions and refresh metrics for recent ones.
+
+        The listing is walked newest first and stops at the first post already stored,
+        so only items newer than the last seen one are downloaded. Posts created within
+        refresh_window seconds are then re-read in batched info() calls and get a new
+        metric snapshot.
+
+        Args:
+            reddit (praw.Reddit): The initialized Reddit client.
+            min_interval (float): Skip the sync if the last one was less than this many
+                seconds ago.
+            refresh_window (float): Age in seconds below which post metrics are refreshed.
+
+        Returns:
+            int: The number of new posts stored, or 0 if the sync was skipped.
+        """
+        username = reddit.config.username
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT last_sync FROM sync_state WHERE username = ?", (username,)).fetchone()
+            if row and now - row[0] < min_interval:
+                return 0
+            newest = self._conn.execute(
+                "SELECT id FROM posts WHERE username = ? ORDER BY created_utc DESC LIMIT 1", (username,)
+            ).fetchone()
+            recent_ids = [post_id for (post_id,) in self._conn.execute(
+                "SELECT id FROM posts WHERE username = ? AND created_utc >= ?", (username, now - refresh_window)
+            )]
+
+        last_seen_id = newest[0] if newest else None
+        new_records = []
+        for submission in reddit.user.me().submissions.new(limit=None):
+            if submission.id == last_seen_id:
+                break
+            new_records.append(submission_to_record(submission))
+
+        refreshed = []
+        fullnames = [f"t3_{post_id}" for post_id in recent_ids]
+        for start in range(0, len(fullnames), INFO_BATCH_SIZE):
+            for submission in reddit.info(fullnames=fullnames[start:start + INFO_BATCH_SIZE]):
+                refreshed.append(submission_to_record(submission))
+
+        with self._lock:
+            self.upsert(username, new_records + refreshed, captured_at=now)
+            self._conn.execute(
+                "INSERT INTO sync_state (username, last_sync) VALUES (?, ?) "
+                "ON CONFLICT (username) DO UPDATE SET last_sync = excluded.last_sync",
+                (username, now),
+            )
+            self._conn.commit()
+        logger.info(f"Synced u/{username}: {len(new_records)} new, {len(refreshed)} refreshed")
+        return len(new_records)
+
+    def upsert(self, username, records, captured_at=None, snapshot=True):
+        """Store or update SubmissionRecords and, unless snapshot is False, append a metric snapshot for each."""
+        captured_at = captured_at or time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO posts (id, username, subreddit, title, url, created_utc, score, num_comments, "
+                "upvote_ratio, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET title = excluded.title, score = excluded.score, "
+                "num_comments = excluded.num_comments, upvote_ratio = excluded.upvote_ratio, "
+                "updated_at = excluded.updated_at",
+                [(record.id, username, record.subreddit, record.title, record.url, record.created_utc,
+                  record.score, record.num_comments, record.upvote_ratio, captured_at) for record in records],
+            )
+            if snapshot:
+                self._conn.executemany(
+                    "INSERT INTO metric_snapshots (post_id, captured_at, score, num_comments, upvote_ratio) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(record.id, captured_at, record.score, record.num_comments, record.upvote_ratio)
+                     for record in records],
+                )
+            self._conn.commit()
+
+    def remove(self, post_ids):
+        """Drop deleted posts, their snapshots and their comments."""
+        params = [(post_id,) for post_id in post_ids]
+        with self._lock:
+            self._conn.executemany("DELETE FROM posts WHERE id = ?", params)
+            self._conn.executemany("DELETE FROM metric_snapshots WHERE post_id = ?", params)
+            self._conn.executemany("DELETE FROM comments WHERE post_id = ?", params)
+            self._conn.executemany("DELETE FROM comment_sync WHERE post_id = ?", params)
+            self._conn.commit()
+
+    def submissions(self, username, limit=None, since=None, subreddit=None, offset=0):
+        """
+        Query stored submissions, newest first.
+
+        Args:
+            username (str): The account to read.
+            limit (int): Maximum number of posts, or None for all.
+            since (float): Only posts created at or after this UTC epoch time.
+            subreddit (str): Only posts in this subreddit.
+            offset (int): Number of matching posts to skip, for paging.
+
+        Returns:
+            list: A list of SubmissionRecord tuples.
+        """
+        query = f"SELECT {RECORD_COLUMNS} FROM posts WHERE username = ?"
+        params = [username]
+        if since is not None:
+            query += " AND created_utc >= ?"
+            params.append(since)
+        if subreddit is not None:
+            query += " AND subreddit = ?"
+            params.append(subreddit)
+        query += " ORDER BY created_utc DESC"
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else limit, offset])
+        with self._lock:
+            return [SubmissionRecord(*row) for row in self._conn.execute(query, params)]
+
+    def read_user_posts(self, username, limit=10, offset=0):
+        """Stored posts in the (subreddit, title, id, score, url) shape of reddit_crud.read_user_posts."""
+        return [(record.subreddit, record.title, record.id, record.score, record.url)
+                for record in self.submissions(username, limit=limit, offset=offset)]
+
+    def metric_history(self, post_id):
+        """Return (captured_at, score, num_comments, upvote_ratio) snapshots for a post, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT captured_at, score, num_comments, upvote_ratio FROM metric_snapshots "
+                "WHERE post_id = ? ORDER BY captured_at", (post_id,)
+            ).fetchall()
+
+    def metric_snapshots(self, username):
+        """Return (post_id, captured_at, score, num_comments, upvote_ratio) snapshots of all an account's posts."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT s.post_id, s.captured_at, s.score, s.num_comments, s.upvote_ratio FROM metric_snapshots s "
+                "JOIN posts p ON p.id = s.post_id WHERE p.username = ? ORDER BY s.post_id, s.captured_at",
+                (username,)
+            ).fetchall()
+
+    def merge_snapshots(self, metric_rows=(), account_rows=(), username=None):
+        """
+        Insert metric and account snapshots that are not stored yet, e.g. from an imported dataset.
+
+        Args:
+            metric_rows: (post_id, captured_at, score, num_comments, upvote_ratio) rows.
+            account_rows: (captured_at, link_karma, comment_karma, followers) rows for username.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO metric_snapshots (post_id, captured_at, score, num_comments, upvote_ratio) "
+                "SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS "
+                "(SELECT 1 FROM metric_snapshots WHERE post_id = ? AND captured_at = ?)",
+                [(*row, row[0], row[1]) for row in metric_rows],
+            )
+            self._conn.executemany(
+                "INSERT INTO account_snapshots (username, captured_at, link_karma, comment_karma, followers) "
+                "SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS "
+                "(SELECT 1 FROM account_snapshots WHERE username = ? AND captured_at = ?)",
+                [(username, *row, username, row[0]) for row in account_rows],
+            )
+            self._conn.commit()
+
+    def record_account_snapshot(self, username, link_karma, comment_karma, followers=None, captured_at=None):
+        """Append a karma and follower sample for an account."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO account_snapshots (username, captured_at, link_karma, comment_karma, followers) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (username, captured_at or time.time(), link_karma, comment_karma, followers),
+            )
+            self._conn.commit()
+
+    def account_history(self, username, since=None):
+        """Return (captured_at, link_karma, comment_karma, followers) samples, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT captured_at, link_karma, comment_karma, followers FROM account_snapshots "
+                "WHERE username = ? AND captured_at >= ? ORDER BY captured_at", (username, since or 0)
+            ).fetchall()
+
+    def engagement_series(self, username, bucket_seconds=3600, since=None):
+        """
+        Aggregate an account's metric snapshots into time buckets.
+
+        Within a bucket each post contributes its highest score and comment count, so a post
+        sampled several times in one bucket is not counted twice.
+
+        Returns:
+            list: (bucket_start, total_score, total_comments, mean_upvote_ratio) rows, oldest first.
+        """
+        with self._lock:
+            return self._conn.execute(
+                """
+                SELECT bucket, SUM(score), SUM(num_comments), AVG(upvote_ratio) FROM (
+                    SELECT CAST(s.captured_at / ? AS INTEGER) * ? AS bucket, MAX(s.score) AS score,
+                           MAX(s.num_comments) AS num_comments, AVG(s.upvote_ratio) AS upvote_ratio
+                    FROM metric_snapshots s JOIN posts p ON p.id = s.post_id
+                    WHERE p.username = ? AND s.captured_at >= ?
+                    GROUP BY s.post_id, bucket
+                ) GROUP BY bucket ORDER BY bucket
+                """,
+                (bucket_seconds, bucket_seconds, username, since or 0),
+            ).fetchall()
+
+    def post_activity(self, usernames, period='day', since=None):
+        """
+        Read post counts and totals per period and subreddit from the materialized aggregates.
+
+        Args:
+            usernames (list): The accounts to include.
+            period (str): 'day' or 'week' (weeks start on Monday).
+            since (float): Only periods starting at or after this UTC epoch time.
+
+        Returns:
+            list: (period_start, subreddit, posts, total_score, total_comments, mean_upvote_ratio)
+                rows, oldest first.
+        """
+        seconds, offset = PERIODS[period]
+        placeholders = ", ".join("?" * len(usernames))
+        with self._lock:
+            return self._conn.execute(
+                f"""
+                SELECT (day - ?) / ? * ? + ? AS period_start, subreddit, SUM(posts), SUM(total_score),
+                       SUM(total_comments), SUM(upvote_ratio_sum) / SUM(posts)
+                FROM daily_post_aggregates
+                WHERE username IN ({placeholders}) AND day >= ?
+                GROUP BY period_start, subreddit ORDER BY period_start, subreddit
+                """,
+                (offset, seconds, seconds, offset, *usernames, since or 0),
+            ).fetchall()
+
+    def upvote_ratio_distribution(self, usernames):
+        """Return (bucket_start, posts) rows of the upvote ratio histogram, one per non-empty bucket."""
+        placeholders = ", ".join("?" * len(usernames))
+        with self._lock:
+            return [(bucket * RATIO_BUCKET_WIDTH, posts) for bucket, posts in self._conn.execute(
+                f"SELECT bucket, SUM(posts) FROM upvote_ratio_histogram WHERE username IN ({placeholders}) "
+                "GROUP BY bucket HAVING SUM(posts) > 0 ORDER BY bucket", usernames
+            )]
+
+    def data_versions(self, usernames):
+        """
+        Return a (posts_version, snapshots_version, comments_version) tuple per account.
+
+        The counters are bumped by triggers whenever an account's posts, snapshots or
+        ingested comments change, so they make cache keys for anything derived from them.
+        """
+        with self._lock:
+            versions = dict((row[0], row[1:]) for row in self._conn.execute(
+                "SELECT username, posts_version, snapshots_version, comments_version FROM aggregate_versions"
+            ))
+        return tuple(versions.get(username, (0, 0, 0)) for username in usernames)
+
+    def rebuild_aggregates(self):
+        """Recompute the materialized aggregates from the posts table."""
+        with self._lock:
+            self._conn.executescript(REBUILD_AGGREGATES)
+            self._conn.commit()
+        logger.info("Rebuilt post aggregates")
+
+    def upsert_comments(self, records):
+        """Store or update CommentRecords."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO comments (id, post_id, parent_id, author, body, score, created_utc, depth, sentiment) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET body = excluded.body, score = excluded.score, "
+                "sentiment = excluded.sentiment",
+                records,
+            )
+            self._conn.commit()
+
+    def comment_threads_to_sync(self, username):
+        """
+        Return (post_id, num_comments) for posts whose comment count changed since their
+        comments were last ingested, including posts never ingested that have comments.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT p.id, p.num_comments FROM posts p LEFT JOIN comment_sync c ON c.post_id = p.id "
+                "WHERE p.username = ? AND p.num_comments != COALESCE(c.num_comments, 0) "
+                "ORDER BY p.created_utc DESC", (username,)
+            ).fetchall()
+
+    def mark_comments_synced(self, post_id, num_comments, synced_at=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO comment_sync (post_id, num_comments, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (post_id) DO UPDATE SET num_comments = excluded.num_comments, "
+                "synced_at = excluded.synced_at",
+                (post_id, num_comments, synced_at or time.time()),
+            )
+            self._conn.commit()
+
+    def comments(self, post_id):
+        """Return a post's stored comments as CommentRecords, oldest first."""
+        with self._lock:
+            return [CommentRecord(*row) for row in self._conn.execute(
+                "SELECT id, post_id, parent_id, author, body, score, created_utc, depth, sentiment FROM comments "
+                "WHERE post_id = ? ORDER BY created_utc", (post_id,)
+            )]
+
+    def comment_depths(self, username, post_id=None):
+        """Return (depth, comment count) rows across an account's posts, or for one post."""
+        query, params = self._comment_scope(username, post_id)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT c.depth, COUNT(*) FROM comments c {query} GROUP BY c.depth ORDER BY c.depth", params
+            ).fetchall()
+
+    def top_commenters(self, username, limit=20, post_id=None):
+        """
+        Return (author, comments, total score, mean sentiment) rows, most active first.
+
+        The account's own replies are excluded.
+        """
+        query, params = self._comment_scope(username, post_id)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT c.author, COUNT(*) AS comments, SUM(c.score), AVG(c.sentiment) FROM comments c {query} "
+                "AND c.author IS NOT NULL AND c.author != ? GROUP BY c.author ORDER BY comments DESC LIMIT ?",
+                (*params, username, limit),
+            ).fetchall()
+
+    def response_latencies(self, username, post_id=None):
+        """
+        Return (depth, seconds) for every comment: the time since the post for top-level
+        comments, and since the parent comment for replies.
+        """
+        query, params = self._comment_scope(username, post_id)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT c.depth, c.created_utc - COALESCE(parent.created_utc, p.created_utc) FROM comments c "
+                # Matching parent.id itself, not an expression of it, lets the join use the primary key
+                "LEFT JOIN comments parent ON SUBSTR(c.parent_id, 1, 3) = 't1_' AND parent.id = SUBSTR(c.parent_id, 4) "
+                f"{query}", params
+            ).fetchall()
+
+    def sentiment_by_post(self, username):
+        """Return (post_id, title, comments, mean sentiment) rows for posts with ingested comments."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT p.id, p.title, COUNT(*), AVG(c.sentiment) FROM comments c JOIN posts p ON p.id = c.post_id "
+                "WHERE p.username = ? GROUP BY p.id ORDER BY p.created_utc DESC", (username,)
+            ).fetchall()
+
+    def _comment_scope(self, username, post_id):
+        # JOIN and WHERE clause restricting comments to an account's posts, optionally one post
+        query = "JOIN posts p ON p.id = c.post_id WHERE p.username = ?"
+        params = [username]
+        if post_id is not None:
+            query += " AND c.post_id = ?"
+            params.append(post_id)
+        return query, params
+
+    def post_ages(self, username):
+        """Return (id, created_utc) for all of an account's stored posts."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, created_utc FROM posts WHERE username = ?", (username,)
+            ).fetchall()
+
+    def compact(self, raw_window=7 * 24 * 3600, bucket_seconds=3600, retention=365 * 24 * 3600):
+        """
+        Downsample and expire snapshots.
+
+        Post snapshots older than raw_window are merged into one row per post and bucket;
+        post and account snapshots older than retention are deleted.
+        """
+        now = time.time()
+        cutoff = now - raw_window
+        with self._lock:
+            self._conn.execute(
+                "CREATE TEMP TABLE rolled AS SELECT post_id, CAST(captured_at / ? AS INTEGER) * ? AS captured_at, "
+                "MAX(score) AS score, MAX(num_comments) AS num_comments, AVG(upvote_ratio) AS upvote_ratio "
+                "FROM metric_snapshots WHERE captured_at < ? GROUP BY post_id, CAST(captured_at / ? AS INTEGER)",
+                (bucket_seconds, bucket_seconds, cutoff, bucket_seconds),
+            )
+            self._conn.execute("DELETE FROM metric_snapshots WHERE captured_at < ?", (cutoff,))
+            self._conn.execute("INSERT INTO metric_snapshots SELECT * FROM rolled")
+            self._conn.execute("DROP TABLE rolled")
+            self._conn.execute("DELETE FROM metric_snapshots WHERE captured_at < ?", (now - retention,))
+            self._conn.execute("DELETE FROM account_snapshots WHERE captured_at < ?", (now - retention,))
+            self._conn.commit()
+
+
+_store = None
+
+
+# Function to get the process-wide post store
+def get_store():
+    global _store
+    if _store is None:
+        _store = PostStore(os.getenv("POST_STORE_PATH", "posts.db"))
+    return _store
+
+
+# Function to sync an account into the local store and read its latest posts back
+def load_stored_submissions(reddit, limit=None):
+    store = get_store()
+    store.sync(reddit)
+    return store.submissions(reddit.config.username, limit=limit)
@@ -0,0 +1,71 @@
+import re
+
+# Submission IDs are base36 and fit in 64 bits, so at most 13 characters
+ID = r"[0-9a-z]{1,13}"
+
+# One precompiled pattern for every form a submission can be given in. Exactly one named
+# group takes part in a match, so match.lastindex points straight at the ID. Only URLs may
+# carry a trailing path, query or fragment; fullnames and bare IDs must be the whole value.
+SUBMISSION_PATTERN = re.compile(
+    rf"""
+    \s*(?:
+        # Fullname: t3_abc123
+        t3_(?P<fullname>{ID})
+        # reddit.com on any subdomain (www., old., new., np., m.), via a subreddit, a user
+        # profile or neither: /r/sub/comments/abc123, /user/name/comments/abc123, /comments/abc123
+      | (?:https?://)?(?:[a-z0-9-]+\.)?reddit\.com/(?:(?:r|u|user)/[^/\s]+/)?comments/(?P<comments>{ID})
+        (?:[/?\#]\S*)?
+        # Short link: redd.it/abc123
+      | (?:https?://)?(?:www\.)?redd\.it/(?P<short>{ID})(?:[/?\#]\S*)?
+        # Bare ID: abc123
+      | (?P<bare>{ID})
+    )\s*
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+# Function to turn a post URL, fullname or bare ID into a submission ID
+def parse_submission_id(value, bare=True):
+    """
+    Resolve any common way of referring to a submission to its ID.
+
+    Accepts www., old., new., np. and m. reddit.com URLs through a subreddit, a user
+    profile or /comments/ directly, redd.it short links, t3_ fullnames and bare IDs.
+
+    Args:
+        value (str): The URL, fullname or ID.
+        bare (bool): Accept bare IDs. Pass False where a URL is asked for, since any
+            short word has the shape of an ID.
+
+    Returns:
+        str: The lowercase submission ID, or None if the value is not recognised.
+    """
+    match = SUBMISSION_PATTERN.fullmatch(value)
+    if match is None or (not bare and match.lastgroup == "bare"):
+        return None
+    return match.group(match.lastindex).lower()
+
+
+# Function to resolve many values in one pass
+def parse_submission_ids(values):
+    """
+    Resolve a list of post URLs, fullnames or IDs, e.g. from a pasted list or a file.
+
+    Args:
+        values: An iterable of strings, or one string with a value per line. Blank
+            lines are skipped.
+
+    Returns:
+        tuple: (dict of each distinct input to its submission ID, in input order, and a
+            list of the inputs that could not be parsed).
+    """
+    values = values.splitlines() if isinstance(values, str) else list(values)
+    resolved, invalid = {}, []
+    # A repeated value is parsed again but keeps its first position; blank lines never match
+    for value, match in zip(values, map(SUBMISSION_PATTERN.fullmatch, values)):
+        if match:
+            resolved[value] = match[match.lastindex].lower()
+        elif value and not value.isspace():
+            invalid.append(value)
+    return resolved, invalid
@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+
+import praw
+import pytest
+
+# The modules live at the repository root, and the store and scheduler default to files in the
+# working directory, so point both at a scratch directory before anything imports them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tmp_dir = tempfile.mkdtemp(prefix="reddit-tests-")
+os.environ.setdefault("POST_STORE_PATH", os.path.join(_tmp_dir, "posts.db"))
+os.environ.setdefault("SCHEDULER_DB_PATH", os.path.join(_tmp_dir, "scheduled_posts.db"))
+
+import store
+from cache import listing_cache
+from transport import FakeRedditServer, FakeSession
+
+CASSETTES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes")
+
+
+# Function to build a real praw client for username on top of the given HTTP session
+def reddit_client(username, session):
+    reddit = praw.Reddit(client_id="test", client_secret="test", user_agent="reddit-crud-tests/1.0",
+                         username=username, password="test", requestor_kwargs={'session': session})
+    reddit.validate_on_submit = True
+    return reddit
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    # Each test gets an empty post store and listing cache
+    monkeypatch.setattr(store, "_store", store.PostStore(str(tmp_path / "posts.db")))
+    listing_cache.invalidate()
+    yield
+    listing_cache.invalidate()
+
+
+@pytest.fixture
+def server():
+    return FakeRedditServer()
+
+
+@pytest.fixture
+def client_for(server):
+    """Return a factory of praw clients for different accounts on one fake server."""
+    return lambda username: reddit_client(username, FakeSession(server))
+
+
+@pytest.fixture
+def reddit(client_for):
+    return client_for("alice")
@@ -0,0 +1,62 @@
+from store import get_store
+from records import SubmissionRecord
+
+DAY = 86400
+START = 1735689600
+
+
+def record(post_id, score, upvote_ratio, day, subreddit="python", num_comments=0, title=None):
+    return SubmissionRecord(post_id, title or f"Post {post_id}", score, num_comments, upvote_ratio,
+                            START + day * DAY + 3600, f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/",
+                            subreddit)
+
+
+def aggregates(store):
+    def rounded(rows):
+        return [tuple(round(value, 9) if isinstance(value, float) else value for value in row) for row in rows]
+
+    return {
+        'day': rounded(store.post_activity(["alice", "bob"], period='day')),
+        'week': rounded(store.post_activity(["alice", "bob"], period='week')),
+        'alice_day': rounded(store.post_activity(["alice"], period='day')),
+        'ratios': rounded(store.upvote_ratio_distribution(["alice", "bob"])),
+        'alice_ratios': rounded(store.upvote_ratio_distribution(["alice"])),
+    }
+
+
+def test_triggers_match_a_full_rebuild_after_inserts_updates_and_deletes():
+    store = get_store()
+    store.upsert("alice", [record("a1", 10, 0.91, 0), record("a2", 5, 0.55, 0, "learnpython", 3),
+                           record("a3", 0, 1.0, 1), record("a4", 7, 0.05, 9, num_comments=2)])
+    store.upsert("bob", [record("b1", 100, 0.77, 0), record("b2", 1, 0.5, 2, "learnpython")])
+
+    # Scores, comments, ratios (across histogram buckets) and titles change; some posts go away
+    store.upsert("alice", [record("a1", 25, 0.42, 0, num_comments=4), record("a3", 0, 1.0, 1, title="Renamed")])
+    store.upsert("bob", [record("b1", 90, 0.99, 0)])
+    store.remove(["a2", "b2"])
+    store.upsert("alice", [record("a5", 3, 0.66, 1, "learnpython")])
+
+    incremental = aggregates(store)
+    store.rebuild_aggregates()
+
+    assert incremental == aggregates(store)
+    assert incremental['alice_day'] == [
+        (START, "python", 1, 25, 4, 0.42),
+        (START + DAY, "learnpython", 1, 3, 0, 0.66),
+        (START + DAY, "python", 1, 0, 0, 1.0),
+        (START + 9 * DAY, "python", 1, 7, 2, 0.05),
+    ]
+
+
+def test_data_versions_change_with_posts_and_snapshots():
+    store = get_store()
+    before = store.data_versions(["alice"])
+
+    store.upsert("alice", [record("a1", 10, 0.9, 0)], snapshot=False)
+    after_post = store.data_versions(["alice"])
+    store.upsert("alice", [record("a1", 10, 0.9, 0)])
+    after_snapshot = store.data_versions(["alice"])
+
+    assert before == ((0, 0, 0),)
+    assert after_post[0][0] > before[0][0]
+    assert after_snapshot[0][1] > after_post[0][1]
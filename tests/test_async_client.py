@@ -0,0 +1,49 @@
+import asyncio
+
+import async_client
+import reddit_crud
+from store import get_store
+
+
+def test_coroutines_share_the_crud_core_and_its_cache_invalidation(reddit):
+    assert asyncio.run(async_client.read_user_posts(reddit)) == []
+
+    url = asyncio.run(async_client.create_post(reddit, "python", "Hello", "Body"))
+
+    posts = asyncio.run(async_client.read_user_posts(reddit))
+    assert posts == [("python", "Hello", reddit_crud.extract_submission_id(url), 1, url)]
+
+
+def test_update_posts_checks_ownership_of_each_post(reddit, client_for, server):
+    own = [reddit_crud.create_post(reddit, "python", f"Post {index}", "Body") for index in range(3)]
+    foreign = reddit_crud.create_post(client_for("bob"), "python", "Bob's", "Body")
+
+    results = async_client.run_sync(async_client.update_posts(
+        reddit, [(url, "Title", "Edited") for url in own + [foreign, "foo/bar"]]))
+
+    assert results == own + ["You are not the author of this post, so it cannot be updated.",
+                             "Invalid URL. Please provide a valid Reddit post URL."]
+    assert [server.submissions[reddit_crud.extract_submission_id(url)]['selftext'] for url in own] == ["Edited"] * 3
+    assert server.submissions[reddit_crud.extract_submission_id(foreign)]['selftext'] == "Body"
+
+
+def test_delete_posts_removes_stored_copies(reddit, server):
+    urls = [reddit_crud.create_post(reddit, "python", f"Post {index}", "Body") for index in range(3)]
+    get_store().sync(reddit, min_interval=0)
+
+    results = async_client.run_sync(async_client.delete_posts(reddit, urls))
+
+    assert results == ["Post deleted successfully!"] * 3
+    assert server.submissions == {}
+    assert get_store().submissions("alice") == []
+
+
+def test_get_all_analytics_derives_every_view_from_one_fetch(reddit, server):
+    reddit_crud.create_post(reddit, "python", "Hello", "Body")
+    requests_before = server.requests
+
+    post, engagement, growth = async_client.run_sync(async_client.get_all_analytics(reddit))
+
+    assert [row['title'] for row in post] == [row['title'] for row in engagement] == ["Hello"]
+    assert [row['title'] for row in growth] == ["Hello"]
+    assert server.requests - requests_before <= 2
@@ -0,0 +1,58 @@
+from threading import Event, Thread
+from types import SimpleNamespace
+
+from cache import cached_listing, invalidate_user, listing_cache
+
+
+def client(username="alice"):
+    return SimpleNamespace(config=SimpleNamespace(username=username))
+
+
+def test_cached_listing_loads_once_until_invalidated():
+    calls = []
+    reddit = client()
+
+    def loader():
+        calls.append(1)
+        return [len(calls)]
+
+    assert cached_listing(reddit, "posts", 10, loader) == [1]
+    assert cached_listing(reddit, "posts", 10, loader) == [1]
+    invalidate_user(reddit)
+    assert cached_listing(reddit, "posts", 10, loader) == [2]
+
+
+def test_load_overlapping_invalidation_is_not_cached():
+    reddit = client()
+    started, release = Event(), Event()
+    results = []
+
+    def stale_loader():
+        started.set()
+        release.wait(5)
+        return ["stale"]
+
+    reader = Thread(target=lambda: results.append(cached_listing(reddit, "posts", 10, stale_loader)))
+    reader.start()
+    started.wait(5)
+    # A write lands while the read is still loading
+    invalidate_user(reddit)
+    fresh = cached_listing(reddit, "posts", 10, lambda: ["fresh"])
+    release.set()
+    reader.join(5)
+
+    assert results == [["stale"]]
+    assert fresh == ["fresh"]
+    assert listing_cache.get(("alice", "posts", 10)) == (True, ["fresh"])
+    assert cached_listing(reddit, "posts", 10, lambda: ["reloaded"]) == ["fresh"]
+
+
+def test_invalidation_only_affects_its_account():
+    alice, bob = client("alice"), client("bob")
+    cached_listing(alice, "posts", 10, lambda: ["a"])
+    cached_listing(bob, "posts", 10, lambda: ["b"])
+
+    invalidate_user(alice)
+
+    assert listing_cache.get(("alice", "posts", 10)) == (False, None)
+    assert listing_cache.get(("bob", "posts", 10)) == (True, ["b"])
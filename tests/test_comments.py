@@ -0,0 +1,74 @@
+import pytest
+
+from comments import MORECHILDREN_BATCH_SIZE, iter_thread_comments, sync_comments
+from conftest import reddit_client
+from records import CommentRecord
+from store import get_store
+from transport import FakeRedditServer, FakeSession
+
+
+def build_thread(server, post_id, depth, width):
+    """Add a reply chain depth comments deep and width extra top-level comments."""
+    parent = None
+    for level in range(depth):
+        parent = server.add_comment(post_id, "bob", f"level {level}", parent_id=parent)
+    for index in range(width):
+        server.add_comment(post_id, "carol", f"top {index}")
+
+
+@pytest.mark.parametrize("comment_limit, comment_depth", [(500, 100), (20, 3), (5, 1)])
+def test_depths_match_the_tree_however_the_thread_is_split(comment_limit, comment_depth):
+    # Small limits push replies behind "more" and "continue this thread" stubs
+    server = FakeRedditServer(comment_limit=comment_limit, comment_depth=comment_depth)
+    post_id = server.add_submission("alice", "python", "Thread")
+    build_thread(server, post_id, depth=12, width=30)
+    for comment_id in list(server.comments)[:3]:
+        server.add_comment(post_id, "dave", "reply", parent_id=comment_id)
+
+    records = list(iter_thread_comments(reddit_client("alice", FakeSession(server)), post_id))
+
+    assert sorted(record.id for record in records) == sorted(server.comments)
+    assert {record.id: record.depth for record in records} == {
+        comment_id: comment['depth'] for comment_id, comment in server.comments.items()}
+    assert {record.id: record.parent_id for record in records} == {
+        comment_id: comment['parent_id'] for comment_id, comment in server.comments.items()}
+
+
+def test_hidden_comments_are_expanded_in_batches():
+    server = FakeRedditServer(comment_limit=10)
+    post_id = server.add_submission("alice", "python", "Busy thread")
+    build_thread(server, post_id, depth=0, width=10 + 2 * MORECHILDREN_BATCH_SIZE + 1)
+    reddit = reddit_client("alice", FakeSession(server))
+    reddit.user.me()
+    requests_before = server.requests
+
+    assert len(list(iter_thread_comments(reddit, post_id))) == len(server.comments)
+    # The thread itself, then three morechildren batches for the 201 hidden comments
+    assert server.requests - requests_before == 4
+
+
+def test_sync_comments_only_refetches_changed_threads(server, reddit):
+    quiet, busy = (server.add_submission("alice", "python", title) for title in ("Quiet", "Busy"))
+    build_thread(server, quiet, depth=3, width=2)
+    build_thread(server, busy, depth=1, width=1)
+    get_store().sync(reddit, min_interval=0)
+    assert sync_comments(reddit) == {quiet: 5, busy: 2}
+
+    server.add_comment(busy, "erin", "late reply")
+    get_store().sync(reddit, min_interval=0)
+
+    assert sync_comments(reddit) == {busy: 3}
+    assert len(get_store().comments(quiet)) == 5
+
+
+def test_response_latencies_measure_from_the_parent(server, reddit):
+    post_id = server.add_submission("alice", "python", "Thread", created_utc=1000.0)
+    top = server.add_comment(post_id, "bob", "first", created_utc=1600.0)
+    server.add_comment(post_id, "carol", "reply", parent_id=top, created_utc=1660.0)
+    get_store().sync(reddit, min_interval=0)
+    sync_comments(reddit)
+    # Comment and post IDs are separate sequences, so a comment may share its ID with the post;
+    # top-level comments must still be timed from the post
+    get_store().upsert_comments([CommentRecord(post_id, post_id, f"t1_{top}", "dave", "same ID", 1, 1700.0, 1, 0.0)])
+
+    assert sorted(get_store().response_latencies("alice")) == [(0, 600.0), (1, 60.0), (1, 100.0)]
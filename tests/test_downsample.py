@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from downsample import lttb, top_n_with_other
+
+
+def test_lttb_keeps_endpoints_and_threshold_points_in_order():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+
+    kept = lttb(x, y, threshold=100)
+
+    assert len(kept) == 100
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+
+
+def test_lttb_keeps_isolated_peaks_and_troughs():
+    y = np.zeros(10000)
+    y[1234], y[7777] = 500.0, -500.0
+
+    kept = lttb(np.arange(10000), y, threshold=50)
+
+    assert 1234 in kept and 7777 in kept
+
+
+def test_lttb_returns_every_index_for_short_series():
+    assert list(lttb([1, 2, 3], [3, 1, 2], threshold=10)) == [0, 1, 2]
+    assert list(lttb(range(5), range(5), threshold=2)) == [0, 1, 2, 3, 4]
+
+
+def test_lttb_accepts_datetimes():
+    x = pd.Series(pd.date_range("2025-01-01", periods=500, freq="h"))
+    y = np.random.default_rng(0).normal(size=500)
+
+    kept = lttb(x, y, threshold=60)
+
+    assert len(kept) == 60 and kept[-1] == 499
+
+
+def test_top_n_with_other_merges_the_tail():
+    df = pd.DataFrame({'title': [f"Post {index}" for index in range(10)], 'score': range(10),
+                       'upvote_ratio': [0.5] * 5 + [1.0] * 5})
+
+    result = top_n_with_other(df, 'title', 'score', n=3, aggregations={'upvote_ratio': 'mean'})
+
+    assert list(result['title']) == ["Post 9", "Post 8", "Post 7", "Other (7)"]
+    assert list(result['score']) == [9, 8, 7, sum(range(7))]
+    assert result['upvote_ratio'].iloc[-1] == (0.5 * 5 + 1.0 * 2) / 7
+
+
+def test_top_n_with_other_leaves_small_frames_alone():
+    df = pd.DataFrame({'title': ["a", "b"], 'score': [1, 2]})
+
+    assert top_n_with_other(df, 'title', 'score', n=2) is df
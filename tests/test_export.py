@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+import export
+from records import SubmissionRecord
+from store import PostStore, get_store
+
+RECORDS = [
+    SubmissionRecord("p1", "First", 10, 2, 0.87, 1735689600.0, "https://www.reddit.com/r/python/comments/p1/",
+                     "python"),
+    SubmissionRecord("p2", "Second, with \"quotes\"", 0, 0, 0.33, 1735776000.0,
+                     "https://www.reddit.com/r/learnpython/comments/p2/", "learnpython"),
+]
+
+
+@pytest.fixture
+def source():
+    store = get_store()
+    store.upsert("alice", RECORDS, captured_at=1735800000.0)
+    store.upsert("alice", [RECORDS[0]._replace(score=12)], captured_at=1735803600.0)
+    store.record_account_snapshot("alice", 100, 20, followers=5, captured_at=1735800000.0)
+    store.record_account_snapshot("alice", 110, 21, captured_at=1735803600.0)
+    return store
+
+
+def dataset(store, username):
+    return store.submissions(username), store.metric_snapshots(username), store.account_history(username)
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet", "arrow"])
+def test_export_imports_back_unchanged(source, tmp_path, file_format):
+    export.export_dataset(source, "alice", str(tmp_path / "export"), file_format)
+    target = PostStore(str(tmp_path / "target.db"))
+
+    counts = export.import_dataset(target, "alice", str(tmp_path / "export"))
+
+    assert counts == {'posts': 2, 'metric_snapshots': 3, 'account_snapshots': 2}
+    assert dataset(target, "alice") == dataset(source, "alice")
+
+
+def test_importing_twice_changes_nothing(source, tmp_path):
+    archive = export.export_archive(source, "alice", 'parquet')
+    target = PostStore(str(tmp_path / "target.db"))
+
+    export.import_dataset(target, "alice", io.BytesIO(archive))
+    first = dataset(target, "alice")
+    versions = target.data_versions(["alice"])
+    export.import_dataset(target, "alice", io.BytesIO(archive))
+
+    assert dataset(target, "alice") == first == dataset(source, "alice")
+    assert target.data_versions(["alice"])[0][1] == versions[0][1]
+
+
+def test_load_posts_reads_only_requested_columns(source, tmp_path):
+    paths = export.export_dataset(source, "alice", str(tmp_path / "export"), 'parquet')
+
+    frame = export.load_posts(paths['posts'], columns=['title', 'score'])
+
+    assert list(frame.columns) == ['title', 'score']
+    assert sorted(frame['score']) == [0, 12]
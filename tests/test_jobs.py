@@ -0,0 +1,111 @@
+from threading import Event
+
+import pytest
+
+from jobs import FINISHED, JobQueue, collect_results, report_progress
+from scheduler import CANCELLED, DONE, FAILED, PENDING, RUNNING
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(max_workers_per_account=1, max_workers=4)
+
+
+def blocker():
+    """Return (func, started, release): func blocks until release is set."""
+    started, release = Event(), Event()
+
+    def func():
+        started.set()
+        release.wait(5)
+        return "released"
+
+    return func, started, release
+
+
+def test_submit_runs_the_job_and_keeps_its_result(queue):
+    job_id = queue.submit("alice", lambda a, b=0: a + b, 2, b=3, name="add")
+
+    job = queue.wait(job_id, timeout=5)
+
+    assert job['status'] == DONE and job['result'] == 5 and job['name'] == "add"
+    assert queue.list_jobs("alice")[0]['id'] == job_id
+    assert queue.list_jobs("bob") == []
+
+
+def test_failures_are_reported_for_exceptions_and_error_strings(queue):
+    def boom():
+        raise ValueError("boom")
+
+    raised = queue.wait(queue.submit("alice", boom), timeout=5)
+    returned = queue.wait(queue.submit("alice", lambda: "Error: not allowed"), timeout=5)
+
+    assert (raised['status'], raised['error']) == (FAILED, "Error: boom")
+    assert (returned['status'], returned['error']) == (FAILED, "Error: not allowed")
+
+
+def test_jobs_with_the_same_key_are_queued_once_while_unfinished(queue):
+    func, started, release = blocker()
+    first = queue.submit("alice", func, key=("sync", "alice"))
+    started.wait(5)
+
+    assert queue.submit("alice", func, key=("sync", "alice")) == first
+    release.set()
+    queue.wait(first, timeout=5)
+    assert queue.submit("alice", lambda: None, key=("sync", "alice")) != first
+
+
+def test_each_account_is_limited_to_its_own_workers(queue):
+    func, started, release = blocker()
+    running = queue.submit("alice", func)
+    started.wait(5)
+
+    waiting = queue.submit("alice", lambda: "second")
+    other_account = queue.submit("bob", lambda: "bob's")
+
+    assert queue.wait(other_account, timeout=5)['status'] == DONE
+    assert queue.status(running)['status'] == RUNNING
+    assert queue.status(waiting)['status'] == PENDING
+    release.set()
+    assert queue.wait(waiting, timeout=5)['result'] == "second"
+
+
+def test_cancel_only_stops_pending_jobs(queue):
+    func, started, release = blocker()
+    running = queue.submit("alice", func)
+    started.wait(5)
+    ran = []
+    waiting = queue.submit("alice", lambda: ran.append(1))
+
+    assert queue.cancel(waiting) is True
+    assert queue.cancel(running) is False
+    release.set()
+    assert queue.wait(running, timeout=5)['status'] == DONE
+    assert queue.status(waiting)['status'] == CANCELLED
+    assert ran == []
+
+
+def test_progress_is_reported_from_inside_the_job(queue):
+    seen = []
+
+    def batch():
+        results = collect_results((index * 2 for index in range(4)), total=4)
+        seen.append(queue.list_jobs()[0]['progress'])
+        return results
+
+    job = queue.wait(queue.submit("alice", batch), timeout=5)
+
+    assert job['result'] == [0, 2, 4, 6]
+    assert seen == [(4, 4)] and job['progress'] == (4, 4)
+    # Outside a job it is a no-op
+    report_progress(1, 2)
+
+
+def test_finished_jobs_expire_after_retention():
+    queue = JobQueue(retention=0)
+    job_id = queue.submit("alice", lambda: None)
+    assert queue.wait(job_id, timeout=5)['status'] in FINISHED
+
+    queue.submit("alice", lambda: None)
+
+    assert queue.status(job_id) is None
@@ -0,0 +1,110 @@
+from threading import Event, Thread
+
+import pytest
+from prawcore.exceptions import RequestException
+
+import ratelimit
+from ratelimit import RequestGovernor, TokenBucket
+from transport import build_response
+
+URL = "https://oauth.reddit.com/api/submit"
+
+
+class Attempts:
+    """send callable answering each attempt with the next status, counting attempts."""
+
+    def __init__(self, method, *statuses):
+        self.method = method
+        self.statuses = list(statuses)
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        status = self.statuses.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return build_response(self.method, URL, status, "{}")
+
+
+@pytest.fixture
+def governor(monkeypatch):
+    # Retry at once, with a bucket that never holds a request back
+    monkeypatch.setattr(ratelimit, "backoff_delay", lambda attempt: 0)
+    return RequestGovernor(bucket=TokenBucket(rate=1000, capacity=1000), max_retries=3)
+
+
+def connection_error():
+    return RequestException(ConnectionError("connection reset"), (), {})
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504])
+def test_post_is_not_retried_after_a_server_error(governor, status):
+    send = Attempts("POST", status, 200)
+
+    assert governor.send("POST", URL, send).status_code == status
+    assert send.count == 1
+
+
+def test_post_is_retried_after_429(governor):
+    send = Attempts("POST", 429, 429, 200)
+
+    assert governor.send("POST", URL, send).status_code == 200
+    assert send.count == 3
+
+
+def test_get_is_retried_after_server_errors(governor):
+    send = Attempts("GET", 503, 500, 200)
+
+    assert governor.send("GET", URL, send).status_code == 200
+    assert send.count == 3
+
+
+def test_retries_stop_after_max_retries(governor):
+    send = Attempts("GET", *[502] * 10)
+
+    assert governor.send("GET", URL, send).status_code == 502
+    assert send.count == governor.max_retries + 1
+
+
+def test_connection_errors_are_retried_for_get_only(governor):
+    get = Attempts("GET", connection_error(), 200)
+    assert governor.send("GET", URL, get).status_code == 200
+    assert get.count == 2
+
+    post = Attempts("POST", connection_error(), 200)
+    with pytest.raises(RequestException):
+        governor.send("POST", URL, post)
+    assert post.count == 1
+
+
+def test_client_errors_are_returned_without_retry(governor):
+    send = Attempts("GET", 404, 200)
+
+    assert governor.send("GET", URL, send).status_code == 404
+    assert send.count == 1
+
+
+def test_identical_gets_in_flight_are_sent_once(governor):
+    started, release = Event(), Event()
+    calls = []
+
+    def send():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return build_response("GET", URL, 200, "{}")
+
+    results = []
+    leader = Thread(target=lambda: results.append(governor.send("GET", URL, send, params={'limit': 10})))
+    leader.start()
+    started.wait(5)
+    follower = Thread(target=lambda: results.append(governor.send("GET", URL, send, params={'limit': 10})))
+    follower.start()
+    # Give the follower time to join the leader's call before it finishes
+    follower.join(0.2)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert [response.status_code for response in results] == [200, 200]
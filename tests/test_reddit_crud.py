@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+import reddit_crud
+from conftest import CASSETTES, reddit_client
+from store import get_store
+from transport import CassetteMiss, ReplaySession
+
+
+def seed_posts(server, author, count, subreddit="python"):
+    return [server.add_submission(author, subreddit, f"Post {index}", created_utc=1735689600 + index)
+            for index in range(count)]
+
+
+def test_create_post_returns_url_and_is_read_back(reddit, server):
+    url = reddit_crud.create_post(reddit, "python", "Hello", "Body")
+
+    submission_id = reddit_crud.extract_submission_id(url)
+    assert server.submissions[submission_id]['selftext'] == "Body"
+    assert reddit_crud.read_user_posts(reddit, 10) == [("python", "Hello", submission_id, 1, url)]
+
+
+def test_create_post_invalidates_cached_listing(reddit):
+    assert reddit_crud.read_user_posts(reddit, 10) == []
+
+    reddit_crud.create_post(reddit, "python", "Hello", "Body")
+
+    assert [title for _, title, _, _, _ in reddit_crud.read_user_posts(reddit, 10)] == ["Hello"]
+
+
+def test_read_user_posts_is_newest_first_and_limited(reddit, server):
+    ids = seed_posts(server, "alice", 5)
+
+    posts = reddit_crud.read_user_posts(reddit, 3)
+
+    assert [post_id for _, _, post_id, _, _ in posts] == ids[::-1][:3]
+    assert all(isinstance(subreddit, str) for subreddit, _, _, _, _ in posts)
+
+
+def test_read_user_posts_page_follows_after_cursor(reddit, server):
+    ids = seed_posts(server, "alice", 5)
+
+    first, after = reddit_crud.read_user_posts_page(reddit, page_size=2)
+    second, after_second = reddit_crud.read_user_posts_page(reddit, page_size=2, after=after)
+    last, after_last = reddit_crud.read_user_posts_page(reddit, page_size=2, after=after_second)
+
+    newest_first = ids[::-1]
+    assert [post[2] for post in first] == newest_first[:2]
+    assert after == f"t3_{newest_first[1]}"
+    assert [post[2] for post in second] == newest_first[2:4]
+    assert [post[2] for post in last] == newest_first[4:]
+    assert after_last is None
+
+
+def test_iter_user_posts_streams_every_page(reddit, server):
+    ids = seed_posts(server, "alice", 7)
+
+    pages = list(reddit_crud.iter_user_posts(reddit, page_size=3))
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [post[2] for page in pages for post in page] == ids[::-1]
+
+
+def test_update_post_edits_own_post(reddit, server):
+    url = reddit_crud.create_post(reddit, "python", "Hello", "Body")
+
+    assert reddit_crud.update_post(reddit, url, "Hello", "New body") == url
+    assert server.submissions[reddit_crud.extract_submission_id(url)]['selftext'] == "New body"
+
+
+def test_update_post_refuses_other_authors_post(reddit, client_for, server):
+    url = reddit_crud.create_post(reddit, "python", "Hello", "Body")
+
+    result = reddit_crud.update_post(client_for("bob"), url, "Hello", "Hijacked")
+
+    assert result == "You are not the author of this post, so it cannot be updated."
+    assert server.submissions[reddit_crud.extract_submission_id(url)]['selftext'] == "Body"
+
+
+def test_delete_post_removes_post_and_stored_copy(reddit, server):
+    url = reddit_crud.create_post(reddit, "python", "Hello", "Body")
+    submission_id = reddit_crud.extract_submission_id(url)
+    get_store().sync(reddit, min_interval=0)
+    assert [record.id for record in get_store().submissions("alice")] == [submission_id]
+
+    assert reddit_crud.delete_post(reddit, f"t3_{submission_id}") == "Post deleted successfully!"
+
+    assert submission_id not in server.submissions
+    assert get_store().submissions("alice") == []
+    assert reddit_crud.read_user_posts(reddit, 10) == []
+
+
+def test_delete_post_refuses_other_authors_post(reddit, client_for, server):
+    url = reddit_crud.create_post(reddit, "python", "Hello", "Body")
+
+    result = reddit_crud.delete_post(client_for("bob"), url)
+
+    assert result == "You are not the author of this post, so it cannot be deleted."
+    assert reddit_crud.extract_submission_id(url) in server.submissions
+
+
+@pytest.mark.parametrize("post_url", ["hello", "https://example.com/r/python/comments/abc123", "foo/bar"])
+def test_update_and_delete_reject_invalid_urls_without_requests(reddit, server, post_url):
+    requests_before = server.requests
+
+    assert reddit_crud.update_post(reddit, post_url, "Title", "Body").startswith("Invalid URL")
+    assert reddit_crud.delete_post(reddit, post_url).startswith("Invalid URL")
+    assert server.requests == requests_before
+
+
+def test_read_user_posts_replays_recorded_cassette():
+    session = ReplaySession(os.path.join(CASSETTES, "read_user_posts.jsonl"))
+    reddit = reddit_client("cassette_user", session)
+
+    assert reddit_crud.read_user_posts(reddit, 10) == [
+        ("python", "Recorded post three", "000003", 3, "https://www.reddit.com/r/python/comments/000003/post/"),
+        ("learnpython", "Recorded post two", "000002", 2,
+         "https://www.reddit.com/r/learnpython/comments/000002/post/"),
+        ("python", "Recorded post one", "000001", 1, "https://www.reddit.com/r/python/comments/000001/post/"),
+    ]
+    # Anything the cassette does not hold fails instead of reaching the network
+    with pytest.raises(CassetteMiss):
+        session.request("GET", "https://oauth.reddit.com/user/cassette_user/submitted", params={'limit': 5})
@@ -0,0 +1,138 @@
+import time
+from threading import Lock
+from types import SimpleNamespace
+
+import pytest
+
+from scheduler import CANCELLED, DONE, INTERRUPTED, PENDING, RUNNING, PostScheduler
+
+REDDIT = SimpleNamespace(config=SimpleNamespace(username="alice"))
+
+
+class Poster:
+    """post_func stand-in that records every post it is asked to make."""
+
+    def __init__(self):
+        self.titles = []
+        self._lock = Lock()
+
+    def __call__(self, reddit, subreddit_name, title, content):
+        with self._lock:
+            self.titles.append(title)
+        return f"https://www.reddit.com/r/{subreddit_name}/comments/{len(self.titles)}/"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "scheduled_posts.db")
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def statuses(scheduler):
+    return {job['id']: job['status'] for job in scheduler.list_jobs()}
+
+
+def test_due_job_is_posted_once(db_path):
+    poster = Poster()
+    scheduler = PostScheduler(poster, db_path=db_path)
+
+    job_id = scheduler.schedule(REDDIT, "python", "Now", "Body", time.time())
+
+    assert wait_until(lambda: statuses(scheduler)[job_id] == DONE)
+    assert poster.titles == ["Now"]
+
+
+def test_cancel_only_succeeds_while_pending(db_path):
+    poster = Poster()
+    scheduler = PostScheduler(poster, db_path=db_path)
+    job_id = scheduler.schedule(REDDIT, "python", "Later", "Body", time.time() + 0.3)
+
+    assert scheduler.cancel(job_id) is True
+    assert scheduler.cancel(job_id) is False
+    time.sleep(0.5)
+    assert statuses(scheduler)[job_id] == CANCELLED
+    assert poster.titles == []
+
+
+def test_reschedule_moves_a_pending_job(db_path):
+    poster = Poster()
+    scheduler = PostScheduler(poster, db_path=db_path)
+    job_id = scheduler.schedule(REDDIT, "python", "Moved", "Body", time.time() + 60)
+
+    assert scheduler.reschedule(job_id, time.time()) is True
+
+    assert wait_until(lambda: statuses(scheduler)[job_id] == DONE)
+    assert scheduler.reschedule(job_id, time.time() + 60) is False
+
+
+def test_two_dispatchers_on_one_database_post_each_job_once(db_path):
+    poster = Poster()
+    first = PostScheduler(poster, db_path=db_path)
+    second = PostScheduler(poster, db_path=db_path)
+    second.register_client(REDDIT)
+    run_at = time.time() + 0.3
+    job_ids = [first.schedule(REDDIT, "python", f"Post {index}", "Body", run_at) for index in range(20)]
+    second.refresh()
+
+    assert wait_until(lambda: all(statuses(first)[job_id] == DONE for job_id in job_ids))
+    assert sorted(poster.titles) == sorted(f"Post {index}" for index in range(20))
+
+
+def test_cancel_from_another_process_wins_over_a_stale_dispatcher(db_path):
+    poster = Poster()
+    dispatcher = PostScheduler(poster, db_path=db_path)
+    job_id = dispatcher.schedule(REDDIT, "python", "Cancelled", "Body", time.time() + 0.3)
+
+    # A CLI process cancels it; the dispatcher is not refreshed before the job is due
+    assert PostScheduler(poster, db_path=db_path, dispatch=False).cancel(job_id) is True
+
+    time.sleep(0.6)
+    assert poster.titles == []
+    assert statuses(dispatcher)[job_id] == CANCELLED
+
+
+def test_reschedule_from_another_process_is_honoured_without_refresh(db_path):
+    poster = Poster()
+    dispatcher = PostScheduler(poster, db_path=db_path)
+    job_id = dispatcher.schedule(REDDIT, "python", "Moved", "Body", time.time() + 0.3)
+
+    assert PostScheduler(poster, db_path=db_path, dispatch=False).reschedule(job_id, time.time() + 1.0) is True
+
+    time.sleep(0.6)
+    assert poster.titles == []
+    assert statuses(dispatcher)[job_id] == PENDING
+    assert wait_until(lambda: statuses(dispatcher)[job_id] == DONE)
+    assert poster.titles == ["Moved"]
+
+
+def test_startup_leaves_jobs_of_live_dispatchers_running(db_path):
+    live = PostScheduler(Poster(), db_path=db_path, heartbeat_interval=0.1)
+    job_id = live.schedule(REDDIT, "python", "In flight", "Body", time.time() + 60)
+    # Stand in for a post the live dispatcher is making right now
+    live._conn.execute("UPDATE jobs SET status = ?, owner = ? WHERE id = ?", (RUNNING, live.owner, job_id))
+    live._conn.commit()
+
+    PostScheduler(Poster(), db_path=db_path, heartbeat_interval=0.1)
+
+    assert statuses(live)[job_id] == RUNNING
+
+
+def test_jobs_of_stopped_dispatchers_are_interrupted(db_path):
+    observer = PostScheduler(Poster(), db_path=db_path, dispatch=False)
+    job_id = observer.schedule(REDDIT, "python", "Orphaned", "Body", time.time() + 60)
+    # Claimed by a dispatcher whose heartbeat stopped long ago
+    observer._conn.execute("INSERT INTO dispatchers (id, heartbeat_at) VALUES (?, ?)", ("gone", time.time() - 3600))
+    observer._conn.execute("UPDATE jobs SET status = ?, owner = ? WHERE id = ?", (RUNNING, "gone", job_id))
+    observer._conn.commit()
+
+    PostScheduler(Poster(), db_path=db_path, heartbeat_interval=0.1)
+
+    assert statuses(observer)[job_id] == INTERRUPTED
@@ -0,0 +1,127 @@
+import pytest
+
+from reddit_crud import extract_submission_id
+from submission_ids import parse_submission_id, parse_submission_ids
+
+# (value, submission ID) for every documented form
+ACCEPTED = [
+    # reddit.com hosts, through a subreddit
+    ("https://www.reddit.com/r/python/comments/abc123/some_title/", "abc123"),
+    ("https://reddit.com/r/python/comments/abc123/some_title/", "abc123"),
+    ("https://old.reddit.com/r/python/comments/abc123/some_title/", "abc123"),
+    ("https://new.reddit.com/r/python/comments/abc123/", "abc123"),
+    ("https://np.reddit.com/r/python/comments/abc123/some_title/", "abc123"),
+    ("https://m.reddit.com/r/python/comments/abc123", "abc123"),
+    ("http://www.reddit.com/r/python/comments/abc123/", "abc123"),
+    ("www.reddit.com/r/python/comments/abc123/some_title/", "abc123"),
+    ("reddit.com/r/python/comments/abc123", "abc123"),
+    # User-profile posts and /comments/ directly
+    ("https://www.reddit.com/user/alice/comments/abc123/my_post/", "abc123"),
+    ("https://www.reddit.com/u/alice/comments/abc123/", "abc123"),
+    ("https://old.reddit.com/user/alice/comments/abc123", "abc123"),
+    ("https://www.reddit.com/comments/abc123", "abc123"),
+    # URL tails: comment permalinks, queries and fragments
+    ("https://www.reddit.com/r/python/comments/abc123/some_title/def456/", "abc123"),
+    ("https://www.reddit.com/r/python/comments/abc123/some_title/?utm_source=share&context=3", "abc123"),
+    ("https://www.reddit.com/r/python/comments/abc123#comments", "abc123"),
+    # Short links
+    ("https://redd.it/abc123", "abc123"),
+    ("http://redd.it/abc123/", "abc123"),
+    ("redd.it/abc123", "abc123"),
+    ("https://www.redd.it/abc123?share=1", "abc123"),
+    # Fullnames
+    ("t3_abc123", "abc123"),
+    ("T3_ABC123", "abc123"),
+    # Case and surrounding whitespace
+    ("HTTPS://WWW.REDDIT.COM/R/Python/comments/ABC123/", "abc123"),
+    ("  https://redd.it/abc123\n", "abc123"),
+    # Longest base36 ID that fits in 64 bits
+    ("t3_3w5e11264sgsf", "3w5e11264sgsf"),
+]
+
+# Values that must not resolve, bare IDs allowed or not
+REJECTED = [
+    # Lookalike hosts
+    "https://notreddit.com/r/python/comments/abc123/",
+    "https://reddit.com.evil.example/r/python/comments/abc123/",
+    "https://evil.example/reddit.com/r/python/comments/abc123/",
+    "https://www.reddit.co/r/python/comments/abc123/",
+    "https://a.b.reddit.com/r/python/comments/abc123/",
+    "https://redd.it.evil.example/abc123",
+    "https://notredd.it/abc123",
+    # Not a post
+    "https://www.reddit.com/r/python/",
+    "https://www.reddit.com/user/alice/",
+    "https://www.reddit.com/r/python/comments/",
+    "https://www.reddit.com/r/python/wiki/comments/abc123",
+    "ftp://www.reddit.com/r/python/comments/abc123",
+    # Malformed IDs and fullnames
+    "foo/bar",
+    "t3_",
+    "t1_abc123",
+    "t3_abc123/extra",
+    "t3_abc 123",
+    "abc-123",
+    "abc_123",
+    "3w5e11264sgsf0",
+    "https://redd.it/abc_123",
+    "",
+    "   ",
+]
+
+
+@pytest.mark.parametrize("value, expected", ACCEPTED)
+def test_every_documented_form_resolves(value, expected):
+    assert parse_submission_id(value) == expected
+    assert parse_submission_id(value, bare=False) == expected
+    assert extract_submission_id(value) == expected
+
+
+@pytest.mark.parametrize("value", REJECTED)
+def test_lookalikes_and_malformed_values_are_rejected(value):
+    assert parse_submission_id(value) is None
+    assert parse_submission_id(value, bare=False) is None
+
+
+@pytest.mark.parametrize("value, bare, expected", [
+    ("abc123", True, "abc123"),
+    ("ABC123", True, "abc123"),
+    ("hello", True, "hello"),
+    ("abc123", False, None),
+    ("hello", False, None),
+])
+def test_bare_ids_only_resolve_when_allowed(value, bare, expected):
+    assert parse_submission_id(value, bare=bare) == expected
+
+
+def test_update_and_delete_treat_bare_words_as_invalid_urls():
+    assert extract_submission_id("hello") is None
+
+
+def test_parse_submission_ids_resolves_a_pasted_list_in_order():
+    pasted = "\n".join([
+        "https://old.reddit.com/r/python/comments/abc123/title/",
+        "",
+        "t3_def456",
+        "foo/bar",
+        "https://redd.it/ghi789",
+        "t3_def456",
+        "   ",
+        "xyz000",
+    ])
+
+    resolved, invalid = parse_submission_ids(pasted)
+
+    assert list(resolved.items()) == [
+        ("https://old.reddit.com/r/python/comments/abc123/title/", "abc123"),
+        ("t3_def456", "def456"),
+        ("https://redd.it/ghi789", "ghi789"),
+        ("xyz000", "xyz000"),
+    ]
+    assert invalid == ["foo/bar"]
+
+
+def test_parse_submission_ids_accepts_any_iterable_once():
+    values = iter(["t3_abc123", "nope/nope"])
+
+    assert parse_submission_ids(values) == ({"t3_abc123": "abc123"}, ["nope/nope"])
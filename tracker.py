@@ -0,0 +1,137 @@
+import time
+import logging
+from threading import Event, Lock, Thread
+
+from records import submission_to_record
+from store import INFO_BATCH_SIZE, get_store
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# (maximum post age, sampling interval) in seconds: fresh posts are sampled often, old ones rarely
+SAMPLING_SCHEDULE = (
+    (3600, 5 * 60),
+    (24 * 3600, 30 * 60),
+    (7 * 24 * 3600, 6 * 3600),
+    (30 * 24 * 3600, 24 * 3600),
+)
+
+ACCOUNT_SAMPLE_INTERVAL = 30 * 60
+COMPACT_INTERVAL = 3600
+MIN_SLEEP = 30
+MAX_SLEEP = 15 * 60
+
+
+# Function to pick how often a post should be sampled given its age
+def sampling_interval(age):
+    """Return the sampling interval in seconds, or None if the post is too old to track."""
+    for max_age, interval in SAMPLING_SCHEDULE:
+        if age < max_age:
+            return interval
+    return None
+
+
+class MetricCollector:
+    """
+    Background thread that snapshots post metrics and account karma into the post store.
+
+    New posts are picked up with an incremental sync; existing posts are re-sampled on an
+    age-based schedule in batched info() calls. The store is periodically downsampled
+    and expired.
+
+    Args:
+        reddit (praw.Reddit): The initialized Reddit client.
+        store (PostStore): Where samples are written.
+    """
+
+    def __init__(self, reddit, store):
+        self.reddit = reddit
+        self.store = store
+        self.username = reddit.config.username
+        self._next_due = {}
+        self._next_account_sample = 0.0
+        self._next_compact = 0.0
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = Thread(target=self._run, name=f"metric-collector-{self.username}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def collect_once(self):
+        """
+        Take every sample that is due now.
+
+        Returns:
+            float: Seconds until the next sample is due.
+        """
+        now = time.time()
+        self.store.sync(self.reddit, min_interval=MIN_SLEEP, refresh_window=0)
+
+        due = []
+        for post_id, created_utc in self.store.post_ages(self.username):
+            interval = sampling_interval(now - created_utc)
+            if interval is None:
+                self._next_due.pop(post_id, None)
+                continue
+            if self._next_due.get(post_id, 0) <= now:
+                due.append(post_id)
+                self._next_due[post_id] = now + interval
+
+        records = []
+        fullnames = [f"t3_{post_id}" for post_id in due]
+        for start in range(0, len(fullnames), INFO_BATCH_SIZE):
+            for submission in self.reddit.info(fullnames=fullnames[start:start + INFO_BATCH_SIZE]):
+                records.append(submission_to_record(submission))
+        if records:
+            self.store.upsert(self.username, records, captured_at=now)
+
+        if now >= self._next_account_sample:
+            me = self.reddit.user.me(use_cache=False)
+            # The user's profile subreddit carries the follower count
+            profile = getattr(me, 'subreddit', None)
+            followers = profile.__dict__.get('subscribers') if profile is not None else None
+            self.store.record_account_snapshot(self.username, me.link_karma, me.comment_karma, followers,
+                                               captured_at=now)
+            self._next_account_sample = now + ACCOUNT_SAMPLE_INTERVAL
+
+        if now >= self._next_compact:
+            self.store.compact()
+            self._next_compact = now + COMPACT_INTERVAL
+
+        logger.info(f"Collected {len(records)} post sample(s) for u/{self.username}")
+        next_due = min([*self._next_due.values(), self._next_account_sample], default=now + MAX_SLEEP)
+        return min(max(next_due - time.time(), MIN_SLEEP), MAX_SLEEP)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                delay = self.collect_once()
+            except Exception as e:
+                logger.error(f"Metric collection failed for u/{self.username}: {e}")
+                delay = MAX_SLEEP
+            self._stop.wait(delay)
+
+
+_collectors = {}
+_collectors_lock = Lock()
+
+
+# Function to get the running collector of an account, starting it on first use
+def get_collector(reddit):
+    username = reddit.config.username
+    with _collectors_lock:
+        collector = _collectors.get(username)
+        if collector is None:
+            collector = MetricCollector(reddit, get_store())
+            _collectors[username] = collector
+        collector.start()
+        return collector
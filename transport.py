@@ -0,0 +1,394 @@
+import os
+import re
+import json
+import time
+import itertools
+import logging
+from collections import defaultdict, deque
+from threading import Lock
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# How praw clients reach Reddit: the real API, the real API while recording every exchange
+# to a cassette file, a cassette replayed without network, or an in-memory fake
+TRANSPORTS = ("live", "record", "replay", "fake")
+
+# Query parameters PRAW adds to every request, left out of replay matching
+IGNORED_PARAMS = {"raw_json"}
+
+
+# Function to build a requests.Response without a connection
+def build_response(method, url, status, body, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers or {"content-type": "application/json; charset=UTF-8"})
+    response._content = body.encode("utf-8") if isinstance(body, str) else body
+    response.encoding = "utf-8"
+    response.url = url
+    response.request = requests.Request(method, url).prepare()
+    return response
+
+
+# Function to reduce a request to what replay matches on
+def request_key(method, url, params=None):
+    path = urlsplit(url).path.rstrip("/") or "/"
+    params = {key: str(value) for key, value in (params or {}).items() if key not in IGNORED_PARAMS}
+    return f"{method.upper()} {path} {json.dumps(params, sort_keys=True)}"
+
+
+class RecordingSession(requests.Session):
+    """
+    requests.Session that appends every exchange with Reddit to a JSON lines cassette.
+
+    Request bodies are not written, and access tokens in responses are replaced, so the
+    cassette holds no credentials.
+
+    Args:
+        path (str): The cassette file; exchanges are appended.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._lock = Lock()
+
+    def request(self, method, url, params=None, **kwargs):
+        response = super().request(method, url, params=params, **kwargs)
+        body = response.text
+        if url.endswith("/api/v1/access_token") and response.ok:
+            body = json.dumps({**response.json(), 'access_token': "recorded", 'refresh_token': None})
+        entry = {
+            'key': request_key(method, url, params),
+            'status': response.status_code,
+            'headers': {name: value for name, value in response.headers.items()
+                        if name.lower() == "content-type" or name.lower().startswith("x-ratelimit")},
+            'body': body,
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as cassette:
+            cassette.write(json.dumps(entry) + "\n")
+        return response
+
+
+class CassetteMiss(Exception):
+    """Raised when a replayed client makes a request that was never recorded."""
+
+
+class ReplaySession:
+    """
+    requests.Session stand-in that answers from a cassette written by RecordingSession.
+
+    Requests are matched on method, path and query parameters. Repeated requests get the
+    recorded responses in order, and the last one again once they run out, so a cassette
+    of one session can drive benchmarks that repeat it.
+
+    Args:
+        path (str): The cassette file.
+
+    Raises:
+        CassetteMiss: From request() for anything not in the cassette.
+    """
+
+    def __init__(self, path):
+        self.headers = CaseInsensitiveDict()
+        self._responses = defaultdict(deque)
+        self._lock = Lock()
+        with open(path, encoding="utf-8") as cassette:
+            for line in cassette:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._responses[entry['key']].append(entry)
+
+    def request(self, method, url, params=None, **kwargs):
+        key = request_key(method, url, params)
+        with self._lock:
+            queue = self._responses.get(key)
+            if not queue:
+                raise CassetteMiss(f"No recorded response for {key}")
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+        return build_response(method, url, entry['status'], entry['body'], entry['headers'])
+
+    def close(self):
+        pass
+
+
+class FakeRedditServer:
+    """
+    In-memory Reddit covering the endpoints the app uses: token, me, the user's
+    submission listing, submit, edit, delete, info, a submission's comments and
+    morechildren.
+
+    It is driven through FakeSession, so clients run the real PRAW and prawcore code
+    down to the HTTP layer, and every request is counted. Comment trees are served like
+    Reddit's: replies past comment_limit per response are left behind "more" stubs, and
+    replies deeper than comment_depth behind "continue this thread" stubs.
+
+    Args:
+        latency (float): Seconds each request sleeps.
+        comment_limit (int): Comments rendered inline per comments response.
+        comment_depth (int): Deepest comment level rendered inline.
+    """
+
+    # Requests served by all servers, so a benchmark can count calls made by clients it did not build
+    total_requests = 0
+
+    def __init__(self, latency=0.0, comment_limit=200, comment_depth=10):
+        self.latency = latency
+        self.comment_limit = comment_limit
+        self.comment_depth = comment_depth
+        self.requests = 0
+        self.submissions = {}
+        self.comments = {}
+        self._by_author = defaultdict(list)
+        self._positions = {}
+        self._replies = defaultdict(list)
+        self._ids = itertools.count(1)
+        self._lock = Lock()
+        self._routes = [
+            ("POST", re.compile(r"/api/v1/access_token$"), self._token),
+            ("GET", re.compile(r"/api/v1/me$"), self._me),
+            ("GET", re.compile(r"/user/([^/]+)/submitted$"), self._submitted),
+            ("POST", re.compile(r"/api/submit$"), self._submit),
+            ("POST", re.compile(r"/api/editusertext$"), self._edit),
+            ("POST", re.compile(r"/api/del$"), self._delete),
+            ("GET", re.compile(r"/api/info$"), self._info),
+            ("GET", re.compile(r"/comments/([a-z0-9]+)$"), self._comments),
+            ("GET", re.compile(r"/comments/([a-z0-9]+)/_/([a-z0-9]+)$"), self._comment_thread),
+            ("POST", re.compile(r"/api/morechildren$"), self._morechildren),
+        ]
+
+    def add_submission(self, author, subreddit, title, selftext="", created_utc=None, score=1, num_comments=0):
+        with self._lock:
+            submission_id = format(next(self._ids), 'x').rjust(6, '0')
+            self.submissions[submission_id] = {
+                'id': submission_id,
+                'name': f"t3_{submission_id}",
+                'author': author,
+                'subreddit': subreddit,
+                'subreddit_name_prefixed': f"r/{subreddit}",
+                'title': title,
+                'selftext': selftext,
+                'is_self': True,
+                'created_utc': created_utc or time.time(),
+                'score': score,
+                'num_comments': num_comments,
+                'upvote_ratio': 0.5 + (score % 50) / 100,
+                'permalink': f"/r/{subreddit}/comments/{submission_id}/post/",
+                'url': f"https://www.reddit.com/r/{subreddit}/comments/{submission_id}/post/",
+            }
+            self._positions[submission_id] = len(self._by_author[author.lower()])
+            self._by_author[author.lower()].append(submission_id)
+        return submission_id
+
+    def add_comment(self, post_id, author, body, parent_id=None, score=1, created_utc=None):
+        """
+        Add a comment to a submission.
+
+        Args:
+            parent_id (str): ID of the comment replied to, or None for a top-level comment.
+
+        Returns:
+            str: The new comment's ID.
+        """
+        with self._lock:
+            comment_id = format(next(self._ids), 'x').rjust(6, '0')
+            parent = f"t1_{parent_id}" if parent_id else f"t3_{post_id}"
+            depth = self.comments[parent_id]['depth'] + 1 if parent_id else 0
+            self.comments[comment_id] = {
+                'id': comment_id,
+                'name': f"t1_{comment_id}",
+                'link_id': f"t3_{post_id}",
+                'parent_id': parent,
+                'author': author,
+                'body': body,
+                'score': score,
+                'created_utc': created_utc or time.time(),
+                'depth': depth,
+            }
+            self._replies[parent].append(comment_id)
+            self.submissions[post_id]['num_comments'] += 1
+        return comment_id
+
+    def handle(self, method, url, params=None, data=None, headers=None):
+        """Answer one request with (status, body)."""
+        with self._lock:
+            self.requests += 1
+            FakeRedditServer.total_requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        path = urlsplit(url).path.rstrip("/")
+        data = dict(data or {})
+        for route_method, pattern, handler in self._routes:
+            match = pattern.search(path)
+            if route_method == method.upper() and match:
+                return handler(*match.groups(), params=params or {}, data=data, headers=headers or {})
+        return 404, {'message': "Not Found", 'error': 404}
+
+    def _user(self, headers):
+        # The fake token is "fake:<username>", so each client sees its own account
+        return headers.get("Authorization", "").rsplit(":", 1)[-1]
+
+    def _thing(self, submission_id):
+        return {'kind': "t3", 'data': dict(self.submissions[submission_id])}
+
+    def _listing(self, things, after=None):
+        return {'kind': "Listing", 'data': {'after': after, 'before': None, 'children': things}}
+
+    def _token(self, params, data, headers):
+        return 200, {'access_token': f"fake:{data.get('username', '')}", 'token_type': "bearer",
+                     'expires_in': 86400, 'scope': "*"}
+
+    def _me(self, params, data, headers):
+        name = self._user(headers)
+        return 200, {'name': name, 'id': name, 'link_karma': 0, 'comment_karma': 0,
+                     'subreddit': {'subscribers': 0, 'display_name': f"u_{name}"}}
+
+    def _submitted(self, author, params, data, headers):
+        # Reddit serves at most 100 items per listing page whatever limit is asked for
+        limit = min(int(params.get('limit', 25)), 100)
+        after = params.get('after')
+        with self._lock:
+            ids = self._by_author[author.lower()]
+            # Walk back from the cursor, so a page costs the same however many posts there are
+            position = self._positions.get(after[3:], len(ids)) if after else len(ids)
+            page = []
+            while position > 0 and len(page) < limit:
+                position -= 1
+                if ids[position] in self.submissions:
+                    page.append(ids[position])
+            things = [self._thing(submission_id) for submission_id in page]
+        next_after = f"t3_{page[-1]}" if len(page) == limit and position > 0 else None
+        return 200, self._listing(things, next_after)
+
+    def _submit(self, params, data, headers):
+        submission_id = self.add_submission(self._user(headers), data.get('sr'), data.get('title'),
+                                            data.get('text', ""))
+        submission = self.submissions[submission_id]
+        return 200, {'json': {'errors': [], 'data': {'id': submission_id, 'name': submission['name'],
+                                                     'url': submission['url']}}}
+
+    def _edit(self, params, data, headers):
+        submission_id = data.get('thing_id', "")[3:]
+        with self._lock:
+            if submission_id not in self.submissions:
+                return 200, {'json': {'errors': [["NOT_FOUND", "not found", "thing_id"]]}}
+            self.submissions[submission_id]['selftext'] = data.get('text', "")
+            thing = self._thing(submission_id)
+        return 200, {'json': {'errors': [], 'data': {'things': [thing]}}}
+
+    def _delete(self, params, data, headers):
+        with self._lock:
+            self.submissions.pop(data.get('id', "")[3:], None)
+        return 200, {}
+
+    def _info(self, params, data, headers):
+        fullnames = str(params.get('id', "")).split(",")
+        with self._lock:
+            things = [self._thing(fullname[3:]) for fullname in fullnames if fullname[3:] in self.submissions]
+        return 200, self._listing(things)
+
+    def _comments(self, submission_id, params, data, headers):
+        with self._lock:
+            if submission_id not in self.submissions:
+                return 404, {'message': "Not Found", 'error': 404}
+            thing = self._thing(submission_id)
+            comments = self._comment_things(f"t3_{submission_id}", 0, [self.comment_limit])
+        return 200, [self._listing([thing]), self._listing(comments)]
+
+    def _comment_thread(self, submission_id, comment_id, params, data, headers):
+        # A "continue this thread" link re-roots the thread at the comment, depths included
+        with self._lock:
+            if comment_id not in self.comments:
+                return 404, {'message': "Not Found", 'error': 404}
+            thing = self._thing(submission_id)
+            comment = self._comment_thing(comment_id, 0, [self.comment_limit])
+        return 200, [self._listing([thing]), self._listing([comment])]
+
+    def _morechildren(self, params, data, headers):
+        # Expanded comments come back flat, each followed by its replies, with replies left empty
+        things = []
+        with self._lock:
+            stack = [comment_id for comment_id in reversed(data.get('children', "").split(","))
+                     if comment_id in self.comments]
+            while stack:
+                comment_id = stack.pop()
+                things.append({'kind': "t1", 'data': {**self.comments[comment_id], 'replies': ""}})
+                stack.extend(reversed(self._replies[f"t1_{comment_id}"]))
+        return 200, {'json': {'errors': [], 'data': {'things': things}}}
+
+    def _comment_things(self, parent, depth, budget):
+        # budget is the number of comments the response may still render, shared by the whole tree
+        replies = self._replies[parent]
+        if replies and depth > self.comment_depth:
+            return [self._more(parent, depth, [])]
+        things = []
+        for index, comment_id in enumerate(replies):
+            if budget[0] <= 0:
+                things.append(self._more(parent, depth, replies[index:]))
+                break
+            things.append(self._comment_thing(comment_id, depth, budget))
+        return things
+
+    def _comment_thing(self, comment_id, depth, budget):
+        budget[0] -= 1
+        comment = {**self.comments[comment_id], 'depth': depth}
+        replies = self._comment_things(comment['name'], depth + 1, budget)
+        comment['replies'] = self._listing(replies) if replies else ""
+        return {'kind': "t1", 'data': comment}
+
+    def _more(self, parent, depth, children):
+        # A stub without children is Reddit's "continue this thread"
+        return {'kind': "more", 'data': {'count': len(children), 'name': "t1__", 'id': "_", 'parent_id': parent,
+                                         'depth': depth, 'children': children}}
+
+
+class FakeSession:
+    """requests.Session stand-in that sends every request to a FakeRedditServer."""
+
+    def __init__(self, server):
+        self.server = server
+        self.headers = CaseInsensitiveDict()
+
+    def request(self, method, url, params=None, data=None, headers=None, **kwargs):
+        status, body = self.server.handle(method, url, params=params, data=data, headers=headers)
+        # No rate-limit headers, so prawcore and the governor never pace requests to the fake
+        return build_response(method, url, status, json.dumps(body))
+
+    def close(self):
+        pass
+
+
+# Server behind the "fake" transport, shared by every client in the process
+fake_server = FakeRedditServer()
+
+
+# Function to create the HTTP session a new Reddit client uses
+def create_session(transport=None, cassette=None):
+    """
+    Return a requests.Session-compatible object for praw.Reddit's requestor.
+
+    Args:
+        transport (str): One of TRANSPORTS; defaults to the REDDIT_TRANSPORT environment
+            variable, or "live".
+        cassette (str): Cassette file for "record" and "replay"; defaults to
+            REDDIT_CASSETTE, or "reddit_cassette.jsonl".
+
+    Raises:
+        ValueError: For an unknown transport.
+    """
+    transport = transport or os.getenv("REDDIT_TRANSPORT", "live")
+    cassette = cassette or os.getenv("REDDIT_CASSETTE", "reddit_cassette.jsonl")
+    if transport == "live":
+        return requests.Session()
+    if transport == "record":
+        logger.info(f"Recording Reddit traffic to {cassette}")
+        return RecordingSession(cassette)
+    if transport == "replay":
+        return ReplaySession(cassette)
+    if transport == "fake":
+        return FakeSession(fake_server)
+    raise ValueError(f"Unknown transport: {transport}. Use one of {', '.join(TRANSPORTS)}")
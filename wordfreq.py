@@ -0,0 +1,178 @@
+import os
+import re
+import hashlib
+import logging
+import importlib.util
+from collections import Counter
+from functools import lru_cache
+from threading import Lock
+
+from cache import TTLCache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Suffixes stripped by the stemmer, longest first
+SUFFIXES = ("ingly", "edly", "ing", "ies", "ed", "es", "ly", "s")
+MIN_STEM_LENGTH = 3
+
+
+# Function to load wordcloud's stopword list without importing wordcloud, which pulls in matplotlib
+@lru_cache(maxsize=1)
+def default_stopwords():
+    spec = importlib.util.find_spec("wordcloud")
+    if spec is not None and spec.submodule_search_locations:
+        path = os.path.join(spec.submodule_search_locations[0], "stopwords")
+        if os.path.exists(path):
+            with open(path) as stopwords_file:
+                return frozenset(line.strip() for line in stopwords_file)
+    from wordcloud import STOPWORDS
+    return frozenset(STOPWORDS)
+
+
+# Function to reduce a word to a crude stem so that "post", "posts" and "posting" count together
+def stem(word):
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            if suffix == "ies":
+                return word[:-3] + "y"
+            return word[:-len(suffix)]
+    return word
+
+
+# Function to split a title into (stem, surface word) pairs, skipping stopwords
+def tokenize(title, stopwords=None):
+    stopwords = default_stopwords() if stopwords is None else stopwords
+    return [(stem(word), word) for word in TOKEN_PATTERN.findall(title.lower())
+            if word not in stopwords and len(word) > 1]
+
+
+class WordFrequencyIndex:
+    """
+    Incrementally maintained word counts over a set of titles.
+
+    Titles are tokenized once when added; removing a title subtracts its counts, so the
+    table stays current without re-tokenizing the whole corpus. Counts are kept per stem,
+    and each stem is displayed as its most frequent surface form.
+    """
+
+    def __init__(self, stopwords=None):
+        self.stopwords = stopwords
+        self._titles = {}
+        self._stems = Counter()
+        self._surfaces = {}
+        self._lock = Lock()
+
+    def add(self, key, title):
+        """Add or replace the title stored under key."""
+        with self._lock:
+            self._add(key, title)
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def sync(self, titles):
+        """
+        Bring the index in line with a mapping of key to title.
+
+        Only keys that are new, gone or whose title changed are re-tokenized.
+
+        Returns:
+            int: The number of keys added, removed or changed.
+        """
+        with self._lock:
+            return self._sync(titles)
+
+    def frequencies(self):
+        """Return a dict of display word to count."""
+        with self._lock:
+            return self._frequencies()
+
+    def sync_frequencies(self, titles):
+        """
+        Sync to titles and return their word counts as one step, so that a concurrent
+        sync() with other titles cannot land in between.
+        """
+        with self._lock:
+            self._sync(titles)
+            return self._frequencies()
+
+    def __len__(self):
+        return len(self._titles)
+
+    def _sync(self, titles):
+        changed = 0
+        for key in [key for key in self._titles if key not in titles]:
+            self._remove(key)
+            changed += 1
+        for key, title in titles.items():
+            stored = self._titles.get(key)
+            if stored is None or stored[0] != title:
+                self._add(key, title)
+                changed += 1
+        return changed
+
+    def _frequencies(self):
+        return {self._surfaces[stem_].most_common(1)[0][0]: count for stem_, count in self._stems.items() if count > 0}
+
+    def _add(self, key, title):
+        if key in self._titles:
+            self._remove(key)
+        tokens = tokenize(title, self.stopwords)
+        self._titles[key] = (title, tokens)
+        for stem_, word in tokens:
+            self._stems[stem_] += 1
+            self._surfaces.setdefault(stem_, Counter())[word] += 1
+
+    def _remove(self, key):
+        _, tokens = self._titles.pop(key)
+        for stem_, word in tokens:
+            self._stems[stem_] -= 1
+            surfaces = self._surfaces[stem_]
+            surfaces[word] -= 1
+            if surfaces[word] <= 0:
+                del surfaces[word]
+            if self._stems[stem_] <= 0:
+                del self._stems[stem_]
+                del self._surfaces[stem_]
+
+
+# Function to hash a frequency table, stable across processes
+def frequency_fingerprint(frequencies):
+    digest = hashlib.sha256()
+    for word, count in sorted(frequencies.items()):
+        digest.update(f"{word}\0{count}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Rendered word cloud images keyed by (frequency fingerprint, width, height)
+image_cache = TTLCache(ttl=24 * 3600, max_entries=32, name="word_cloud_images")
+_render_lock = Lock()
+
+
+# Function to render a word cloud image, reusing the cached one if the frequencies are unchanged
+def render_word_cloud(frequencies, width=800, height=400):
+    """
+    Render a table of word counts, e.g. from WordFrequencyIndex.sync_frequencies, as a word cloud.
+
+    Returns:
+        PIL.Image.Image: The rendered image, or None if there are no words.
+    """
+    if not frequencies:
+        return None
+    key = (frequency_fingerprint(frequencies), width, height)
+    found, image = image_cache.get(key)
+    if found:
+        return image
+    with _render_lock:
+        found, image = image_cache.get(key)
+        if not found:
+            # Imported here so that only rendering pays for wordcloud and matplotlib
+            from wordcloud import WordCloud
+            image = WordCloud(width=width, height=height).generate_from_frequencies(frequencies).to_image()
+            image_cache.set(key, image)
+            logger.info(f"Rendered word cloud of {len(frequencies)} words")
+    return image